@@ -0,0 +1,60 @@
+"""
+Shared fixtures for the benchmark suite.
+
+Everything is generated offline and deterministically (rfi_matcher.utils.synthetic
+with fixed seeds), so that runs on different machines and commits can be compared:
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare
+
+Scaling studies can sweep other catalogue sizes, e.g.
+
+    RFI_MATCHER_BENCH_SIZES=1000,10000,50000 pytest benchmarks
+"""
+import os
+
+import pytest
+
+from rfi_matcher.utils import sopp_utils, synthetic
+
+# Catalogue sizes (number of satellites) used by the parametrized benchmarks
+CATALOGUE_SIZES = [int(n) for n in os.environ.get("RFI_MATCHER_BENCH_SIZES", "10,100,1000").split(",")]
+
+# Antenna pointing computed without the de421 planetary ephemeris (Sopp's default path
+# finder downloads it), passed explicitly to every screening benchmark
+PATH_FINDER_CLASS = sopp_utils.ObservationPathFinderOffline
+
+
+# ---------- FIXTURES ----------
+
+@pytest.fixture(scope="session")
+def catalogue_files(tmp_path_factory):
+    """Factory returning (tle_path, frequency_path) for a catalogue of ``n_sat`` satellites."""
+    root = tmp_path_factory.mktemp("catalogues")
+    cache = {}
+
+    def factory(n_sat):
+        if n_sat not in cache:
+            tles = synthetic.tle_catalogue(n_sat)
+            cache[n_sat] = (
+                synthetic.write_tle_file(root / f"satellites_{n_sat}.tle", tles),
+                synthetic.write_frequency_file(root / f"frequencies_{n_sat}.csv", tles),
+            )
+        return cache[n_sat]
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def observations():
+    return synthetic.observations(n_tracks=20, tracks_per_observation=1, duration_s=600, span_hours=12)
+
+
+def report_throughput(benchmark, **counts):
+    """Store ``<name>/s`` throughputs (from the mean round time) in the benchmark report."""
+    if benchmark.stats is None:   # --benchmark-disable
+        return
+    mean = benchmark.stats.stats.mean
+    for name, count in counts.items():
+        benchmark.extra_info[name] = count
+        benchmark.extra_info[f"{name}/s"] = count / mean if mean else float("inf")
@@ -0,0 +1,21 @@
+import pytest
+
+from rfi_matcher.model.rfi_filter import RaFilter
+from rfi_matcher.model.data_archives.meerkat_data_archive import MeerkatDataArchive
+
+from rfi_matcher.utils import synthetic
+
+from conftest import report_throughput
+
+
+@pytest.mark.parametrize("n_obs", [10, 100])
+def test_track_parsing_and_formatting(benchmark, monkeypatch, n_obs):
+    """get_observations() on recorded-like archive records (no network)."""
+    records = synthetic.meerkat_records(n_obs, tracks_per_observation=20)
+    monkeypatch.setattr(MeerkatDataArchive, "get_raw_observations", lambda self, num=1, **kw: records.copy())
+
+    archive = MeerkatDataArchive(RaFilter())
+    df = benchmark(archive.get_observations, num=n_obs)
+
+    assert len(df) == n_obs * 20
+    report_throughput(benchmark, records=n_obs, rows=len(df))
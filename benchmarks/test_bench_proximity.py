@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from rfi_matcher.utils import skyfield_utils
+
+from conftest import CATALOGUE_SIZES, report_throughput
+
+
+@pytest.mark.parametrize("npoints", [1000, 100000])
+def test_closest_radec(benchmark, npoints):
+    rng = np.random.default_rng(0)
+    ras, decs = rng.uniform(0, 360, npoints), rng.uniform(-90, 90, npoints)
+
+    benchmark(skyfield_utils.closest_radec, ras, decs, 69.3, -47.25)
+    report_throughput(benchmark, points=npoints)
+
+
+@pytest.mark.parametrize("n_sat", CATALOGUE_SIZES[:2])
+def test_sat_proximity(benchmark, catalogue_files, observations, n_sat):
+    from sopp.satellites_loader.satellites_loader_from_files import SatellitesLoaderFromFiles
+
+    tle_path, freq_path = catalogue_files(n_sat)
+    satellites = SatellitesLoaderFromFiles(tle_file=tle_path, frequency_file=freq_path).load_satellites()
+    obs = observations.iloc[0]
+    target_ra = skyfield_utils.ra_str_to_deg(obs["right_ascension"])
+    target_dec = skyfield_utils.dec_str_to_deg(obs["declination"])
+
+    def run():
+        for sat in satellites:
+            skyfield_utils.sat_proximity(sat, obs["begin"], obs["end"], target_ra, target_dec)
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    report_throughput(benchmark, satellites=n_sat)
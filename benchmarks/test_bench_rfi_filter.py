@@ -0,0 +1,37 @@
+import pytest
+
+from rfi_matcher.model.rfi_filter import RaFilter, load_ra_observatories
+
+from conftest import report_throughput
+
+
+def test_construction(benchmark):
+    load_ra_observatories()  # the table itself is parsed once per process
+    benchmark(RaFilter)
+
+
+def test_construction_cold(benchmark):
+    def cold():
+        load_ra_observatories.cache_clear()
+        return load_ra_observatories()
+
+    df = benchmark(cold)
+    report_throughput(benchmark, rows=len(df))
+
+
+@pytest.mark.parametrize("freq_mode", ["within", "overlap"])
+def test_filter_frequencies(benchmark, freq_mode):
+    flt = RaFilter()
+    benchmark(flt.filter_frequencies, 500, 20000, mode=freq_mode)
+    report_throughput(benchmark, rows=len(flt.ra_csv_df))
+
+
+def test_filter_observatories(benchmark):
+    flt = RaFilter().set_latitude([-40, 40]).set_longitude([-100, 150]).set_frequencies([500, 20000])
+    benchmark(flt.filter_observatories)
+    report_throughput(benchmark, rows=len(flt.ra_csv_df))
+
+
+def test_nearest_observatories(benchmark):
+    flt = RaFilter()
+    benchmark(flt.nearest_observatories, -30.7128, 21.4436, k=10)
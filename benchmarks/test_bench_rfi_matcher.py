@@ -0,0 +1,25 @@
+import pytest
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+
+from conftest import CATALOGUE_SIZES, PATH_FINDER_CLASS, report_throughput
+
+
+@pytest.mark.parametrize("n_sat", CATALOGUE_SIZES[:2])
+def test_end_to_end(benchmark, catalogue_files, observations, n_sat):
+    """extend_observations_with_rfi() followed by get_all_sat_proximities() (mainbeam crossings)."""
+    from sopp.satellites_loader.satellites_loader_from_files import SatellitesLoaderFromFiles
+
+    matcher = RfiMatcher(path_finder_class=PATH_FINDER_CLASS)
+    matcher.satellites_filepath, matcher.frequencies_filepath = catalogue_files(n_sat)
+    satellites = SatellitesLoaderFromFiles(
+        tle_file=matcher.satellites_filepath, frequency_file=matcher.frequencies_filepath
+    ).load_satellites()
+    obs = observations.head(5)
+
+    def run():
+        total_obs = matcher.extend_observations_with_rfi(obs, satellites=satellites)
+        return matcher.get_all_sat_proximities(total_obs)
+
+    benchmark.pedantic(run, rounds=2, iterations=1)
+    report_throughput(benchmark, rows=len(obs), satellites=n_sat * len(obs))
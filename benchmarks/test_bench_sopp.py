@@ -0,0 +1,35 @@
+import pytest
+
+from rfi_matcher.utils import sopp_utils
+
+from conftest import CATALOGUE_SIZES, PATH_FINDER_CLASS, report_throughput
+
+
+@pytest.mark.parametrize("n_sat", CATALOGUE_SIZES)
+@pytest.mark.parametrize("mainbeam", [True, False])
+def test_get_rfi_sources(benchmark, catalogue_files, observations, n_sat, mainbeam):
+    tle_path, freq_path = catalogue_files(n_sat)
+    obs = observations.iloc[0]
+
+    benchmark.pedantic(
+        sopp_utils.get_rfi_sources, args=(obs, tle_path, freq_path),
+        kwargs={"mainbeam": mainbeam, "path_finder_class": PATH_FINDER_CLASS}, rounds=3, iterations=1,
+    )
+    report_throughput(benchmark, satellites=n_sat)
+
+
+@pytest.mark.parametrize("n_sat", CATALOGUE_SIZES)
+def test_get_rfi_sources_preloaded(benchmark, catalogue_files, observations, n_sat):
+    """Satellites already loaded (e.g. from a shared catalogue): propagation and screening only."""
+    from sopp.satellites_loader.satellites_loader_from_files import SatellitesLoaderFromFiles
+
+    tle_path, freq_path = catalogue_files(n_sat)
+    satellites = SatellitesLoaderFromFiles(tle_file=tle_path, frequency_file=freq_path).load_satellites()
+    obs = observations.iloc[0]
+
+    benchmark.pedantic(
+        sopp_utils.get_rfi_sources, args=(obs,),
+        kwargs={"satellites": satellites, "path_finder_class": PATH_FINDER_CLASS},
+        rounds=3, iterations=1,
+    )
+    report_throughput(benchmark, satellites=n_sat)
@@ -1,19 +1,8 @@
-import pandas as pd
+import logging
 from pathlib import Path
-import matplotlib.pyplot as plt
-import katdal
-from skyfield.api import EarthSatellite
-from skyfield.timelib import Time
-
-from sopp.custom_dataclasses.satellite.satellite import Satellite
-
-from rfi_matcher.custom.my_tle_fetcher_spacetrack import MyTleFetcherSpacetrack
-
-import matplotlib.pyplot as plt
 
 from rfi_matcher.model.rfi_filter import RaFilter
 from rfi_matcher.rfi_matcher import RfiMatcher
-from rfi_matcher.utils import sopp_utils, time_utils, skyfield_utils
 
 
 def main(satellites_filepath=Path('')):
@@ -48,10 +37,12 @@ def main(satellites_filepath=Path('')):
     observations_satprox = matcher.get_all_sat_proximities(observations_rfi)
 
     # SAVE DATA IN A CSV FILE
-    observations_satprox.to_csv('data/rfi_data.csv')
+    matcher.save_results(observations_satprox, 'data/rfi_data.csv')
 
 
 if __name__ == "__main__":
+    # log=True reports the screening progress through logging
+    logging.basicConfig(level=logging.INFO)
 
     satellites_filepath = Path('data/satellites.tle')    
 
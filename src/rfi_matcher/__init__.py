@@ -0,0 +1,4 @@
+import logging
+
+# Library logging is silent unless the application configures it
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -1,37 +1,167 @@
-import requests
+import asyncio
+import gzip
+import logging
 import os
-from dotenv import load_dotenv
-
-from spacetrack import SpaceTrackClient
-import spacetrack.operators as op
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
 
 from .my_tle_fetcher_base import MyTleFetcherBase
 
-load_dotenv()
-IDENTITY = os.getenv("ID_SPACE_TRACK")
-PASSWORD = os.getenv("PWD_SPACE_TRACK")
+
+logger = logging.getLogger(__name__)
+
+SPACE_TRACK_HOST = "www.space-track.org"
+
+
+def get_credentials():
+    """
+    Space-Track identity and password, read from the environment (or a .env file)
+    when TLEs are actually fetched rather than at import time.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("ID_SPACE_TRACK"), os.getenv("PWD_SPACE_TRACK")
 
 
 class MyTleFetcherSpacetrack(MyTleFetcherBase):
+    """
+    The epoch range is split in one-day chunks downloaded concurrently (paced by the
+    shared client, c.f. utils.http_client). Each chunk is streamed line by line to
+    ``<tle file>.chunks/<day>.3le.gz``, then the chunks are merged into the TLE file,
+    keeping one entry per (NORAD id, epoch). Chunks already on disk are not downloaded
+    again, so an interrupted fetch continues where it stopped.
+    """
+    # Metrics recording the Space-Track requests (c.f. utils.metrics), set by RfiMatcher
+    metrics = None
+    # Chunks downloaded at the same time (Space-Track allows 30 requests per minute)
+    max_concurrency = 4
+
+    def fetch_tles(self) -> Path:
+        days = epoch_days(self._begin, self._end)
+        if days is None:
+            # relative epochs (e.g. "now-30"): a single request
+            return super().fetch_tles()
+
+        chunk_dir = self._tle_file_path.with_name(self._tle_file_path.name + ".chunks")
+        chunks = asyncio.run(self.__download(days, chunk_dir))
+        written = merge_tle_chunks(chunks, self._tle_file_path)
+        logger.info("%d TLEs from %d daily chunks written to %s", written, len(chunks), self._tle_file_path)
+        return self._tle_file_path
+
+
     def _fetch_content(self):
+        '''Whole epoch range in a single request, in memory (small, relative ranges).'''
+        import requests
+        from spacetrack import SpaceTrackClient
+        from ..utils import http_client
+
         epoch = f'{self._begin}--{self._end}'
+        identity, password = get_credentials()
+
+        with SpaceTrackClient(identity=identity, password=password) as st:
+            data = http_client.default_client().call(
+                SPACE_TRACK_HOST,
+                lambda: st.gp(epoch=epoch, format="3le", object_type="Payload"),
+                metrics=self.metrics,
+            )
+
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = data.encode('utf8')
+        return response
+
+
+    async def __download(self, days, chunk_dir: Path) -> list[Path]:
+        from spacetrack import AsyncSpaceTrackClient
+
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        chunks = [chunk_dir / f"{day.isoformat()}.3le.gz" for day in days]
+        # chunks of days not over yet are incomplete: always downloaded again
+        today = datetime.now(timezone.utc).date()
+        missing = [(day, chunk) for day, chunk in zip(days, chunks) if not chunk.exists() or day >= today]
+        if not missing:
+            return chunks
+
+        identity, password = get_credentials()
+        limit = asyncio.Semaphore(self.max_concurrency)
+        async with AsyncSpaceTrackClient(identity=identity, password=password) as st:
+            async def fetch(day, chunk):
+                async with limit:
+                    await self.__download_chunk(st, day, chunk)
+
+            await asyncio.gather(*(fetch(day, chunk) for day, chunk in missing))
+        return chunks
+
+
+    async def __download_chunk(self, st, day: date, chunk: Path):
+        from ..utils import http_client
+
+        epoch = f"{day.isoformat()}--{(day + timedelta(days=1)).isoformat()}"
+        tmp = chunk.with_name(chunk.name + ".tmp")
+
+        async def stream():
+            # restarted from scratch on retries
+            lines = await st.gp(epoch=epoch, format="3le", object_type="Payload", iter_lines=True)
+            n = 0
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                async for line in lines:
+                    f.write(line.rstrip("\r\n") + "\n")
+                    n += 1
+            return n
+
+        n = await http_client.default_client().call_async(SPACE_TRACK_HOST, stream, metrics=self.metrics)
+        # only complete chunks get their final name
+        tmp.replace(chunk)
+        if self.metrics is not None:
+            self.metrics.count("tle_chunks_downloaded")
+        logger.debug("%s: %d lines", chunk.name, n)
+
+
+def epoch_days(begin: str, end: str) -> list[date] | None:
+    '''UTC days from begin to end (inclusive, ISO dates), None if they are not dates.'''
+    try:
+        first, last = date.fromisoformat(begin[:10]), date.fromisoformat(end[:10])
+    except (TypeError, ValueError):
+        return None
+    return [first + timedelta(days=k) for k in range((last - first).days + 1)]
+
+
+def merge_tle_chunks(chunks, path) -> int:
+    '''
+    Stream the (gzipped) 3LE chunks into a single 3LE file, keeping the first entry of
+    every (NORAD id, epoch). Returns the number of TLEs written.
+    '''
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    seen = set()
+    with open(tmp, "w", encoding="utf-8") as out:
+        for chunk in chunks:
+            for name, line1, line2 in _read_3le(chunk):
+                key = (line1[2:7], line1[18:32])
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.write(f"{name}\n{line1}\n{line2}\n")
+    tmp.replace(path)
+    return len(seen)
+
 
-        try:
-            with SpaceTrackClient(identity=IDENTITY, password=PASSWORD) as st:
-                data = st.gp(
-                    epoch=epoch,
-                    format="3le",
-                    object_type="Payload"
-                )
-
-                response = requests.models.Response()
-                response.status_code = 200
-                response._content = data.encode('utf8')
-
-                print(data)
-
-                return response
-            
-        except Exception as e:
-            print(f"Error fetching TLE data: {str(e)}")
-            raise
\ No newline at end of file
+def _read_3le(chunk):
+    # (name, line 1, line 2) entries, the name line (0 ...) being optional
+    opener = gzip.open if str(chunk).endswith(".gz") else open
+    with opener(chunk, "rt", encoding="utf-8") as f:
+        name, line1 = None, None
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if line.startswith("1 "):
+                line1 = line
+            elif line.startswith("2 ") and line1 is not None:
+                yield name or line1[2:7].strip(), line1, line
+                name, line1 = None, None
+            else:
+                name, line1 = line, None
@@ -0,0 +1,199 @@
+"""
+Compact, typed representation of observation and match tables.
+
+Archive frames repeat the same strings on every track: observatory name,
+observation id, coordinate strings and the signed url (whose access token is
+the same for every capture block). The compact observation table keeps
+
+- name, observation_id: categorical
+- right_ascension, declination: float64 degrees
+- begin, end: datetime64[ns] (UTC)
+- url_path: categorical (one entry per capture block)
+- url_query: categorical (the token is stored once)
+
+and matches (the NORAD column of lists) move to a separate long table with one
+typed row per (observation row, satellite), c.f. ``match_table``.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+CATEGORICAL_COLUMNS = ["name", "observation_id"]
+URL_COLUMNS = ["url_path", "url_query"]
+MATCH_COLUMNS = ["row", "norad", "sat", "timestamp", "right_ascension", "declination", "angular_distance"]
+
+
+# ---------- OBSERVATIONS ----------
+
+def compact_observations(observations: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Compact copy of an observation frame (c.f. DataArchive.get_df_order()); columns
+    other than the ones above (e.g. NORAD) are kept as they are.
+    '''
+    import pandas as pd
+    from rfi_matcher.utils import skyfield_utils
+
+    compact = pd.DataFrame(index=observations.index)
+    for column in observations.columns:
+        values = observations[column]
+        if column in CATEGORICAL_COLUMNS:
+            compact[column] = values.astype("category")
+        elif column == "right_ascension":
+            compact[column] = _parse_repeated(values, skyfield_utils.ra_str_to_deg)
+        elif column == "declination":
+            compact[column] = _parse_repeated(values, skyfield_utils.dec_str_to_deg)
+        elif column in ("begin", "end"):
+            compact[column] = _to_datetime(values)
+        elif column in ("frequency", "bandwidth"):
+            compact[column] = pd.to_numeric(values).astype(np.float64)
+        elif column == "url":
+            parts = values.astype(str).str.partition("?")
+            compact["url_path"] = parts[0].astype("category")
+            compact["url_query"] = parts[2].astype("category")
+        else:
+            compact[column] = values
+    return compact
+
+
+def expand_observations(compact: pd.DataFrame) -> pd.DataFrame:
+    '''Back to the archive string format (c.f. utils.formats).'''
+    import pandas as pd
+    from rfi_matcher.utils.formats import format_dms, format_hms, format_iso
+
+    observations = pd.DataFrame(index=compact.index)
+    for column in compact.columns:
+        values = compact[column]
+        if column in CATEGORICAL_COLUMNS:
+            observations[column] = values.astype(values.cat.categories.dtype)
+        elif column == "right_ascension":
+            observations[column] = _format_repeated(values, format_hms)
+        elif column == "declination":
+            observations[column] = _format_repeated(values, format_dms)
+        elif column in ("begin", "end"):
+            observations[column] = format_iso(values.to_numpy())
+        elif column == "url_path":
+            query = compact["url_query"].astype(str)
+            observations["url"] = np.where(query != "", values.astype(str) + "?" + query, values.astype(str))
+        elif column == "url_query":
+            continue
+        else:
+            observations[column] = values
+    return observations
+
+
+def is_compact(observations: pd.DataFrame) -> bool:
+    from pandas.api.types import is_datetime64_any_dtype
+    return "url_path" in observations.columns or (
+        "begin" in observations.columns and is_datetime64_any_dtype(observations["begin"])
+    )
+
+
+def concat_compact(frames: list) -> pd.DataFrame:
+    '''Concatenate compact tables, merging their categories (pd.concat would fall back to object).'''
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+
+    categorical = [c for c in frames[0].columns if isinstance(frames[0][c].dtype, pd.CategoricalDtype)]
+    merged = pd.concat([f.drop(columns=categorical) for f in frames], ignore_index=True)
+    for column in categorical:
+        merged[column] = union_categoricals([f[column] for f in frames])
+    return merged[list(frames[0].columns)]
+
+
+# ---------- MATCHES ----------
+
+def match_table(observations: pd.DataFrame, column: str = "NORAD") -> pd.DataFrame:
+    '''
+    One row per (observation row, matched satellite) of the ``column`` lists, holding
+    either Sopp satellites (extend_observations_with_rfi) or proximity dicts
+    (get_all_sat_proximities). ``row`` is the position of the observation in the frame.
+    '''
+    import pandas as pd
+
+    rows, norad, sat, timestamp, ra, dec, distance = [], [], [], [], [], [], []
+    for position, matches in enumerate(observations[column].to_numpy()):
+        if not isinstance(matches, (list, tuple)):
+            continue
+        for match in matches:
+            rows.append(position)
+            if isinstance(match, dict):
+                norad.append(match.get("norad", -1))
+                sat.append(match["sat"])
+                timestamp.append(match.get("timestamp"))
+                ra.append(match.get("right_ascension", np.nan))
+                dec.append(match.get("declination", np.nan))
+                distance.append(match.get("angular_distance", np.nan))
+            else:
+                norad.append(match.tle_information.satellite_number)
+                sat.append(match.name)
+                timestamp.append(None)
+                ra.append(np.nan)
+                dec.append(np.nan)
+                distance.append(np.nan)
+
+    return pd.DataFrame({
+        "row": np.array(rows, dtype=np.int64),
+        "norad": np.array(norad, dtype=np.int32),
+        "sat": pd.Categorical(sat),
+        "timestamp": pd.to_datetime(pd.Series(timestamp, dtype=object), format="ISO8601", utc=True)
+                       .dt.tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+        "right_ascension": np.array(ra, dtype=np.float64),
+        "declination": np.array(dec, dtype=np.float64),
+        "angular_distance": np.array(distance, dtype=np.float64),
+    }, columns=MATCH_COLUMNS)
+
+
+def nest_matches(matches: pd.DataFrame, n_rows: int) -> list[list[dict]]:
+    '''Inverse of match_table for proximity matches: one list of dicts per observation row.'''
+    nested = [[] for _ in range(n_rows)]
+    timestamps = np.datetime_as_string(matches["timestamp"].to_numpy(dtype="datetime64[us]"), unit="us")
+    for row, norad, sat, timestamp, ra, dec, distance in zip(
+        matches["row"].to_numpy(), matches["norad"].to_numpy(), matches["sat"].astype(str).to_numpy(), timestamps,
+        matches["right_ascension"].to_numpy(), matches["declination"].to_numpy(),
+        matches["angular_distance"].to_numpy(),
+    ):
+        nested[row].append({
+            "sat": sat,
+            "norad": int(norad),
+            "timestamp": None if timestamp == "NaT" else timestamp + "+00:00",
+            "declination": float(dec),
+            "right_ascension": float(ra),
+            "angular_distance": float(distance),
+        })
+    return nested
+
+
+def memory_bytes(frame: pd.DataFrame) -> int:
+    '''Deep memory usage of a frame (object columns included).'''
+    return int(frame.memory_usage(deep=True).sum())
+
+
+# ---------- HELPERS ----------
+
+def _parse_repeated(values, parse) -> np.ndarray:
+    # coordinates repeat over the tracks of a target: parse each distinct string once
+    import pandas as pd
+    codes, uniques = pd.factorize(values)
+    return np.array([parse(v) for v in uniques], dtype=np.float64)[codes]
+
+
+def _format_repeated(values, format_) -> np.ndarray:
+    import pandas as pd
+    codes, uniques = pd.factorize(values)
+    return format_(np.asarray(uniques, dtype=float))[codes]
+
+
+def _to_datetime(values):
+    import pandas as pd
+    times = pd.to_datetime(values, format="ISO8601", utc=True)
+    return times.dt.tz_localize(None).astype("datetime64[ns]")
@@ -1,15 +1,25 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
 import inspect
 
-from urllib.request import urlopen
-import json
-import pandas as pd
-
 from ..rfi_filter import RaFilter
+from ...utils import http_client
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class DataArchive(ABC):
     required_attributes = ["name", "latitude", "longitude", "elevation"]
 
+    # Metrics recording archive request latencies (c.f. utils.metrics), set by RfiMatcher
+    metrics = None
+
+    # Observatories of this archive queried at the same time by RfiMatcher.get_all_observations
+    max_concurrency = 1
+
     def __init_subclass__(cls):
         super().__init_subclass__()
 
@@ -51,14 +61,31 @@ class DataArchive(ABC):
 
     def get_html(self, url):
         '''
-        Returns json data read from the url given in parameter    
+        Returns json data read from the url given in parameter, rate limited and retried
+        by the shared client (c.f. utils.http_client)
         '''
-        page = urlopen(url)
+        with self.request_timer():
+            return http_client.default_client().get_json(url, metrics=self.metrics)
 
-        html_bytes = page.read()
-        html = html_bytes.decode("utf-8")
 
-        return json.loads(html)
+    def stage(self, name: str):
+        '''
+        Context manager timing (and, if enabled, profiling) an archive processing stage,
+        e.g. track parsing (no-op without metrics).
+        '''
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.stage(name, archive=self.name)
+
+
+    def request_timer(self):
+        '''
+        Context manager timing one archive request into the "archive_request" latency
+        summary of ``self.metrics`` (no-op without metrics).
+        '''
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.time("archive_request", archive=self.name)
 
 
     def freq_to_bands(self, freq_min, freq_max):
@@ -12,6 +12,8 @@ import re
 
 import pandas as pd
 
+from ...utils import http_client
+
 
 def parse_filters(raw_filters: List[str]) -> List[Dict[str, Any]]:
     filters = []
@@ -352,8 +354,10 @@ async def data(
     no_check_certificate: bool = False,
     sort: List[str] = [],
     product_type: str = None,
+    metrics=None,
 ):
     filters = filters or []
+    client = http_client.default_client()
     sort = sort or []
 
     try:
@@ -380,7 +384,7 @@ async def data(
             ),
             fetch_schema_from_transport=True,
         ) as session:
-            await session.fetch_schema()
+            await client.call_async(auth_address, session.fetch_schema, metrics=metrics)
             schema = session.client.schema
             capture_block_type = schema.get_type("CaptureBlock")
 
@@ -440,7 +444,9 @@ async def data(
                         "filters": filters,
                         "sort": sort,
                     }
-                    result = await session.execute(query, variable_values=variables)
+                    result = await client.call_async(
+                        auth_address, lambda: session.execute(query, variable_values=variables), metrics=metrics
+                    )
                     records = result["captureBlocks"]["records"]
                     page_info = result["captureBlocks"]["pageInfo"]
 
@@ -1,16 +1,26 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
 import re
-import pandas as pd
 from datetime import datetime, timedelta
-import asyncio
-
-from astropy.coordinates import Angle
-import astropy.units as u
-
-from . import meerkat_api
+from typing import TYPE_CHECKING
 
 from .data_archive import DataArchive
 from ..rfi_filter import RaFilter
 
+# pandas, astropy and the archive client (gql, aiohttp) are imported when
+# observations are actually fetched
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Capture block fields requested from the archive: only the ones the tracks are built from
+# (the bandwidth is MaxFreq - MinFreq)
+FIELDS = ("rdb", "ProductId", "MinFreq", "MaxFreq", "Targets", "DecRa", "StartTime", "Duration", "details")
+
 class MeerkatDataArchive(DataArchive):
 
     name = "MEERKAT"
@@ -24,60 +34,118 @@ class MeerkatDataArchive(DataArchive):
 
     def get_observations(self, num=1):
         observations = self.get_raw_observations(num)
-        final_obs = self.__format_to_sopp(observations)
+        with self.stage("parse_tracks"):
+            kept = self.prefilter(observations)
+            if self.metrics is not None:
+                self.metrics.count("observations_prefiltered", len(observations) - len(kept), archive=self.name)
+            final_obs = self.__format_to_sopp(kept)
         return final_obs
     
 
-    def get_raw_observations(self, num=1, fields="rdb,ProductId,MinFreq,MaxFreq,Bandwidth,Targets,DecRa,StartTime,Duration,details") -> pd.DataFrame:
+    def get_raw_observations(self, num=1, fields=",".join(FIELDS)) -> pd.DataFrame:
+        import asyncio
+        import pandas as pd
+        from . import meerkat_api
+
+        filters = self.server_filters()
+        logger.debug("filters: %s", filters)
+
+
+        # TODO understand why if fields="*" => product_type can't be None
+        # something to do with fetched object being GraphQLObjectType instead of GraphQLScalarType
+        # c.f. build_selection_block() of meerkat_api.py
+        with self.request_timer():
+            observations = asyncio.run(
+                meerkat_api.data(
+                    auth_address="https://archive.sarao.ac.za",
+                    fields=fields,
+                    exclude_fields="products,FileSize",
+                    search="*",
+                    limit=num,
+                    show_fields=False,
+                    url_format=meerkat_api.URLFormat("external").value,
+                    filters=filters,
+                    no_check_certificate=False,
+                    sort=[],
+                    product_type=None,
+                    metrics=self.metrics,
+                )
+            )
+
+        return pd.DataFrame(observations)
+
+
+    def server_filters(self) -> list[str]:
+        '''
+        RaFilter constraints the archive's search supports, in meerkat_api.parse_filters
+        format: bands overlapping the frequency range, the days of the time window and,
+        if set, the sky region. The exact bounds are applied by prefilter.
+        '''
         flt = self.ra_filter
 
         # Get bands corresponding to frequencies of interest
         # Transform the list into the required string format for meerkat archive API
-        bands = self.freq_to_bands(flt.freq_range[0], flt.freq_range[1])
-        bands = ",".join(bands)
-
-        # Get filter start/end time and extract date from it (i.e. 2025-10-03) --> requirement of meerkat archive API
-        dt_start = datetime.fromisoformat(flt.startTimeUTC)
-        start_date = dt_start.date()                  
+        bands = ",".join(self.freq_to_bands(flt.freq_range[0], flt.freq_range[1]))
 
-        dt_end = datetime.fromisoformat(flt.endTimeUTC)
-        end_date = dt_end.date()
+        # the archive searches whole days (i.e. 2025-10-03)
+        start_date = datetime.fromisoformat(flt.startTimeUTC).date()
+        end_date = datetime.fromisoformat(flt.endTimeUTC).date()
 
         filters = [f"Band={bands}", f"from={start_date}", f"to={end_date}"]
-        print('filters:', filters)
+        if flt.sky_region is not None:
+            filters.append(f"radec={json.dumps(list(flt.sky_region))}")
+        return filters
+
+
+    def prefilter(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Drop the raw records outside the exact RaFilter constraints before their details
+        are parsed: band not overlapping the frequency range, capture block not overlapping
+        the time window, no target in the sky region.
+        '''
+        import numpy as np
+        from ...utils import time_utils
+
+        if df.empty:
+            return df
+        flt = self.ra_filter
+        keep = np.ones(len(df), dtype=bool)
 
+        # archive frequencies are in Hz, the filter's in MHz
+        freq_min, freq_max = np.asarray(flt.freq_range, dtype=float) * 1e6
+        keep &= ~(df["MaxFreq"].to_numpy(dtype=float) < freq_min)
+        keep &= ~(df["MinFreq"].to_numpy(dtype=float) > freq_max)
 
-        # TODO understand why if fields="*" => product_type can't be None
-        # something to do with fetched object being GraphQLObjectType instead of GraphQLScalarType
-        # c.f. build_selection_block() of meerkat_api.py
-        observations = asyncio.run(
-            meerkat_api.data(
-                auth_address="https://archive.sarao.ac.za",
-                fields=fields,
-                exclude_fields="products,FileSize",
-                search="*",
-                limit=num,
-                show_fields=False,
-                url_format=meerkat_api.URLFormat("external").value,
-                filters=filters,
-                no_check_certificate=False,
-                sort=[],
-                product_type=None,
-            )
-        )
+        # comparisons with NaN (unknown duration) are False: kept
+        window_start, window_end = self.__window()
+        start = time_utils.parse_times(df["StartTime"])
+        end = start + (df["Duration"].to_numpy(dtype=float) * 1e9).astype("timedelta64[ns]")
+        keep &= ~(start > window_end)
+        keep &= ~(end < window_start)
 
-        # print('\n\n\nOBSERVATIONS', observations)
+        if flt.sky_region is not None:
+            keep &= np.array([
+                any(_in_region(decra, flt.sky_region) for decra in targets)
+                for targets in df["DecRa"]
+            ], dtype=bool)
 
-        return pd.DataFrame(observations)
+        return df[keep]
 
 
     def __format_to_sopp(self, df):
+        import numpy as np
+        import pandas as pd
+        from astropy.coordinates import Angle
+        import astropy.units as u
+
+        window = tuple(t.astype("datetime64[us]").item() for t in self.__window())
+        region = self.ra_filter.sky_region
 
         rows = []
         # iterate on observations
         for _, row in df.iterrows():
             # break down each observation session into its respective track observations
-            tracks = self.__extract_tracks(row)
+            tracks = self.__extract_tracks(row, window, region)
             for t in tracks:
                 new_row = row.to_dict()
                 new_row["declination"] = t["declination"]
@@ -87,6 +155,8 @@ class MeerkatDataArchive(DataArchive):
                 rows.append(new_row)
 
         expanded_df = pd.DataFrame(rows)
+        if expanded_df.empty:
+            return pd.DataFrame(columns=self.get_df_order())
 
         # Convert the declination column from degrees to dms string format
         expanded_df["declination"] = Angle(expanded_df["declination"].values * u.deg).to_string(unit=u.deg, sep='dms', precision=3)
@@ -95,11 +165,12 @@ class MeerkatDataArchive(DataArchive):
         right_ascensions = (expanded_df["right_ascension"].values + 360) % 360
         expanded_df["right_ascension"] = Angle(right_ascensions * u.deg).to_string(unit=u.hour, sep='hms', precision=1)
 
-        # Rename "Bandwidth" and "rdb" to conform with sopp config format
-        expanded_df = expanded_df.rename(columns={"Bandwidth": "bandwidth", "rdb": "url", "ProductId": "observation_id"})
+        # Rename "rdb" to conform with sopp config format
+        expanded_df = expanded_df.rename(columns={"rdb": "url", "ProductId": "observation_id"})
 
-        # convert MinFreq, MaxFreq columns into a center frequency property
+        # convert MinFreq, MaxFreq columns into center frequency and bandwidth properties
         expanded_df['frequency'] = (expanded_df['MinFreq'] + expanded_df['MaxFreq']) / 2
+        expanded_df['bandwidth'] = expanded_df['MaxFreq'] - expanded_df['MinFreq']
 
         # add name in first column
         expanded_df["name"] = [self.name]*len(expanded_df)
@@ -112,7 +183,13 @@ class MeerkatDataArchive(DataArchive):
         return expanded_df[self.get_df_order()]
     
 
-    def __extract_tracks(self, df_row):
+    def __window(self):
+        # RaFilter time window as datetime64 (naive UTC)
+        from ...utils import time_utils
+        return time_utils.parse_times(self.ra_filter.startTimeUTC), time_utils.parse_times(self.ra_filter.endTimeUTC)
+
+
+    def __extract_tracks(self, df_row, window=None, region=None):
         """
         Extract tracking scan information from a Meerkat observation metadata row.
 
@@ -128,6 +205,9 @@ class MeerkatDataArchive(DataArchive):
         Start and end times are converted to full ISO-8601 timestamps using the date
         contained in the ``StartTime`` column of the dataframe row.
 
+        Tracks ending before / starting after the ``window`` (start, end) datetimes, and
+        tracks pointing outside the sky ``region`` (ra, dec, radius) are skipped.
+
         Target celestial coordinates (Dec/Ra) are obtained from the dictionary 
         provided by ``self.__target_decra_dict(df_row)``, which maps each target name 
         to a string of the form ``"dec, ra"``.
@@ -174,6 +254,8 @@ class MeerkatDataArchive(DataArchive):
             flags=re.MULTILINE
         )
 
+        import pandas as pd
+
         text = df_row["details"]
         date_obj = pd.to_datetime(df_row["StartTime"]).date()
         target_decra = self.__target_decra_dict(df_row)
@@ -187,15 +269,22 @@ class MeerkatDataArchive(DataArchive):
             track   = int(m.group("track"))
             target_id = m.group("target_id")
 
+            start = datetime.combine(date_obj, datetime.strptime(start_t, "%H:%M:%S").time())
+            end = datetime.combine(date_obj, datetime.strptime(end_t, "%H:%M:%S").time())
+            if window is not None and (end < window[0] or start > window[1]):
+                continue
+
             # Convert to full ISO timestamps
-            start_iso = datetime.combine(date_obj, datetime.strptime(start_t, "%H:%M:%S").time()).isoformat()
-            end_iso   = datetime.combine(date_obj, datetime.strptime(end_t, "%H:%M:%S").time()).isoformat()
+            start_iso = start.isoformat()
+            end_iso   = end.isoformat()
 
             # Get dec/ra strings from mapping → split
             try: 
                 dec_str, ra_str = target_decra[target_id].split(",")
                 dec = float(dec_str)
                 ra = float(ra_str)
+                if region is not None and not _in_region(target_decra[target_id], region):
+                    continue
 
                 results.append({
                     "track": track,
@@ -207,7 +296,7 @@ class MeerkatDataArchive(DataArchive):
                 })
 
             except Exception as e:
-                print("Error:", str(e))
+                logger.warning("Skipping track %s of %s: %s", track, df_row.get("ProductId"), e)
                 continue
 
         return results
@@ -219,4 +308,16 @@ class MeerkatDataArchive(DataArchive):
         decra = df_row["DecRa"]  
 
         target_map = dict(zip(targets, decra))
-        return target_map
\ No newline at end of file
+        return target_map
+
+
+def _in_region(decra: str, region) -> bool:
+    '''Whether the "dec, ra" (degrees) of an archive target is within the (ra, dec, radius) region.'''
+    try:
+        dec, ra = (math.radians(float(v)) for v in decra.split(","))
+    except (AttributeError, ValueError):
+        # unparsable coordinates: left to the track parsing, which logs them
+        return True
+    ra0, dec0, radius = (math.radians(v) for v in region)
+    cos = math.sin(dec) * math.sin(dec0) + math.cos(dec) * math.cos(dec0) * math.cos(ra - ra0)
+    return cos >= math.cos(radius)
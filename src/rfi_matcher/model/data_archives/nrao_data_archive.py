@@ -1,8 +1,16 @@
-import pandas as pd
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
 
 from .data_archive import DataArchive
 from ..rfi_filter import RaFilter
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
 class NraoDataArchive(DataArchive):
     name = "NRAO"
     latitude = 34.083
@@ -19,16 +27,18 @@ class NraoDataArchive(DataArchive):
         self.num_rows = NUM_ROWS
 
 
-    def get_observations(self):
+    def get_observations(self, num: int = None):
         # NRAO_PORTAL_URL = f"https://data.nrao.edu/archive-service/restapi_get_eb_project_view?start={START}&rows={NUM_ROWS}&sort=proj_stop%20desc"
 
         # Read list of projects from NRAO data archive portal
+        import pandas as pd
+
         project_codes = self.get_project_codes()
 
         df = pd.DataFrame()
         for code in project_codes:
             project_url = self.get_url_project(code)
-            print('url:', project_url)
+            logger.debug("url: %s", project_url)
             project_data = self.get_html(project_url)
 
             observations = [
@@ -40,7 +50,7 @@ class NraoDataArchive(DataArchive):
             
             df = pd.concat([df, pd.DataFrame(observations)], ignore_index=True, sort=False)
 
-        return df
+        return df if num is None else df.head(num)
             
 
     def get_target_observations(self, observations: pd.DataFrame, target_bands = {"KA"}) -> pd.DataFrame:
@@ -51,6 +61,8 @@ class NraoDataArchive(DataArchive):
 
 
     def get_project_codes(self):
+        import pandas as pd
+
         NRAO_PORTAL_URL = f"https://data.nrao.edu/archive-service/restapi_get_eb_project_view?start={self.start}&rows={self.num_rows}&sort=proj_stop%20desc"
         nrao_portal_data = self.get_html(NRAO_PORTAL_URL)
 
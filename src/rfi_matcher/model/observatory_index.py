@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class ObservatoryIndex:
+    """
+    Precomputed indexes over the ITU observatory table, so that RaFilter queries
+    don't scan the whole table:
+
+    - frequency: rows sorted by ``freq_from`` (with the widest band kept aside) to
+      answer overlap / containment queries with binary searches
+    - location: rows sorted by ``lat_dec`` for latitude/longitude box queries and a
+      KD-tree over unit vectors for radius-around-point and nearest queries
+    - name: hash index from ``stn_name`` to row positions
+
+    All queries return sorted row positions (for ``DataFrame.iloc``).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+
+        # ---- frequency interval index ----
+        freq_from = df["freq_from"].to_numpy(dtype=float)
+        freq_to = df["freq_to"].to_numpy(dtype=float)
+        self._by_from = np.argsort(freq_from, kind="stable")
+        self._from_sorted = freq_from[self._by_from]
+        self._to_by_from = freq_to[self._by_from]
+        widths = freq_to - freq_from
+        self._max_width = float(np.nanmax(widths)) if self.size else 0.0
+
+        # ---- spatial index ----
+        lat = df["lat_dec"].to_numpy(dtype=float)
+        lon = df["long_dec"].to_numpy(dtype=float)
+        self._by_lat = np.argsort(lat, kind="stable")
+        self._lat_sorted = lat[self._by_lat]
+        self._lon_by_lat = lon[self._by_lat]
+        self._lat = lat
+        self._lon = lon
+        self._tree = None
+
+        # ---- name index ----
+        self._names = {
+            name: np.asarray(positions, dtype=np.int64)
+            for name, positions in df.groupby("stn_name", sort=False).indices.items()
+        }
+
+
+    # ---------- FREQUENCY ----------
+
+    def frequency(self, freq_min, freq_max, mode="within") -> np.ndarray:
+        """
+        Rows whose [freq_from, freq_to] band (MHz):
+        - mode="within": lies entirely inside [freq_min, freq_max]
+        - mode="overlap": overlaps [freq_min, freq_max]
+        - mode="contains": covers the whole [freq_min, freq_max] range
+        """
+        if mode == "within":
+            lo = np.searchsorted(self._from_sorted, freq_min, side="left")
+            hi = np.searchsorted(self._from_sorted, freq_max, side="right")
+            keep = self._to_by_from[lo:hi] <= freq_max
+        elif mode == "overlap":
+            # a band starting before freq_min - max_width can't reach freq_min
+            lo = np.searchsorted(self._from_sorted, freq_min - self._max_width, side="left")
+            hi = np.searchsorted(self._from_sorted, freq_max, side="right")
+            keep = self._to_by_from[lo:hi] >= freq_min
+        elif mode == "contains":
+            lo = np.searchsorted(self._from_sorted, freq_max - self._max_width, side="left")
+            hi = np.searchsorted(self._from_sorted, freq_min, side="right")
+            keep = self._to_by_from[lo:hi] >= freq_max
+        else:
+            raise ValueError("Frequency mode must be one of 'within', 'overlap' or 'contains'.")
+
+        return np.sort(self._by_from[lo:hi][keep])
+
+
+    # ---------- LOCATION ----------
+
+    def box(self, lat_range, lon_range) -> np.ndarray:
+        """Rows within a latitude/longitude box (degrees, bounds included)."""
+        lo = np.searchsorted(self._lat_sorted, lat_range[0], side="left")
+        hi = np.searchsorted(self._lat_sorted, lat_range[1], side="right")
+        lon = self._lon_by_lat[lo:hi]
+        keep = (lon >= lon_range[0]) & (lon <= lon_range[1])
+        return np.sort(self._by_lat[lo:hi][keep])
+
+    def radius(self, lat, lon, radius_km) -> np.ndarray:
+        """Rows within ``radius_km`` (great-circle distance) of a point."""
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        positions = self.tree.query_ball_point(_unit_vector(lat, lon), r=chord)
+        return np.sort(np.asarray(positions, dtype=np.int64))
+
+    def nearest(self, lat, lon, k=1):
+        """Positions and great-circle distances (km) of the ``k`` nearest rows."""
+        k = min(k, self.size)
+        chord, positions = self.tree.query(_unit_vector(lat, lon), k=k)
+        chord, positions = np.atleast_1d(chord), np.atleast_1d(positions)
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+        return positions.astype(np.int64), distance_km
+
+    @property
+    def tree(self):
+        # Built on first spatial query only
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(_unit_vector(self._lat, self._lon))
+        return self._tree
+
+
+    # ---------- NAME ----------
+
+    def names(self, names) -> np.ndarray:
+        """Rows of the given station names."""
+        found = [self._names[n] for n in names if n in self._names]
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+
+def _unit_vector(lat, lon) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
@@ -0,0 +1,289 @@
+"""
+Queryable index over screening results: the frames returned by the RfiMatcher
+stages, or their ``rfi_data.csv`` export (c.f. RfiMatcher.save_results).
+
+    index = ResultIndex.from_csv("data/rfi_data.csv")
+    index.save("data/rfi_data.resultidx")
+
+    index = ResultIndex.load("data/rfi_data.resultidx")
+    index.observations_of(25338, "2025-07-01", "2025-08-01")
+    index.overhead("MEERKAT", "2025-06-27T04:38:00")
+
+The NORAD cells are parsed once, when the index is built. The index is a
+directory of typed ``.npy`` columns:
+
+    observations    sorted by (observatory, begin); observatory k holds rows
+                    observatory_offsets[k]:observatory_offsets[k + 1]
+    matches         one row per (observation, satellite), sorted by satellite;
+                    satellite k holds rows satellite_offsets[k]:satellite_offsets[k + 1],
+                    observation i rows observation_matches[match_offsets[i]:match_offsets[i + 1]]
+    satellites      distinct (NORAD id, name) pairs, sorted by NORAD id
+
+so a satellite lookup is a binary search plus a slice (the inverted index), and
+the observations of an observatory are queried through an IntervalIndex over
+their windows, then their matches gathered by slices. Loading memory-maps the columns.
+"""
+from __future__ import annotations
+
+import ast
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from . import compact_table
+from ..utils.directories import replace_directory
+from ..utils.interval_index import IntervalIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+OBSERVATION_COLUMNS = ("observatory", "observation_id", "frequency", "bandwidth",
+                       "right_ascension", "declination", "begin", "end", "row")
+MATCH_COLUMNS = ("observation", "satellite", "timestamp", "sat_right_ascension",
+                 "sat_declination", "angular_distance")
+LABELS = ("observatories", "observation_ids", "satellite_names")
+ARRAYS = tuple(f"obs_{c}" for c in OBSERVATION_COLUMNS) + tuple(f"match_{c}" for c in MATCH_COLUMNS) \
+    + ("satellite_norad", "satellite_name", "satellite_offsets", "observatory_offsets",
+       "observation_matches", "match_offsets") + LABELS
+FORMAT_VERSION = 1
+
+# Sopp Satellite reprs, as written to the CSV by extend_observations_with_rfi
+SATELLITE_REPR = re.compile(r"Satellite\(name=(['\"])(?P<name>.*?)\1, tle_information=.*?satellite_number=(?P<norad>\d+)")
+
+
+class ResultIndex:
+    """
+    Build with ``from_results`` (a results frame) or ``from_csv``, then ``save`` /
+    ``load``. Times are datetime64[ns] (naive UTC), coordinates in degrees.
+    """
+
+    def __init__(self, arrays: dict):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self._intervals = {}
+        self._upper_names = None
+
+    def __len__(self):
+        return len(self.obs_begin)
+
+
+    # ---------- BUILDING ----------
+
+    @classmethod
+    def from_results(cls, results: pd.DataFrame, column: str = "NORAD") -> ResultIndex:
+        '''
+        Index a results frame (c.f. DataArchive.get_df_order(), plus the ``column`` of
+        matched satellites: Sopp satellites, proximity dicts or their CSV strings).
+        '''
+        import pandas as pd
+
+        matches = results[column].map(_parse_cell) if len(results) else results[column]
+        compact = compact_table.compact_observations(results.drop(columns=[column]))
+        observatory_codes, observatories = pd.factorize(compact["name"].astype(str), sort=True)
+        id_codes, observation_ids = pd.factorize(compact["observation_id"].astype(str))
+        begin = compact["begin"].to_numpy(dtype="datetime64[ns]")
+
+        # observations by (observatory, begin)
+        order = np.lexsort((begin, observatory_codes))
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        table = compact_table.match_table(pd.DataFrame({"NORAD": matches.to_numpy()}))
+        norad = table["norad"].to_numpy(dtype=np.int64)
+        names = table["sat"].astype(str).to_numpy()
+        # satellites = distinct (norad, name) pairs, by norad
+        keys = pd.MultiIndex.from_arrays([norad, names])
+        satellite_codes, satellites = keys.factorize(sort=True)
+        satellite_norad = satellites.get_level_values(0).to_numpy(dtype=np.int64)
+        satellite_name_codes, satellite_names = pd.factorize(satellites.get_level_values(1).astype(str), sort=True)
+
+        match_observation = position[table["row"].to_numpy()]
+        match_order = np.lexsort((match_observation, satellite_codes))
+        match_observation = match_observation[match_order]
+
+        def sorted_column(values, dtype=np.float64):
+            return np.asarray(values, dtype=dtype)[match_order]
+
+        return cls({
+            "obs_observatory": observatory_codes.astype(np.int32)[order],
+            "obs_observation_id": id_codes.astype(np.int32)[order],
+            "obs_frequency": _floats(compact, "frequency")[order],
+            "obs_bandwidth": _floats(compact, "bandwidth")[order],
+            "obs_right_ascension": _floats(compact, "right_ascension")[order],
+            "obs_declination": _floats(compact, "declination")[order],
+            "obs_begin": begin[order],
+            "obs_end": compact["end"].to_numpy(dtype="datetime64[ns]")[order],
+            "obs_row": order.astype(np.int64),
+            "match_observation": match_observation,
+            "match_satellite": satellite_codes.astype(np.int32)[match_order],
+            "match_timestamp": sorted_column(table["timestamp"], "datetime64[ns]"),
+            "match_sat_right_ascension": sorted_column(table["right_ascension"]),
+            "match_sat_declination": sorted_column(table["declination"]),
+            "match_angular_distance": sorted_column(table["angular_distance"]),
+            "satellite_norad": satellite_norad,
+            "satellite_name": satellite_name_codes.astype(np.int32),
+            "satellite_offsets": _offsets(satellite_codes, len(satellites)),
+            "observatory_offsets": _offsets(observatory_codes, len(observatories)),
+            "observation_matches": np.argsort(match_observation, kind="stable").astype(np.int64),
+            "match_offsets": _offsets(match_observation, len(order)),
+            "observatories": np.asarray(observatories, dtype=str),
+            "observation_ids": np.asarray(observation_ids, dtype=str),
+            "satellite_names": np.asarray(satellite_names, dtype=str),
+        })
+
+    @classmethod
+    def from_csv(cls, csv_path, column: str = "NORAD") -> ResultIndex:
+        import pandas as pd
+        results = pd.read_csv(csv_path, index_col=0, dtype={"observation_id": str})
+        return cls.from_results(results.fillna({column: "[]"}), column=column)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> ResultIndex:
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported result index version in {path}: {meta.get('version')}")
+        mode = "r" if mmap else None
+        return cls({name: np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in ARRAYS})
+
+    def save(self, path):
+        meta = {"version": FORMAT_VERSION, "observations": len(self), "matches": len(self.match_observation)}
+        with replace_directory(path) as tmp:
+            for name in ARRAYS:
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)), allow_pickle=False)
+            (tmp / "meta.json").write_text(json.dumps(meta))
+
+
+    # ---------- QUERIES ----------
+
+    def satellites(self, satellite) -> np.ndarray:
+        '''Satellite codes of a NORAD id (int) or a satellite name (str, case insensitive).'''
+        if isinstance(satellite, str):
+            if self._upper_names is None:
+                self._upper_names = np.char.upper(self.satellite_names)
+            names = np.flatnonzero(self._upper_names == satellite.strip().upper())
+            return np.flatnonzero(np.isin(self.satellite_name, names))
+        lo = int(np.searchsorted(self.satellite_norad, satellite, side="left"))
+        hi = int(np.searchsorted(self.satellite_norad, satellite, side="right"))
+        return np.arange(lo, hi)
+
+    def observations_of(self, satellite, begin=None, end=None) -> pd.DataFrame:
+        '''
+        Matches of a satellite (NORAD id or name), one row per observation it was
+        matched in, optionally only the observations overlapping [begin, end].
+        '''
+        matches = _slices(self.satellite_offsets, self.satellites(satellite))
+        if begin is not None or end is not None:
+            observations = self.match_observation[matches]
+            keep = np.ones(len(matches), dtype=bool)
+            if begin is not None:
+                keep &= self.obs_end[observations] >= _time(begin)
+            if end is not None:
+                keep &= self.obs_begin[observations] <= _time(end)
+            matches = matches[keep]
+        return self.__matches_frame(matches)
+
+    def observations_at(self, observatory, begin, end=None) -> pd.DataFrame:
+        '''
+        Observations of an observatory (None for all) overlapping [begin, end], or
+        containing the instant begin.
+        '''
+        return self.__observations_frame(self.__overlapping(observatory, begin, end))
+
+    def overhead(self, observatory, begin, end=None) -> pd.DataFrame:
+        '''
+        Satellites matched in the observations of an observatory (None for all)
+        overlapping [begin, end], or containing the instant begin.
+        '''
+        observations = self.__overlapping(observatory, begin, end)
+        matches = _slices(self.match_offsets, observations)
+        return self.__matches_frame(self.observation_matches[matches])
+
+
+    # ---------- INTERNALS ----------
+
+    def __overlapping(self, observatory, begin, end) -> np.ndarray:
+        begin = _time(begin)
+        end = begin if end is None else _time(end)
+        if observatory is None:
+            codes = range(len(self.observatories))
+        else:
+            codes = np.flatnonzero(self.observatories == observatory)
+        rows = [self.__interval_index(int(k)).query(begin, end)[0] for k in codes]
+        return np.sort(np.concatenate(rows or [np.empty(0, dtype=np.int64)]))
+
+    def __interval_index(self, k: int) -> IntervalIndex:
+        # observation windows of observatory k, values = observation positions
+        if k not in self._intervals:
+            lo, hi = int(self.observatory_offsets[k]), int(self.observatory_offsets[k + 1])
+            self._intervals[k] = IntervalIndex(self.obs_begin[lo:hi], self.obs_end[lo:hi], np.arange(lo, hi))
+        return self._intervals[k]
+
+    def __observations_frame(self, observations) -> pd.DataFrame:
+        import pandas as pd
+        return pd.DataFrame({
+            "observatory": self.observatories[self.obs_observatory[observations]],
+            "observation_id": self.observation_ids[self.obs_observation_id[observations]],
+            "frequency": self.obs_frequency[observations],
+            "bandwidth": self.obs_bandwidth[observations],
+            "right_ascension": self.obs_right_ascension[observations],
+            "declination": self.obs_declination[observations],
+            "begin": self.obs_begin[observations],
+            "end": self.obs_end[observations],
+            "row": self.obs_row[observations],
+        })
+
+    def __matches_frame(self, matches) -> pd.DataFrame:
+        matches = np.asarray(matches, dtype=np.int64)
+        satellites = self.match_satellite[matches]
+        frame = self.__observations_frame(self.match_observation[matches])
+        return frame.assign(
+            norad=self.satellite_norad[satellites],
+            sat=self.satellite_names[self.satellite_name[satellites]],
+            timestamp=self.match_timestamp[matches],
+            sat_right_ascension=self.match_sat_right_ascension[matches],
+            sat_declination=self.match_sat_declination[matches],
+            angular_distance=self.match_angular_distance[matches],
+        )
+
+
+def _parse_cell(cell) -> list:
+    # lists as they are, CSV strings of proximity dicts or of Sopp satellites
+    if isinstance(cell, (list, tuple)):
+        return list(cell)
+    if not isinstance(cell, str) or not cell.strip():
+        return []
+    try:
+        return list(ast.literal_eval(cell))
+    except (ValueError, SyntaxError):
+        return [{"sat": m.group("name"), "norad": int(m.group("norad"))} for m in SATELLITE_REPR.finditer(cell)]
+
+
+def _floats(compact, column) -> np.ndarray:
+    if column not in compact:
+        return np.full(len(compact), np.nan)
+    return compact[column].to_numpy(dtype=np.float64)
+
+
+def _offsets(codes, n) -> np.ndarray:
+    # rows of code k are offsets[k]:offsets[k + 1] once sorted by code
+    return np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=n)))).astype(np.int64)
+
+
+def _slices(offsets, keys) -> np.ndarray:
+    # concatenated rows offsets[k]:offsets[k + 1] of the keys
+    keys = np.asarray(keys, dtype=np.int64)
+    starts, stops = offsets[keys], offsets[keys + 1]
+    lengths = stops - starts
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def _time(value) -> np.datetime64:
+    from ..utils import time_utils
+    if isinstance(value, str):
+        return time_utils.parse_times(value)
+    return np.datetime64(value, "ns")
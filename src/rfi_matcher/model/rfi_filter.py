@@ -1,22 +1,53 @@
+from __future__ import annotations
+
+from functools import lru_cache
 from importlib import resources
-from typing import Self
+from typing import Self, TYPE_CHECKING
 import numpy as np
-import pandas as pd
 from datetime import datetime, timezone
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+from .observatory_index import ObservatoryIndex
+
+@lru_cache(maxsize=1)
+def load_ra_observatories() -> pd.DataFrame:
+    """
+    Parse the ITU radio astronomy observatories table once per process.
+
+    The returned DataFrame is shared by every RaFilter instance and must be
+    treated as read-only (filtering always produces new frames).
+    """
+    import pandas as pd
+
+    with resources.open_text("rfi_matcher.data", "ITU_RA_Observatories.csv") as f:
+        # skipinitialspace strips the space following each comma (headers included)
+        # directly in the C parser
+        df = pd.read_csv(f, skipinitialspace=True)
+
+    df.columns = df.columns.str.strip()
+
+    # remove any remaining surrounding spaces from text values
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].str.strip()
+
+    return df
+
+
+@lru_cache(maxsize=1)
+def load_observatory_index() -> ObservatoryIndex:
+    """Indexes over load_ra_observatories(), built once per process."""
+    return ObservatoryIndex(load_ra_observatories())
+
+
 class RaFilter:
 
     def __init__(self):
 
         try:
-            with resources.open_text("rfi_matcher.data", "ITU_RA_Observatories.csv") as f:
-                self.ra_csv_df = pd.read_csv(f)
-
-            # remove prefix spaces from column names
-            self.ra_csv_df.columns = self.ra_csv_df.columns.str.strip()
-
-            # remove prefix spaces from all text values in the file
-            self.ra_csv_df = self.ra_csv_df.map(lambda x: x.strip() if isinstance(x, str) else x)
+            self.ra_csv_df = load_ra_observatories()
+            self.index = load_observatory_index()
         except Exception as e: 
             return print("Error loading csv:", e)
         
@@ -27,6 +58,8 @@ class RaFilter:
         self.startTimeUTC = "2025-05-01T08:48:54.0"
         self.endTimeUTC = "2025-07-15T08:49:54.0"
         self.observatories = []
+        # (ra, dec, radius) in degrees, None for the whole sky
+        self.sky_region = None
 
         # result after 
         self.filtered_df = None
@@ -93,6 +126,23 @@ class RaFilter:
         self.freq_range = freq_range
         return self
 
+    def set_sky_region(self, ra, dec, radius) -> Self:
+        """
+        Only keep observations pointing within radius degrees of (ra, dec), in degrees
+        (archives supporting it filter server-side). None removes the constraint.
+        """
+        if ra is None:
+            self.sky_region = None
+            return self
+        ra, dec, radius = float(ra) % 360, float(dec), float(radius)
+        if not -90 <= dec <= 90:
+            raise ValueError("Declination must be between -90 and 90.")
+        if not 0 < radius <= 180:
+            raise ValueError("Radius must be in (0, 180] degrees.")
+
+        self.sky_region = (ra, dec, radius)
+        return self
+
     def set_start_time(self, start_time) -> Self:
         """Set the start time in UTC (ISO 8601 format)."""
         self._validate_time_format(start_time)
@@ -113,46 +163,60 @@ class RaFilter:
 
         # If specific observatories have been selected => return them
         if self.observatories:
-            #df[df["stn_name"].apply(lambda x: x == "PUBLIC")]
-            self.filtered_df = df[df['stn_name'].isin(self.observatories)]
+            self.filtered_df = df.iloc[self.index.names(self.observatories)]
             return self.filtered_df
 
-        lat_min, lat_max = self.lat_range
-        lon_min, lon_max = self.lon_range
         freq_min, freq_max = self.freq_range
 
-        # Filter rows based on latitude and longitude
-        location_filter = (
-            (df['lat_dec'] >= lat_min) & 
-            (df['lat_dec'] <= lat_max) & 
-            (df['long_dec'] >= lon_min) & 
-            (df['long_dec'] <= lon_max)
-        )
+        # Rows based on latitude and longitude
+        location_rows = self.index.box(self.lat_range, self.lon_range)
 
-        # Filter rows where the frequency range is entirely within [freq_min, freq_max]
-        frequency_filter = (
-            (df['freq_from'] >= freq_min) & 
-            (df['freq_to'] <= freq_max)
-        )
+        # Rows where the frequency range is entirely within [freq_min, freq_max]
+        frequency_rows = self.index.frequency(freq_min, freq_max, mode="within")
 
         # Combine filters
-        self.filtered_df = df[location_filter & frequency_filter]
+        rows = np.intersect1d(location_rows, frequency_rows, assume_unique=True)
+        self.filtered_df = df.iloc[rows]
 
         return self.filtered_df
 
 
+    def filter_frequencies(self, freq_min, freq_max, mode="overlap") -> pd.DataFrame:
+        """
+        Observatory bands (MHz) that overlap [freq_min, freq_max] (mode="overlap"),
+        lie within it (mode="within") or cover it entirely (mode="contains").
+        """
+        return self.ra_csv_df.iloc[self.index.frequency(freq_min, freq_max, mode=mode)]
+
+
+    def observatories_near(self, lat, lon, radius_km) -> pd.DataFrame:
+        """Observatories within radius_km of the point (lat, lon) in degrees."""
+        return self.ra_csv_df.iloc[self.index.radius(lat, lon, radius_km)]
+
+
+    def nearest_observatories(self, lat, lon, k=1) -> pd.DataFrame:
+        """
+        The k observatory rows closest to the point (lat, lon) in degrees,
+        with their great-circle distance in a ``distance_km`` column.
+        """
+        positions, distance_km = self.index.nearest(lat, lon, k=k)
+        return self.ra_csv_df.iloc[positions].assign(distance_km=distance_km)
+
 
     def get_observatories(self) -> list[str]:
         # extract the names of observatories meeting the filter parameters
-        if self.filtered_df == None:
+        if self.filtered_df is None:
             self.filter_observatories()
 
         return self.filtered_df['stn_name'].dropna().drop_duplicates().tolist()
 
 
     def get_observatory_info(self, name):
-        df = self.filtered_df
-        return df[df['name'] == name]
+        df = self.ra_csv_df
+        rows = self.index.names([name])
+        if self.filtered_df is not None:
+            rows = rows[df.index[rows].isin(self.filtered_df.index)]
+        return df.iloc[rows]
 
 
     # ---------- INTERNAL VALIDATION ----------
@@ -1,21 +1,68 @@
-from pathlib import Path
-import datetime
-
-import pandas as pd
-import numpy as np
+from __future__ import annotations
 
-from sopp.custom_dataclasses.satellite.satellite import Satellite
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from rfi_matcher.custom.my_tle_fetcher_spacetrack import MyTleFetcherSpacetrack
 from rfi_matcher.model.rfi_filter import RaFilter
-from rfi_matcher.utils import sopp_utils, skyfield_utils, time_utils
+from rfi_matcher.utils import time_utils, ephemeris, formats
+from rfi_matcher.utils.shared_memory import SharedArrays
+from rfi_matcher.utils.ephemeris_cache import EphemerisCache
+from rfi_matcher.utils.metrics import Metrics
+from rfi_matcher.utils.profiling import Profiler
+from rfi_matcher.utils.checkpoint import Checkpoint
+from rfi_matcher.utils.scheduler import Scheduler, Plan, Task
+from rfi_matcher.utils.pass_cache import PassCache
+from rfi_matcher.utils.frequency_catalogue import FrequencyCatalogue
 from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.model import compact_table
+
+# Heavy dependencies (pandas, sopp, skyfield, spacetrack) are imported by the
+# methods that need them, so that importing the package stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 
 class RfiMatcher:
 
-    def __init__(self, ra_filter: RaFilter = RaFilter()):
-        self.ra_filter = ra_filter
+    def __init__(self, ra_filter: RaFilter = None, ephemeris_cache: EphemerisCache = None, metrics: Metrics = None,
+                 profiler: Profiler = None, checkpoint: Checkpoint = None, scheduler: Scheduler = None,
+                 coarse_step: float = None, pass_cache: PassCache = None,
+                 frequency_catalogue: FrequencyCatalogue = None, path_finder_class=None):
+        '''
+        profiler = opt-in per-stage profiling (c.f. utils.profiling), also enabled
+                   through the RFI_MATCHER_PROFILE environment variable
+        checkpoint = periodically save completed rows of every stage, so that a run
+                     can continue from there with ``resume=True`` (c.f. utils.checkpoint)
+        scheduler = Sopp processes per track and tracks screened in parallel, sized from
+                    the available cores and memory (c.f. utils.scheduler)
+        coarse_step = screen in two stages, a conservative sweep every coarse_step seconds
+                      followed by Sopp on the candidates only (c.f. sopp_utils.get_rfi_sources)
+        pass_cache = predicted horizon passes answering mainbeam=False screening (c.f. utils.pass_cache)
+        frequency_catalogue = compiled frequency catalogue: only satellites transmitting in the
+                              observed band (or of unknown frequencies) are screened, and
+                              annotate_transmitters reads it (c.f. utils.frequency_catalogue)
+        path_finder_class = Sopp path finder of the antenna pointing (Sopp's
+                            ObservationPathFinderRhodesmill if None), e.g.
+                            sopp_utils.ObservationPathFinderOffline to run without the de421 ephemeris
+        '''
+        self.ra_filter = ra_filter if ra_filter is not None else RaFilter()
+        self.ephemeris_cache = ephemeris_cache
+        self.checkpoint = checkpoint
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.coarse_step = coarse_step
+        self.pass_cache = pass_cache
+        self.frequency_catalogue = frequency_catalogue
+        self.path_finder_class = path_finder_class
+        self.metrics = metrics if metrics is not None else Metrics()
+        if profiler is None:
+            profiler = Profiler.from_env()
+        if profiler is not None:
+            self.metrics.profiler = profiler
+        self.satellites_filepath = Path('data/satellites.tle')
+        self.frequencies_filepath = Path('data/satellite_frequencies.csv')
         save_dir = Path('')
 
 
@@ -24,23 +71,153 @@ class RfiMatcher:
 
         begin = time_utils.iso_extract_date(ra_filter.startTimeUTC)
         end = time_utils.iso_extract_date(ra_filter.endTimeUTC)
-        print(begin)
-        print(end)
-        
-        satellites_filepath = Path(satellites_filepath)
-        if not satellites_filepath.exists():
-            print("Fetching satellite TLEs:", satellites_filepath)
-            MyTleFetcherSpacetrack(satellites_filepath, begin, end).fetch_tles()
-
-
-    def get_all_observations(self, observatories: list[str]) -> pd.DataFrame:
-        observations = []
+        logger.info("TLE window: %s to %s", begin, end)
 
-        for name in observatories:
-            print(f"Fetching from {name}")
-            obs_df = self.get_observations_for(name)
-            observations.append(obs_df)
+        from rfi_matcher.custom.my_tle_fetcher_spacetrack import MyTleFetcherSpacetrack
 
+        satellites_filepath = Path(satellites_filepath)
+        self.satellites_filepath = satellites_filepath
+        if not satellites_filepath.exists():
+            logger.info("Fetching satellite TLEs: %s", satellites_filepath)
+            with self.metrics.stage("fetch_tles"):
+                fetcher = MyTleFetcherSpacetrack(satellites_filepath, begin, end)
+                fetcher.metrics = self.metrics
+                fetcher.fetch_tles()
+
+
+    def publish_catalogue(self,
+                          satellites_filepath: str = 'data/satellites.tle',
+                          frequency_filepath: str = 'data/satellite_frequencies.csv',
+                          observatory: str = None,
+                          ephemeris_step: float = None) -> SharedArrays:
+        '''
+        Load the TLE catalogue, the frequency table and (optionally) an ephemeris grid
+        once and publish them into shared memory for a pool of worker processes.
+
+        If ``observatory`` and ``ephemeris_step`` (seconds) are given, satellite positions
+        are precomputed over the RaFilter time window as seen from that observatory.
+
+        Pass ``catalogue.spec`` to the workers and call ``RfiMatcher.attach_catalogue(spec)``
+        there. The caller owns the shared blocks and must ``unlink()`` them when done.
+        '''
+        from rfi_matcher.utils import sopp_utils
+
+        names, line1, line2 = ephemeris.load_tle_lines(satellites_filepath)
+        arrays = {"tle_names": names, "tle_line1": line1, "tle_line2": line2}
+
+        if frequency_filepath is not None:
+            arrays.update(FrequencyCatalogue.cached(frequency_filepath).arrays())
+
+        if observatory is not None and ephemeris_step is not None:
+            archive = ARCHIVE_CLASSES[observatory]
+            times = ephemeris.time_grid(
+                time_utils.iso_to_datetime(self.ra_filter.startTimeUTC).replace(tzinfo=None),
+                time_utils.iso_to_datetime(self.ra_filter.endTimeUTC).replace(tzinfo=None),
+                ephemeris_step,
+            )
+            grid = ephemeris.compute_ephemeris(line1, line2, times, archive.latitude, archive.longitude, archive.elevation)
+            arrays.update(grid.to_arrays())
+
+        return SharedArrays.publish(arrays)
+
+
+    @staticmethod
+    def attach_catalogue(spec: dict):
+        '''
+        Attach (read-only, without copying) to a catalogue published by ``publish_catalogue``.
+        Returns the shared arrays, the satellites and the ephemeris grid (None if not published).
+        The satellites are a ``sopp_utils.CatalogueSatellites``: Sopp objects are only built for
+        the candidates left by the prefilters.
+        '''
+        from rfi_matcher.utils import sopp_utils
+
+        catalogue = SharedArrays.attach(spec)
+        satellites = sopp_utils.CatalogueSatellites(catalogue)
+
+        grid = None
+        if "ephemeris_norad" in catalogue:
+            grid = ephemeris.EphemerisGrid.from_arrays(catalogue)
+
+        return catalogue, satellites, grid
+
+
+    def get_all_observations(self, observatories: list[str], resume=False, compact=False,
+                             timeout: float = None, archive_limits: dict = None) -> pd.DataFrame:
+        '''
+        Archives are queried concurrently (one thread each): the fetch takes as long as the
+        slowest archive. An archive failing or timing out is logged and skipped, the others
+        are still returned.
+
+        resume = reuse the archives already fetched in the checkpoint
+        compact = return the typed, dictionary-encoded table (c.f. model.compact_table),
+                  each archive is compacted as soon as it is fetched; the screening
+                  stages read its typed columns directly
+        timeout = seconds to wait for the archives (None to wait for all of them)
+        archive_limits = {archive name: concurrent queries}, e.g. {"NRAO": 1} to query the
+                         observatories served by the NRAO archive one at a time
+                         (DataArchive.max_concurrency by default)
+        '''
+        import threading
+        import pandas as pd
+        from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+        stage = "get_all_observations"
+        done = self.__resume(stage, resume)
+        fetched = {name: self.__observation_format(done[name], compact) for name in observatories if name in done}
+        for name in fetched:
+            logger.info("Resuming %s from checkpoint", name)
+
+        pending = [name for name in observatories if name not in fetched]
+        limits = _archive_semaphores(pending, archive_limits or {})
+        stopped = threading.Event()
+
+        def fetch(name):
+            with limits[name]:
+                if stopped.is_set():
+                    return None
+                logger.info("Fetching from %s", name)
+                with self.metrics.stage("get_observations", archive=name):
+                    return self.get_observations_for(name)
+
+        executor = ThreadPoolExecutor(max_workers=max(len(pending), 1), thread_name_prefix="archive")
+        futures = {executor.submit(fetch, name): name for name in pending}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                name = futures[future]
+                try:
+                    obs_df = future.result()
+                except Exception:
+                    logger.exception("Fetching from %s failed, continuing without it", name)
+                    self.metrics.count("archive_failures", archive=name)
+                    continue
+
+                self.metrics.count("observations_fetched", len(obs_df), archive=name)
+                # compacted on arrival: the raw frame is not kept while the other archives are fetched
+                obs_df = self.__observation_format(obs_df, compact)
+                fetched[name] = obs_df
+                if self.checkpoint is not None:
+                    # archive queries are slow: checkpoint after each archive
+                    self.checkpoint.record(stage, name, obs_df)
+                    self.checkpoint.set_cursor(stage, self.checkpoint.cursor(stage, []) + [name])
+                    self.checkpoint.flush()
+        except TimeoutError:
+            for future, name in futures.items():
+                if not future.done():
+                    logger.warning("Fetching from %s timed out after %ss, continuing without it", name, timeout)
+                    self.metrics.count("archive_timeouts", archive=name)
+        finally:
+            # threads blocked on a request cannot be interrupted: do not wait for them
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # same order as the observatories, whatever the completion order
+        observations = [fetched[name] for name in observatories if name in fetched]
+        if compact:
+            df = compact_table.concat_compact(observations)
+            self.metrics.gauge("observations_bytes", compact_table.memory_bytes(df))
+            return df
+        if not observations:
+            return pd.DataFrame()
         df = pd.concat(observations, ignore_index=True)
         return df
     
@@ -49,10 +226,11 @@ class RfiMatcher:
 
         cls = ARCHIVE_CLASSES.get(observatory)
         if cls is None:
-            print(f"Warning: No class defined for {observatory}")
+            raise ValueError(f"No data archive defined for {observatory}")
 
         # Instantiate the corresponding data archive object
         archive = cls(self.ra_filter)
+        archive.metrics = self.metrics
 
         # Fetch the desired observations
         obs_df = archive.get_observations(num=25)
@@ -63,73 +241,433 @@ class RfiMatcher:
         return obs_df
 
 
-    def extend_observations_with_rfi(self, observations: pd.DataFrame, lim=None, log=False):
-        total_obs = observations.copy()
-        total_obs["NORAD"] = None
-
-        if lim == None: 
-            lim = total_obs.shape[0]
-        
-        for i, obs in total_obs.iterrows():
-            if(i > lim): break
-
-            begin = obs['begin']
-            end = obs['end']
-
-            begin = time_utils.iso_to_datetime(begin)
-            end = time_utils.iso_to_datetime(end)
-
-            if log:
-                print(f"\nprocessing row: {i} | begin: {begin}, end: {end}")
+    def extend_observations_with_rfi(self, observations: pd.DataFrame, lim=None, log=False, satellites=None, resume=False,
+                                     coalesce_gap: float = None, mainbeam: bool = True):
+        '''
+        log = True to log every processed row at INFO level (DEBUG otherwise)
+        resume = reuse the rows already completed in the checkpoint
+        coalesce_gap = screen consecutive tracks with the same target and frequency setup
+                       (at most this many seconds apart) as one window, c.f. utils.coalesce
+        mainbeam = False to match every satellite above the horizon instead of crossing the main beam
+        '''
+        from rfi_matcher.utils import sopp_utils
 
+        if coalesce_gap is not None:
+            return self.__extend_coalesced(observations, lim, log, satellites, resume, coalesce_gap, mainbeam)
 
-            if(begin >= end):
-                rfi = []
-            else:
-                rfi = sopp_utils.get_rfi_sources(obs)
-            total_obs.at[i, "NORAD"] = rfi
+        metrics = self.metrics
+        level = logging.INFO if log else logging.DEBUG
+        stage = "extend_observations_with_rfi"
+        done = self.__resume(stage, resume)
 
-            if log:
-                print(f'Found: {sopp_utils.get_rfi_names(rfi)}')
+        # results are collected per position and attached as one column at the end
+        norad = [None] * len(observations)
 
-        return total_obs
-    
-
-
-    def get_all_sat_proximities(self, total_observations: pd.DataFrame):
-        total_obs = total_observations.copy()
-        for i, obs in total_obs.iterrows():
-            # For each observation's potential satellite RFI 
-            # => find the position and timestamp where satellite is closest to observation target
-
-            obs_start = obs["begin"]
-            obs_end = obs["end"]
-
-            target_ra = skyfield_utils.ra_str_to_deg(obs["right_ascension"])
-            target_dec = skyfield_utils.dec_str_to_deg(obs["declination"])
-
-            rfi_sat = []
-            if obs["NORAD"]:
-                for sat in obs["NORAD"]:
-                    timestamp, ra, dec, ang_dist = skyfield_utils.sat_proximity(sat, obs_start, obs_end, target_ra, target_dec)
-                    print("\n=====================")
-                    print(f"\nObservation | start = {obs_start}, end = {obs_end}")
-                    print(f"Target | RA = {target_ra}, DEC = {target_dec}")
-                        
-                    print(f"\n--- {sat.name} closest proximity ---")
-                    print('timestamp:', timestamp)
-                    print('ra:', ra)
-                    print('dec:', dec)
-                    print('ang_dist:', ang_dist)
-
-                    rfi_sat.append({
-                        "sat": sat.name,
-                        "timestamp": timestamp.isoformat(),
-                        "declination": float(dec),
-                        "right_ascension": float(ra),
-                        "angular_distance": float(ang_dist)
+        if lim == None: 
+            lim = observations.shape[0]
+
+        def finish(i, key, rfi):
+            norad[i] = rfi
+            if self.checkpoint is not None and key not in done:
+                self.checkpoint.record(stage, key, rfi)
+
+            metrics.count("rows_processed")
+            metrics.count("rfi_matches", len(rfi))
+            if logger.isEnabledFor(level):
+                logger.log(level, "row %s found: %s", i, sopp_utils.get_rfi_names(rfi))
+
+        def screen(i, concurrency):
+            obs = pending[i]
+            logger.log(level, "processing row: %s | begin: %s, end: %s", i, obs['begin'], obs['end'])
+            with metrics.stage("get_rfi_sources", observatory=obs["name"]):
+                return sopp_utils.get_rfi_sources(obs, tle_file_path=self.satellites_filepath,
+                                                  frequency_file_path=self.frequencies_filepath, satellites=satellites,
+                                                  ephemeris_cache=self.ephemeris_cache, metrics=metrics,
+                                                  concurrency_level=concurrency,
+                                                  time_continuity_resolution=self.scheduler.time_resolution,
+                                                  coarse_step=self.coarse_step, mainbeam=mainbeam,
+                                                  pass_cache=self.pass_cache,
+                                                  frequency_catalogue=self.frequency_catalogue,
+                                                  path_finder_class=self.__path_finder_class())
+
+        with metrics.stage("extend_observations_with_rfi"):
+            # parse the time columns once for the whole frame
+            begins, ends = time_utils.observation_times(observations)
+            seconds = time_utils.seconds(ends - begins).tolist()
+
+            pending, keys, durations = {}, {}, {}
+            for i, label, obs in _rows(observations):
+                if(label > lim): break
+
+                key = _row_key(obs)
+                if key in done:
+                    metrics.count("rows_resumed")
+                    finish(i, key, done[key])
+                elif(seconds[i] <= 0):
+                    finish(i, key, [])
+                else:
+                    pending[i], keys[i], durations[i] = obs, key, seconds[i]
+
+            for i, rfi in self.__screen(durations, satellites, screen, mainbeam):
+                finish(i, keys[i], rfi)
+
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        self.__record_cache_metrics()
+        return _with_column(observations, "NORAD", norad)
+
+
+    def __extend_coalesced(self, observations, lim, log, satellites, resume, coalesce_gap, mainbeam):
+        import numpy as np
+        from rfi_matcher.utils import sopp_utils
+        from rfi_matcher.utils.coalesce import coalesce_tracks, split_windows
+
+        metrics = self.metrics
+        level = logging.INFO if log else logging.DEBUG
+        stage = "extend_observations_with_rfi.coalesced"
+        done = self.__resume(stage, resume)
+
+        screened = observations if lim is None else observations[observations.index <= lim]
+
+        with metrics.stage("extend_observations_with_rfi"):
+            merged, groups = coalesce_tracks(screened, gap_seconds=coalesce_gap)
+            metrics.count("tracks_coalesced", int((groups >= 0).sum()) - len(merged))
+
+            def screen(i, concurrency):
+                obs = pending[i]
+                logger.log(level, "processing window: %s | begin: %s, end: %s, tracks: %s",
+                           i, obs["begin"], obs["end"], obs["tracks"])
+                with metrics.stage("get_rfi_sources", observatory=obs["name"]):
+                    return sopp_utils.get_rfi_windows(obs, tle_file_path=self.satellites_filepath,
+                                                      frequency_file_path=self.frequencies_filepath, satellites=satellites,
+                                                      ephemeris_cache=self.ephemeris_cache, metrics=metrics,
+                                                      concurrency_level=concurrency,
+                                                      time_continuity_resolution=self.scheduler.time_resolution,
+                                                      coarse_step=self.coarse_step, mainbeam=mainbeam,
+                                                      pass_cache=self.pass_cache,
+                                                      frequency_catalogue=self.frequency_catalogue,
+                                                      path_finder_class=self.__path_finder_class())
+
+            windows = [None] * len(merged)
+            begins, ends = time_utils.observation_times(merged)
+            seconds = time_utils.seconds(ends - begins).tolist()
+            pending, keys, durations = {}, {}, {}
+            for i, _, obs in _rows(merged):
+                key = _row_key(obs)
+                if key in done:
+                    windows[i] = done[key]
+                    metrics.count("rows_resumed")
+                else:
+                    pending[i], keys[i], durations[i] = obs, key, seconds[i]
+
+            for i, found in self.__screen(durations, satellites, screen, mainbeam):
+                windows[i] = found
+                metrics.count("screening_jobs")
+                if self.checkpoint is not None:
+                    self.checkpoint.record(stage, keys[i], found)
+
+            rfi = split_windows(screened, groups, windows)
+            norad = [None] * len(observations)
+            rows = np.flatnonzero(observations.index.isin(screened.index))
+            for row, sats in zip(rows, rfi):
+                norad[row] = sats
+
+            metrics.count("rows_processed", len(rfi))
+            metrics.count("rfi_matches", sum(len(r) for r in rfi))
+            if logger.isEnabledFor(level):
+                for i, sats in zip(screened.index, rfi):
+                    logger.log(level, "row %s found: %s", i, sopp_utils.get_rfi_names(sats))
+
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        self.__record_cache_metrics()
+        return _with_column(observations, "NORAD", norad)
+
+
+    def get_all_sat_proximities(self, total_observations: pd.DataFrame, resume=False):
+        '''
+        resume = reuse the rows already completed in the checkpoint
+        '''
+        from rfi_matcher.utils import skyfield_utils
+
+        metrics = self.metrics
+        debug = logger.isEnabledFor(logging.DEBUG)
+        stage = "get_all_sat_proximities"
+        done = self.__resume(stage, resume)
+
+        norad = total_observations["NORAD"].tolist()
+        with metrics.stage("get_all_sat_proximities"):
+            for i, _, obs in _rows(total_observations):
+                # For each observation's potential satellite RFI 
+                # => find the position and timestamp where satellite is closest to observation target
+
+                obs_start = obs["begin"]
+                obs_end = obs["end"]
+
+                target_ra = formats.ra_degrees(obs["right_ascension"])
+                target_dec = formats.dec_degrees(obs["declination"])
+
+                key = _row_key(obs)
+                if key in done:
+                    norad[i] = done[key]
+                    metrics.count("rows_resumed")
+                    continue
+
+                rfi_sat = []
+                if obs["NORAD"]:
+                    grid = self.__cached_grid(obs)
+                    for sat in obs["NORAD"]:
+                        row = -1 if grid is None else grid.rows_for([sat.tle_information.satellite_number])[0]
+                        if row >= 0:
+                            timestamp, ra, dec, ang_dist = skyfield_utils.sat_proximity_from_grid(grid, row, obs_start, obs_end, target_ra, target_dec)
+                        else:
+                            timestamp, ra, dec, ang_dist = skyfield_utils.sat_proximity(sat, obs_start, obs_end, target_ra, target_dec)
+
+                        if debug:
+                            logger.debug(
+                                "observation %s - %s, target RA = %s, DEC = %s | %s closest at %s: ra = %s, dec = %s, ang_dist = %s",
+                                obs_start, obs_end, target_ra, target_dec, sat.name, timestamp, ra, dec, ang_dist,
+                            )
+
+                        rfi_sat.append({
+                            "sat": sat.name,
+                            "norad": sat.tle_information.satellite_number,
+                            "timestamp": timestamp.isoformat(),
+                            "declination": float(dec),
+                            "right_ascension": float(ra),
+                            "angular_distance": float(ang_dist)
+                        })
+
+                    metrics.count("proximities_computed", len(rfi_sat))
+                    norad[i] = rfi_sat
+
+                if self.checkpoint is not None:
+                    self.checkpoint.record(stage, key, norad[i])
+
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        self.__record_cache_metrics()
+        return _with_column(total_observations, "NORAD", norad)
+
+
+    def annotate_transmitters(self, observations: pd.DataFrame, column: str = "NORAD") -> pd.DataFrame:
+        '''
+        Add a "TRANSMITTERS" column: for every satellite matched in ``column``, its downlinks
+        overlapping the observed band (c.f. FrequencyCatalogue.transmitters), read from the
+        frequency catalogue (compiled from the frequency file if none was given).
+        '''
+        catalogue = self.frequency_catalogue
+        if catalogue is None:
+            catalogue = FrequencyCatalogue.cached(self.frequencies_filepath)
+
+        transmitters = [None] * len(observations)
+        with self.metrics.stage("annotate_transmitters"):
+            for i, _, obs in _rows(observations):
+                matches = obs[column]
+                if not isinstance(matches, list):
+                    continue
+                rows = []
+                for match in matches:
+                    if isinstance(match, dict):
+                        name, norad = match["sat"], match.get("norad")
+                    else:
+                        name, norad = match.name, match.tle_information.satellite_number
+                    rows.append({
+                        "sat": name,
+                        "norad": norad,
+                        "transmitters": [] if norad is None else
+                                        catalogue.transmitters(norad, obs["frequency"], obs["bandwidth"]),
                     })
-                
-                total_obs.at[i, "NORAD"] = rfi_sat
-
-        return total_obs
\ No newline at end of file
+                transmitters[i] = rows
+
+        return _with_column(observations, "TRANSMITTERS", transmitters)
+
+
+    def get_separation_profiles(self, observations: pd.DataFrame, beamwidth: float = 3, radii=(1, 3, 10),
+                                step_seconds: float = 10.0, min_altitude: float = 5.0, resume=False):
+        '''
+        Sidelobe screening: for every satellite above the horizon during each track, the
+        minimum (topocentric) separation from the target, when it occurs and the seconds
+        spent within each radius, in a "SEPARATION" column (one dict per satellite).
+
+        radii = multiples of the beamwidth, e.g. (1, 3, 10) for the main beam, near and far sidelobes
+        step_seconds = time step of the shared grid (the ephemeris cache's step if configured)
+        resume = reuse the rows already completed in the checkpoint
+        '''
+        metrics = self.metrics
+        stage = "get_separation_profiles"
+        done = self.__resume(stage, resume)
+        radii = [float(r) for r in radii]
+        names, line1, line2 = ephemeris.load_tle_lines(self.satellites_filepath)
+        sat_names = dict(zip(ephemeris.tle_norad_ids(line1).tolist(), (n.decode().strip() for n in names)))
+
+        separation = [None] * len(observations)
+        begins, ends = time_utils.observation_times(observations)
+        with metrics.stage("get_separation_profiles"):
+            for i, _, obs in _rows(observations):
+                key = _row_key(obs)
+                if key in done:
+                    separation[i] = done[key]
+                    metrics.count("rows_resumed")
+                    continue
+
+                begin, end = begins[i], ends[i]
+                archive = ARCHIVE_CLASSES.get(obs["name"])
+
+                grid = self.__cached_grid(obs)
+                if grid is None:
+                    grid = ephemeris.compute_ephemeris(line1, line2, ephemeris.time_grid(begin, end, step_seconds),
+                                                       archive.latitude, archive.longitude, archive.elevation)
+                profiles = ephemeris.separation_profiles(
+                    grid, begin, end,
+                    formats.ra_degrees(obs["right_ascension"]),
+                    formats.dec_degrees(obs["declination"]),
+                    archive.latitude, archive.longitude,
+                    radii=[r * beamwidth for r in radii], min_altitude=min_altitude,
+                )
+                metrics.count("separation_profiles", len(profiles))
+
+                rows = []
+                for k, norad in enumerate(profiles.norad.tolist()):
+                    row = {
+                        "sat": sat_names.get(norad, str(norad)),
+                        "norad": norad,
+                        "min_separation": float(profiles.min_separation[k]),
+                        "timestamp": profiles.min_separation_time[k].astype("datetime64[us]").item().isoformat(),
+                        "seconds_visible": float(profiles.seconds_visible[k]),
+                    }
+                    for radius, seconds in zip(radii, profiles.seconds_within[k].tolist()):
+                        row[f"seconds_within_{radius:g}bw"] = seconds
+                    rows.append(row)
+                separation[i] = rows
+
+                if self.checkpoint is not None:
+                    self.checkpoint.record(stage, key, rows)
+
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        self.__record_cache_metrics()
+        return _with_column(observations, "SEPARATION", separation)
+
+
+    def save_results(self, observations: pd.DataFrame, filepath: str = 'data/rfi_data.csv'):
+        with self.metrics.stage("export"):
+            filepath = Path(filepath)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            if compact_table.is_compact(observations):
+                # exported in the archive string format
+                observations = compact_table.expand_observations(observations)
+            observations.to_csv(filepath)
+            self.metrics.count("rows_exported", len(observations))
+
+
+    @staticmethod
+    def __observation_format(observations, compact):
+        # archives fetched or resumed from a checkpoint (stored in either format)
+        if compact_table.is_compact(observations) == compact:
+            return observations
+        if compact:
+            return compact_table.compact_observations(observations)
+        return compact_table.expand_observations(observations)
+
+    def __resume(self, stage, resume) -> dict:
+        # Completed rows of a stage to reuse (an empty dict also starts the stage over)
+        if self.checkpoint is None:
+            return {}
+        if not resume:
+            self.checkpoint.reset(stage)
+            return {}
+        done = self.checkpoint.completed(stage)
+        logger.info("Resuming %s with %d completed rows", stage, len(done))
+        return done
+
+
+    def __screen(self, durations: dict, satellites, fn, mainbeam=True):
+        # Run fn(key, concurrency) for every track to screen, as planned by the scheduler
+        if self.pass_cache is not None and not mainbeam:
+            # screened from cached passes: no Sopp processes
+            plan = Plan(batches=[[Task(key, seconds) for key, seconds in durations.items()]])
+        else:
+            plan = self.scheduler.plan(durations, self.__catalogue_size(satellites))
+        self.metrics.gauge("screening_workers", plan.outer_workers)
+        self.metrics.gauge("screening_max_concurrency", max((t.concurrency for t in plan.tasks), default=0))
+        return self.scheduler.run(plan, fn)
+
+
+    def __path_finder_class(self):
+        from rfi_matcher.utils import sopp_utils
+        return self.path_finder_class or sopp_utils.ObservationPathFinderRhodesmill
+
+
+    def __catalogue_size(self, satellites) -> int:
+        if satellites is not None:
+            return len(satellites)
+        if not self.satellites_filepath.exists():
+            return 0
+        with open(self.satellites_filepath) as f:
+            return sum(1 for line in f if line.startswith("1 "))
+
+
+    def __record_cache_metrics(self):
+        if self.ephemeris_cache is not None:
+            self.metrics.gauge("ephemeris_cache_hits", self.ephemeris_cache.hits)
+            self.metrics.gauge("ephemeris_cache_misses", self.ephemeris_cache.misses)
+        if self.pass_cache is not None:
+            self.metrics.gauge("pass_cache_hits", self.pass_cache.hits)
+            self.metrics.gauge("pass_cache_misses", self.pass_cache.misses)
+
+
+    def __cached_grid(self, obs):
+        # Ephemeris of the whole catalogue over the observation window, if a cache is configured
+        if self.ephemeris_cache is None or not self.satellites_filepath.exists():
+            return None
+
+        archive = ARCHIVE_CLASSES.get(obs["name"])
+        line1, line2, tle_hash = self.ephemeris_cache.catalogue(self.satellites_filepath)
+        return self.ephemeris_cache.window(
+            obs["name"],
+            time_utils.to_datetime(obs["begin"]),
+            time_utils.to_datetime(obs["end"]),
+            line1, line2, archive.latitude, archive.longitude, archive.elevation, tle_hash,
+        )
+
+
+def _archive_semaphores(observatories, limits: dict) -> dict:
+    # one semaphore per archive, shared by the observatories it serves
+    import threading
+
+    semaphores, by_archive = {}, {}
+    for name in observatories:
+        cls = ARCHIVE_CLASSES.get(name)
+        archive = name if cls is None else cls.name
+        if archive not in by_archive:
+            limit = limits.get(archive, 1 if cls is None else cls.max_concurrency)
+            by_archive[archive] = threading.BoundedSemaphore(limit)
+        semaphores[name] = by_archive[archive]
+    return semaphores
+
+
+def _rows(frame):
+    # (position, index label, row as a dict) without building a Series per row like iterrows()
+    columns = list(frame.columns)
+    values = zip(*(frame[c].to_numpy() for c in columns))
+    for position, (label, row) in enumerate(zip(frame.index, values)):
+        yield position, label, dict(zip(columns, row))
+
+
+def _with_column(frame, column, values):
+    # the frame with one result column set, sharing the other columns: assign() would
+    # deep-copy the whole frame on pandas < 3 (without copy-on-write)
+    result = frame.copy(deep=False)
+    result[column] = values
+    return result
+
+
+def _row_key(obs) -> str:
+    # Identifies one observation track across runs, in the archive string format
+    # whether the row comes from an archive frame or a compact table
+    return "|".join((
+        str(obs["name"]), str(obs["observation_id"]),
+        formats.iso_string(obs["begin"]), formats.iso_string(obs["end"]),
+        formats.ra_string(obs["right_ascension"]), formats.dec_string(obs["declination"]),
+    ))
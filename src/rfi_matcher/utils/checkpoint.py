@@ -0,0 +1,127 @@
+"""
+Atomic, append-only checkpoints for long RfiMatcher runs.
+
+A checkpoint directory holds, per pipeline stage, the results of the rows that
+are already completed and a free-form stage cursor (e.g. the archives already
+fetched):
+
+    <root>/state.json              cursors and list of committed segments (atomic rename)
+    <root>/<stage>.<seq>.pkl       results completed since the previous checkpoint
+
+Segments are written before the state file that references them, so a run killed
+at any point resumes from the last complete checkpoint; unreferenced segments
+are ignored (and overwritten).
+"""
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+
+class Checkpoint:
+    """
+    :param root: checkpoint directory
+    :param every_rows: flush after this many newly completed rows (per run)
+    :param every_seconds: or when this much time passed since the last flush
+    """
+
+    def __init__(self, root, every_rows: int = 500, every_seconds: float = 300):
+        self.root = Path(root)
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._state = self.__load_state()
+
+
+    # ---------- READING ----------
+
+    def completed(self, stage: str) -> dict:
+        '''Results of every completed row of a stage: {key: value}.'''
+        results = {}
+        for segment in self._state["stages"].get(stage, {}).get("segments", []):
+            with open(self.root / segment, "rb") as f:
+                results.update(pickle.load(f))
+        results.update(self._pending.get(stage, {}))
+        return results
+
+    def cursor(self, stage: str, default=None):
+        return self._state["stages"].get(stage, {}).get("cursor", default)
+
+    def is_finished(self, stage: str) -> bool:
+        return self._state["stages"].get(stage, {}).get("finished", False)
+
+
+    # ---------- WRITING ----------
+
+    def record(self, stage: str, key, value):
+        '''Mark a row as completed; flushed with the next checkpoint.'''
+        self._pending.setdefault(stage, {})[key] = value
+        self.maybe_flush()
+
+    def set_cursor(self, stage: str, cursor):
+        '''Update a JSON-serializable stage cursor (written with the next checkpoint).'''
+        self.__stage(stage)["cursor"] = cursor
+
+    def finish(self, stage: str):
+        self.__stage(stage)["finished"] = True
+        self.flush()
+
+    def reset(self, stage: str):
+        '''Forget everything about a stage (to recompute it from scratch).'''
+        self._pending.pop(stage, None)
+        segments = self._state["stages"].pop(stage, {}).get("segments", [])
+        self.__write_state()
+        for segment in segments:
+            (self.root / segment).unlink(missing_ok=True)
+
+    def maybe_flush(self):
+        pending = sum(len(rows) for rows in self._pending.values())
+        if pending >= self.every_rows or (pending and time.monotonic() - self._last_flush >= self.every_seconds):
+            self.flush()
+
+    def flush(self):
+        '''Write pending rows as new segments, then atomically commit the state file.'''
+        self.root.mkdir(parents=True, exist_ok=True)
+        for stage, rows in self._pending.items():
+            if not rows:
+                continue
+            entry = self.__stage(stage)
+            seq = entry.get("next_segment", 0)
+            segment = f"{stage}.{seq:06d}.pkl"
+            _atomic_write(self.root / segment, pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+            entry.setdefault("segments", []).append(segment)
+            entry["next_segment"] = seq + 1
+            entry["rows"] = entry.get("rows", 0) + len(rows)
+
+        self.__write_state()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+
+    # ---------- INTERNALS ----------
+
+    def __stage(self, stage) -> dict:
+        return self._state["stages"].setdefault(stage, {})
+
+    def __load_state(self) -> dict:
+        path = self.root / "state.json"
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+        return {"version": 1, "stages": {}}
+
+    def __write_state(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._state["updated"] = time.time()
+        _atomic_write(self.root / "state.json", json.dumps(self._state, indent=1).encode())
+
+
+def _atomic_write(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,122 @@
+"""
+Track coalescing: consecutive tracks with the same pointing and frequency setup
+(e.g. repeated calibrator scans a few seconds apart) are screened as one window,
+and the interference windows found are mapped back to the original tracks by
+time overlap.
+"""
+from __future__ import annotations
+
+from datetime import timezone
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from rfi_matcher.utils.formats import format_iso
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Tracks are merged only if all these columns are identical
+COALESCE_KEYS = ["name", "right_ascension", "declination", "frequency", "bandwidth"]
+
+
+def coalesce_tracks(observations: pd.DataFrame, gap_seconds: float = 10, keys=COALESCE_KEYS):
+    '''
+    Merge adjacent or overlapping tracks with identical ``keys`` whose gap is at most
+    ``gap_seconds``.
+
+    Returns the merged windows (columns of the first track of each window, with the
+    union begin / end) and, for every original row, the position of its merged window
+    (-1 for tracks with begin >= end, which are never screened).
+    '''
+    begin, end = _track_times(observations)
+    valid = begin < end
+    positions = np.flatnonzero(valid)
+
+    groups = np.full(len(observations), -1, dtype=np.int64)
+    if len(positions) == 0:
+        return observations.iloc[:0].copy(), groups
+
+    # order by setup then time, a new window starts on a setup change or a large gap
+    setup = observations.iloc[positions][list(keys)].astype(str)
+    setup_id = setup.groupby(list(keys), sort=False, dropna=False).ngroup().to_numpy()
+    order = np.lexsort((begin[positions], setup_id))
+    positions, setup_id = positions[order], setup_id[order]
+
+    b, e = begin[positions], end[positions]
+    reach = _running_max_by_group(e, setup_id)
+    gap = np.timedelta64(int(round(gap_seconds * 1e9)), "ns")
+    new_window = np.ones(len(positions), dtype=bool)
+    new_window[1:] = (setup_id[1:] != setup_id[:-1]) | (b[1:] > reach[:-1] + gap)
+    window = np.cumsum(new_window) - 1
+    groups[positions] = window
+
+    first = positions[new_window]
+    merged = observations.iloc[first].copy()
+    merged_begin = np.minimum.reduceat(b, np.flatnonzero(new_window))
+    merged_end = np.maximum.reduceat(e, np.flatnonzero(new_window))
+    if not np.issubdtype(np.asarray(observations["begin"]).dtype, np.datetime64):
+        # archive frames get ISO strings back, compact tables keep datetime64 columns
+        merged_begin, merged_end = format_iso(merged_begin), format_iso(merged_end)
+    merged["begin"] = merged_begin
+    merged["end"] = merged_end
+    merged["tracks"] = np.bincount(window)
+    return merged.reset_index(drop=True), groups
+
+
+def split_windows(observations: pd.DataFrame, groups: np.ndarray, windows_per_group: list) -> list[list]:
+    '''
+    Map interference windows of merged tracks back to the original tracks.
+
+    windows_per_group = for every merged window, (satellite, begin, end) interference
+                        windows (c.f. sopp_utils.get_rfi_windows)
+    Returns, for every original row, the satellites whose interference overlaps the
+    track (each satellite once, in order of first interference).
+    '''
+    begin, end = _track_times(observations)
+
+    # rows of each merged window
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(len(windows_per_group) + 1))
+
+    result = [[] for _ in range(len(observations))]
+    for group, windows in enumerate(windows_per_group):
+        if not windows:
+            continue
+        rows = order[bounds[group]:bounds[group + 1]]
+        window_begin = np.array([_naive_utc(w[1]) for w in windows], dtype="datetime64[ns]")
+        window_end = np.array([_naive_utc(w[2]) for w in windows], dtype="datetime64[ns]")
+
+        # (track, window) closed interval overlaps
+        overlaps = (window_begin[None, :] <= end[rows, None]) & (window_end[None, :] >= begin[rows, None])
+        for row, hits in zip(rows, overlaps):
+            seen = set()
+            for k in np.flatnonzero(hits):
+                sat = windows[k][0]
+                if id(sat) not in seen:
+                    seen.add(id(sat))
+                    result[row].append(sat)
+
+    return result
+
+
+def _track_times(observations):
+    import pandas as pd
+    return tuple(
+        pd.to_datetime(observations[c], format="ISO8601").to_numpy(dtype="datetime64[ns]")
+        for c in ("begin", "end")
+    )
+
+
+def _running_max_by_group(values, group_ids) -> np.ndarray:
+    # cumulative maximum restarting at each group
+    import pandas as pd
+    return pd.Series(values.view(np.int64)).groupby(group_ids).cummax().to_numpy().view("datetime64[ns]")
+
+
+def _naive_utc(t):
+    if getattr(t, "tzinfo", None) is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(t, "ns")
+
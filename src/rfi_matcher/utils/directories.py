@@ -0,0 +1,39 @@
+"""
+Directories written as a whole (c.f. FrequencyCatalogue.save, ResultIndex.save): the
+files are written to ``<path>.tmp`` and the directory is swapped in at once, so that
+readers never see half of it.
+
+    with replace_directory(path) as tmp:
+        np.save(tmp / "ids.npy", ids)
+"""
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def replace_directory(path):
+    '''
+    Yield an empty ``<path>.tmp`` directory and swap it with ``path`` once the block
+    succeeds. Leftovers of an interrupted save (``.tmp`` / ``.old``) are cleared first.
+    '''
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    old = path.with_name(path.name + ".old")
+    for stale in (tmp, old):
+        if stale.exists():
+            shutil.rmtree(stale)
+    tmp.mkdir(parents=True)
+
+    try:
+        yield tmp
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    if path.exists():
+        path.rename(old)
+        tmp.rename(path)
+        shutil.rmtree(old)
+    else:
+        tmp.rename(path)
@@ -0,0 +1,432 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from . import time_utils
+from .time_utils import time_grid
+
+
+EPHEMERIS_FIELDS = ("ra", "dec", "alt", "az")
+
+EARTH_MU = 398600.4418          # km^3 / s^2
+EARTH_RADIUS = 6378.137         # km, equatorial
+EARTH_ROTATION = 7.2921159e-5   # rad / s
+# margin (degrees) for the small frame differences between this module and Sopp
+POSITION_TOLERANCE = 0.05
+
+
+@dataclass
+class EphemerisGrid:
+    """
+    Satellite positions precomputed on a shared time grid for one observatory.
+
+    - norad: satellite catalogue numbers, shape (n_sat,)
+    - times: UTC sample times as datetime64[ns], shape (n_time,)
+    - ra, dec: geocentric right ascension / declination in degrees (same frame
+      as ``skyfield_utils.sat_proximity``), shape (n_sat, n_time)
+    - alt, az: topocentric altitude / azimuth in degrees as seen from the
+      observatory, shape (n_sat, n_time)
+    """
+    norad: np.ndarray
+    times: np.ndarray
+    ra: np.ndarray
+    dec: np.ndarray
+    alt: np.ndarray
+    az: np.ndarray
+
+    @property
+    def shape(self):
+        return self.ra.shape
+
+    def to_arrays(self, prefix: str = "ephemeris_") -> dict:
+        arrays = {f"{prefix}{f}": getattr(self, f) for f in EPHEMERIS_FIELDS}
+        arrays[f"{prefix}norad"] = self.norad
+        arrays[f"{prefix}times"] = self.times
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "ephemeris_") -> "EphemerisGrid":
+        """Build a grid from a mapping of arrays without copying them."""
+        return cls(**{
+            f: arrays[f"{prefix}{f}"]
+            for f in ("norad", "times") + EPHEMERIS_FIELDS
+        })
+
+    def rows_for(self, norad_ids) -> np.ndarray:
+        """Return the grid row of each requested NORAD id (-1 if absent)."""
+        norad_ids = np.asarray(norad_ids, dtype=np.int64)
+        if len(self.norad) == 0:
+            return np.full(norad_ids.shape, -1)
+
+        order = np.argsort(self.norad, kind="stable")
+        pos = np.searchsorted(self.norad[order], norad_ids).clip(0, len(order) - 1)
+        found = self.norad[order][pos] == norad_ids
+        return np.where(found, order[pos], -1)
+
+    def time_slice(self, begin, end) -> slice:
+        """Slice of grid columns with begin <= time <= end."""
+        begin = np.datetime64(begin, "ns")
+        end = np.datetime64(end, "ns")
+        lo = np.searchsorted(self.times, begin, side="left")
+        hi = np.searchsorted(self.times, end, side="right")
+        return slice(lo, hi)
+
+    def covers(self, begin, end) -> bool:
+        if len(self.times) == 0:
+            return False
+        return self.times[0] <= np.datetime64(begin, "ns") and np.datetime64(end, "ns") <= self.times[-1]
+
+
+def load_tle_lines(tle_file_path):
+    """
+    Read a 3LE file into three fixed-width byte arrays (names, line1, line2).
+    Byte arrays can be published to shared memory or written to disk as-is.
+    """
+    with open(Path(tle_file_path), "r") as f:
+        lines = [l.rstrip("\r\n") for l in f if l.strip()]
+
+    names = lines[0::3]
+    line1 = lines[1::3]
+    line2 = lines[2::3]
+    n = min(len(names), len(line1), len(line2))
+
+    return (
+        np.array(names[:n], dtype="S"),
+        np.array(line1[:n], dtype="S69"),
+        np.array(line2[:n], dtype="S69"),
+    )
+
+
+def tle_norad_ids(line1) -> np.ndarray:
+    """Extract catalogue numbers from columns 3-7 of TLE line 1."""
+    line1 = [l.decode() if isinstance(l, bytes) else l for l in line1]
+    return np.array([int(l[2:7]) for l in line1], dtype=np.int64)
+
+
+def to_skyfield_times(times: np.ndarray):
+    return time_utils.to_skyfield(times)
+
+
+def compute_ephemeris(line1, line2, times, latitude, longitude, elevation=0.0, chunk_size=512) -> EphemerisGrid:
+    """
+    Propagate every TLE of the catalogue on the given time grid in one
+    vectorized SGP4 pass (satellites are processed in chunks to bound memory).
+
+    :param line1, line2: TLE lines (str or bytes sequences)
+    :param times: datetime64 UTC sample times
+    :param latitude, longitude: observatory geodetic coordinates in degrees
+    :param elevation: observatory elevation in meters
+    """
+    from sgp4.api import Satrec, SatrecArray
+    from skyfield.api import wgs84
+    from skyfield.framelib import itrs
+    from skyfield.sgp4lib import TEME
+
+    line1 = [l.decode() if isinstance(l, bytes) else l for l in line1]
+    line2 = [l.decode() if isinstance(l, bytes) else l for l in line2]
+    times = np.asarray(times, dtype="datetime64[ns]")
+
+    n_sat, n_t = len(line1), len(times)
+    satrecs = [Satrec.twoline2rv(l1, l2) for l1, l2 in zip(line1, line2)]
+    norad = np.array([s.satnum for s in satrecs], dtype=np.int64)
+
+    out = {f: np.full((n_sat, n_t), np.nan, dtype=np.float32) for f in EPHEMERIS_FIELDS}
+    if n_sat == 0 or n_t == 0:
+        return EphemerisGrid(norad=norad, times=times, **out)
+
+    t = to_skyfield_times(times)
+    jd = np.asarray(t.whole, dtype=float) * np.ones(n_t)
+    fr = np.asarray(t.tai_fraction - t._leap_seconds() / 86400.0, dtype=float) * np.ones(n_t)
+
+    # Rotations shared by all satellites: TEME -> GCRS -> ITRS, shape (3, 3, n_t)
+    teme_to_gcrs = np.swapaxes(TEME.rotation_at(t), 0, 1)
+    gcrs_to_itrs = itrs.rotation_at(t)
+
+    observer = wgs84.latlon(latitude, longitude, elevation_m=elevation).itrs_xyz.km
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    east = np.array([-np.sin(lon), np.cos(lon), 0.0])
+    north = np.array([-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+    for start in range(0, n_sat, chunk_size):
+        stop = min(start + chunk_size, n_sat)
+        errors, r_teme, _ = SatrecArray(satrecs[start:stop]).sgp4(jd, fr)  # r_teme: (n, n_t, 3)
+
+        r_gcrs = np.einsum("ijt,ntj->nti", teme_to_gcrs, r_teme)
+        r_itrs = np.einsum("ijt,ntj->nti", gcrs_to_itrs, r_gcrs)
+
+        ra = np.degrees(np.arctan2(r_gcrs[..., 1], r_gcrs[..., 0])) % 360
+        dec = np.degrees(np.arcsin(r_gcrs[..., 2] / np.linalg.norm(r_gcrs, axis=-1)))
+
+        d = r_itrs - observer
+        alt = np.degrees(np.arcsin((d @ up) / np.linalg.norm(d, axis=-1)))
+        az = np.degrees(np.arctan2(d @ east, d @ north)) % 360
+
+        invalid = errors != 0
+        for f, values in (("ra", ra), ("dec", dec), ("alt", alt), ("az", az)):
+            values[invalid] = np.nan
+            out[f][start:stop] = values
+
+    return EphemerisGrid(norad=norad, times=times, **out)
+
+
+def radec_to_altaz(ra_deg, dec_deg, times, latitude, longitude):
+    """
+    Altitude / azimuth in degrees of a fixed (ICRS) sky position as seen from an
+    observatory at each of the given datetime64 times. Parallax is irrelevant for
+    sidereal targets, so only the Earth rotation (precession, nutation, sidereal
+    time) is applied.
+    """
+    from skyfield.framelib import itrs
+
+    times = np.asarray(times, dtype="datetime64[ns]")
+    if len(times) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    ra, dec = np.radians(ra_deg), np.radians(dec_deg)
+    direction = np.array([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)])
+    d = np.einsum("ijt,j->ti", itrs.rotation_at(to_skyfield_times(times)), direction)
+
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    east = np.array([-np.sin(lon), np.cos(lon), 0.0])
+    north = np.array([-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+    alt = np.degrees(np.arcsin(np.clip(d @ up, -1, 1)))
+    az = np.degrees(np.arctan2(d @ east, d @ north)) % 360
+    return alt, az
+
+
+def screen_grid(grid: EphemerisGrid, begin, end, target_ra, target_dec, latitude, longitude,
+                beamwidth=3, mainbeam=True, min_altitude=5.0) -> np.ndarray:
+    """
+    Reproduce Sopp's screening criteria on a precomputed ephemeris grid and
+    return the NORAD ids of the matching satellites.
+
+    mainbeam = True: satellite above ``min_altitude``, not below the lower edge of
+                     the beam and within half a beamwidth in azimuth of the target
+    mainbeam = False: satellite above ``min_altitude`` at any sample of the window
+    """
+    _, in_view = _screen_mask(grid, begin, end, target_ra, target_dec, latitude, longitude,
+                              beamwidth, mainbeam, min_altitude)
+    return np.asarray(grid.norad)[in_view.any(axis=1)]
+
+
+def screen_grid_windows(grid: EphemerisGrid, begin, end, target_ra, target_dec, latitude, longitude,
+                        beamwidth=3, mainbeam=True, min_altitude=5.0):
+    """
+    Same criteria as screen_grid(), but returns every interference interval:
+    (norad, first sample time, last sample time) arrays, one entry per run of
+    consecutive matching grid samples.
+    """
+    cols, in_view = _screen_mask(grid, begin, end, target_ra, target_dec, latitude, longitude,
+                                 beamwidth, mainbeam, min_altitude)
+    times = grid.times[cols]
+
+    # +1 where a run starts, -1 after its last sample
+    padded = np.zeros((in_view.shape[0], in_view.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = in_view
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)
+
+    return np.asarray(grid.norad)[rows], times[starts], times[stops - 1]
+
+
+@dataclass
+class SeparationProfiles:
+    """
+    Per satellite above the horizon during a window (one row each):
+
+    - norad: catalogue numbers, shape (n,)
+    - min_separation: smallest topocentric angle to the target in degrees, shape (n,)
+    - min_separation_time: when it occurs (datetime64[ns]), shape (n,)
+    - seconds_visible: time spent above the minimum altitude, shape (n,)
+    - seconds_within: time spent above the minimum altitude and within each radius, shape (n, n_radii)
+    - radii: the radii in degrees, shape (n_radii,)
+    """
+    norad: np.ndarray
+    min_separation: np.ndarray
+    min_separation_time: np.ndarray
+    seconds_visible: np.ndarray
+    seconds_within: np.ndarray
+    radii: np.ndarray
+
+    def __len__(self):
+        return len(self.norad)
+
+
+def separation_profiles(grid: EphemerisGrid, begin, end, target_ra, target_dec, latitude, longitude,
+                        radii=(3.0,), min_altitude=5.0) -> SeparationProfiles:
+    """
+    Separation of every satellite of the grid from a fixed target over [begin, end],
+    in a single array computation over the grid samples. Each sample stands for the
+    time halfway to its neighbours, so durations add up to the window length.
+    """
+    radii = np.asarray(radii, dtype=float)
+    cols = grid.time_slice(begin, end)
+    times = grid.times[cols]
+    alt = np.asarray(grid.alt[:, cols], dtype=float)
+    visible = alt >= min_altitude
+    rows = np.flatnonzero(visible.any(axis=1))
+
+    if len(rows) == 0:
+        return SeparationProfiles(
+            norad=np.zeros(0, dtype=np.int64), min_separation=np.zeros(0),
+            min_separation_time=np.zeros(0, dtype="datetime64[ns]"), seconds_visible=np.zeros(0),
+            seconds_within=np.zeros((0, len(radii))), radii=radii,
+        )
+
+    target_alt, target_az = radec_to_altaz(target_ra, target_dec, times, latitude, longitude)
+    alt, visible = np.radians(alt[rows]), visible[rows]
+    az = np.radians(np.asarray(grid.az[rows, cols], dtype=float))
+    t_alt, t_az = np.radians(target_alt), np.radians(target_az)
+
+    cos_sep = np.sin(alt) * np.sin(t_alt) + np.cos(alt) * np.cos(t_alt) * np.cos(az - t_az)
+    separation = np.where(visible, np.degrees(np.arccos(np.clip(cos_sep, -1, 1))), np.inf)
+
+    seconds = (times - times[0]) / np.timedelta64(1, "s")
+    weights = np.zeros(len(times))
+    if len(times) > 1:
+        half_steps = np.diff(seconds) / 2
+        weights[:-1] += half_steps
+        weights[1:] += half_steps
+
+    closest = separation.argmin(axis=1)
+    return SeparationProfiles(
+        norad=np.asarray(grid.norad)[rows],
+        min_separation=separation[np.arange(len(rows)), closest],
+        min_separation_time=times[closest],
+        seconds_visible=visible @ weights,
+        seconds_within=np.stack([(separation <= r) @ weights for r in radii], axis=1),
+        radii=radii,
+    )
+
+
+def angular_rate_bound(line2, elevation=0.0, margin=1.1) -> np.ndarray:
+    """
+    Upper bound (degrees per second) of each satellite's angular rate as seen from
+    an observatory: its fastest speed (at perigee) plus the observatory's rotation
+    speed, over the shortest possible range (perigee height above the observatory).
+
+    :param line2: TLE lines 2 (str or bytes sequence)
+    :param elevation: observatory elevation in meters
+    """
+    line2 = [l.decode() if isinstance(l, bytes) else l for l in line2]
+    revs_per_day = np.array([float(l[52:63]) for l in line2])
+    eccentricity = np.array([float("0." + l[26:33].strip()) for l in line2])
+
+    n = revs_per_day * 2 * np.pi / 86400
+    a = (EARTH_MU / n**2) ** (1 / 3)
+    perigee = a * (1 - eccentricity)
+    speed = np.sqrt(EARTH_MU * (2 / perigee - 1 / a))
+
+    r_obs = EARTH_RADIUS + elevation / 1000
+    # decayed orbits get a huge bound, i.e. are always kept as candidates
+    closest = np.maximum(perigee - r_obs, 1.0)
+    return np.degrees(margin * (speed + EARTH_ROTATION * r_obs) / closest)
+
+
+def coarse_candidates(line1, line2, begin, end, path_times, path_alt, path_az,
+                      latitude, longitude, elevation=0.0, step_seconds=30.0,
+                      beamwidth=3, mainbeam=True, min_altitude=5.0) -> np.ndarray:
+    """
+    First pass of a two-stage screening: which satellites may meet Sopp's criteria
+    (c.f. screen_grid) at any instant of [begin, end].
+
+    Positions are computed every ``step_seconds`` only, so every instant is within
+    half a step of a sample, during which a satellite moves by at most
+    angular_rate_bound() * step / 2 on the sky. The beam is inflated by that much in
+    altitude and by that much / cos(altitude) in azimuth, so no satellite that the
+    fine pass would find is missed.
+
+    :param path_times, path_alt, path_az: antenna pointing, each entry held until the next
+                                          one (Sopp's antenna_direction_path)
+    Returns a boolean mask over the satellites.
+    """
+    times = time_grid(begin, end, step_seconds)
+    if len(times) == 0 or times[-1] < np.datetime64(end, "ns"):
+        times = np.append(times, np.datetime64(end, "ns"))
+
+    grid = compute_ephemeris(line1, line2, times, latitude, longitude, elevation)
+    slack = angular_rate_bound(line2, elevation)[:, None] * step_seconds / 2 + POSITION_TOLERANCE
+    return _candidates(grid.alt, grid.az, times, slack, step_seconds, path_times, path_alt, path_az,
+                       beamwidth, mainbeam, min_altitude)
+
+
+def grid_candidates(grid: EphemerisGrid, norad_ids, line2, begin, end, path_times, path_alt, path_az,
+                    elevation=0.0, beamwidth=3, mainbeam=True, min_altitude=5.0) -> np.ndarray:
+    """
+    coarse_candidates() on the samples of a precomputed grid (e.g. an EphemerisCache
+    window, which has a sample before begin and after end) instead of propagating.
+    The beam is inflated by the satellites' motion over half the grid step, so the
+    result is a superset of what Sopp finds at its own resolution.
+
+    :param norad_ids, line2: the satellites to screen (TLE lines 2 for their angular rate);
+                             the ones missing from the grid are kept
+    Returns a boolean mask over the satellites.
+    """
+    rows = grid.rows_for(norad_ids)
+    keep = rows < 0
+    present = np.flatnonzero(~keep)
+    if len(present) == 0:
+        return keep
+
+    times = np.asarray(grid.times, dtype="datetime64[ns]")
+    step_seconds = float(np.max(np.diff(times)) / np.timedelta64(1, "s")) if len(times) > 1 else 0.0
+    step = np.timedelta64(int(round(step_seconds * 1e9)), "ns")
+    cols = grid.time_slice(np.datetime64(begin, "ns") - step, np.datetime64(end, "ns") + step)
+
+    line2 = [line2[k] for k in present]
+    slack = angular_rate_bound(line2, elevation)[:, None] * step_seconds / 2 + POSITION_TOLERANCE
+    alt = np.asarray(grid.alt[rows[present], cols], dtype=float)
+    az = np.asarray(grid.az[rows[present], cols], dtype=float)
+    keep[present] = _candidates(alt, az, times[cols], slack, step_seconds, path_times, path_alt, path_az,
+                                beamwidth, mainbeam, min_altitude)
+    return keep
+
+
+def _candidates(alt, az, times, slack, step_seconds, path_times, path_alt, path_az,
+                beamwidth, mainbeam, min_altitude) -> np.ndarray:
+    # satellites whose samples, inflated by slack degrees, may meet Sopp's criteria
+    candidate = alt >= min_altitude - slack
+    if mainbeam:
+        half_beamwidth = beamwidth / 2
+        highest = np.minimum(np.abs(alt) + slack, 90)
+        with np.errstate(divide="ignore"):
+            az_slack = np.where(highest >= 90, 360, slack / np.cos(np.radians(highest)))
+
+        # antenna pointings in effect within half a step of each sample
+        path_times = np.asarray(path_times, dtype="datetime64[ns]")
+        path_alt, path_az = np.asarray(path_alt, dtype=float), np.asarray(path_az, dtype=float)
+        half_step = np.timedelta64(int(round(step_seconds * 1e9 / 2)), "ns")
+        first = (np.searchsorted(path_times, times - half_step, side="right") - 1).clip(0)
+        last = (np.searchsorted(path_times, times + half_step, side="right") - 1).clip(0)
+
+        in_beam = np.zeros_like(candidate)
+        for k in range(int((last - first).max(initial=0)) + 1):
+            j = np.minimum(first + k, last)
+            az_diff = np.abs((az - path_az[j] + 180) % 360 - 180)
+            in_beam |= (alt >= path_alt[j] - half_beamwidth - slack) & (az_diff <= half_beamwidth + az_slack)
+        candidate &= in_beam
+
+    # keep satellites SGP4 could not propagate, the fine pass decides
+    candidate |= np.isnan(alt)
+    return candidate.any(axis=1)
+
+
+def _screen_mask(grid, begin, end, target_ra, target_dec, latitude, longitude,
+                 beamwidth, mainbeam, min_altitude):
+    # grid columns of the window and (n_sat, n_col) mask of the samples meeting Sopp's criteria
+    cols = grid.time_slice(begin, end)
+    alt = grid.alt[:, cols]
+    in_view = alt >= min_altitude
+
+    if mainbeam:
+        target_alt, target_az = radec_to_altaz(target_ra, target_dec, grid.times[cols], latitude, longitude)
+        half_beamwidth = beamwidth / 2
+        az_diff = np.abs((grid.az[:, cols] - target_az + 180) % 360 - 180)
+        in_view &= (alt >= target_alt - half_beamwidth) & (az_diff <= half_beamwidth)
+
+    return cols, in_view
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+
+from .ephemeris import EphemerisGrid, EPHEMERIS_FIELDS, compute_ephemeris, load_tle_lines, time_grid
+
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "manifest.lock"
+
+
+class EphemerisCache:
+    """
+    Persistent on-disk cache of ephemeris grids, reused across runs.
+
+    Grids are partitioned as ``<root>/<observatory>/<YYYY-MM-DD>/<tle hash>/`` and
+    each field is stored as a float32 ``.npy`` file that is memory-mapped on read.
+    A ``manifest.json`` at the root keeps the size and last access time of every
+    partition so that the least recently used ones are evicted once the cache grows
+    beyond ``max_bytes``. Several processes can share a cache: the manifest is merged
+    with the one on disk under a file lock whenever it is written.
+    """
+
+    def __init__(self, root="data/ephemeris_cache", max_bytes=10 * 2**30, step_seconds=10.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.step_seconds = step_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._entries = self._load_manifest()
+        self._catalogues = {}
+
+
+    # ---------- PUBLIC API ----------
+
+    @staticmethod
+    def tle_hash(line1, line2) -> str:
+        digest = hashlib.sha1()
+        for l1, l2 in sorted(zip(line1, line2)):
+            digest.update(l1 if isinstance(l1, bytes) else l1.encode())
+            digest.update(l2 if isinstance(l2, bytes) else l2.encode())
+        return digest.hexdigest()[:16]
+
+    def catalogue(self, tle_file_path):
+        """TLE lines and their hash, memoized per file (and modification time)."""
+        tle_file_path = Path(tle_file_path)
+        key = (str(tle_file_path.resolve()), tle_file_path.stat().st_mtime_ns)
+        if key not in self._catalogues:
+            _, line1, line2 = load_tle_lines(tle_file_path)
+            self._catalogues[key] = (line1, line2, self.tle_hash(line1, line2))
+        return self._catalogues[key]
+
+    def get(self, observatory: str, day: date, tle_hash: str):
+        """Memory-mapped grid of a cached partition, or None."""
+        key = self._key(observatory, day, tle_hash)
+        path = self.root / key
+        if key not in self._entries or not path.exists():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries[key]["last_access"] = time.time()
+        return self._open(path)
+
+    def put(self, observatory: str, day: date, tle_hash: str, grid: EphemerisGrid):
+        """Store a partition; raises ValueError if it alone does not fit in ``max_bytes``."""
+        key = self._key(observatory, day, tle_hash)
+        path = self.root / key
+        tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+
+        np.save(tmp / "norad.npy", np.asarray(grid.norad, dtype=np.int64))
+        np.save(tmp / "times.npy", np.asarray(grid.times, dtype="datetime64[ns]"))
+        for f in EPHEMERIS_FIELDS:
+            np.save(tmp / f"{f}.npy", np.asarray(getattr(grid, f), dtype=np.float32))
+
+        nbytes = _size(tmp)
+        if nbytes > self.max_bytes:
+            shutil.rmtree(tmp)
+            raise ValueError(f"Ephemeris partition {key} ({nbytes} bytes) is larger than the "
+                             f"cache (max_bytes={self.max_bytes}): raise max_bytes or step_seconds")
+
+        # Publish the partition atomically: readers never see half-written files
+        if path.exists():
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, path)
+
+        self._entries[key] = {"bytes": nbytes, "last_access": time.time()}
+        self.flush(keep=key)
+
+    def get_or_compute(self, observatory: str, day: date, line1, line2,
+                       latitude, longitude, elevation=0.0, tle_hash: str = None) -> EphemerisGrid:
+        tle_hash = tle_hash or self.tle_hash(line1, line2)
+        grid = self.get(observatory, day, tle_hash)
+        if grid is None:
+            # Canonical satellite order, so that grids of the same TLE set line up across days
+            line1, line2 = map(list, zip(*sorted(zip(line1, line2)))) if len(line1) else (line1, line2)
+            begin = datetime.combine(day, datetime.min.time())
+            times = time_grid(begin, begin + timedelta(days=1), self.step_seconds)[:-1]
+            self.put(observatory, day, tle_hash,
+                     compute_ephemeris(line1, line2, times, latitude, longitude, elevation))
+            # map the files just written (not get(): a miss is not also a hit)
+            grid = self._open(self.root / self._key(observatory, day, tle_hash))
+        return grid
+
+    def window(self, observatory: str, begin, end, line1, line2,
+               latitude, longitude, elevation=0.0, tle_hash: str = None) -> EphemerisGrid:
+        """
+        Grid covering [begin, end] (naive UTC datetimes), read from the cached days
+        and computed only for the missing ones. Windows within one day are returned
+        as views on the memory-mapped files.
+        """
+        tle_hash = tle_hash or self.tle_hash(line1, line2)
+
+        # One extra sample after ``end`` so that interpolation never falls off the grid
+        last = end + timedelta(seconds=self.step_seconds)
+        days = [begin.date() + timedelta(days=i) for i in range((last.date() - begin.date()).days + 1)]
+        grids = [
+            self.get_or_compute(observatory, d, line1, line2, latitude, longitude, elevation, tle_hash)
+            for d in days
+        ]
+
+        lo = np.datetime64(begin, "ns") - np.timedelta64(int(self.step_seconds * 1e9), "ns")
+        hi = np.datetime64(last, "ns")
+        parts = [(g, g.time_slice(lo, hi)) for g in grids]
+        if len(parts) == 1:
+            g, cols = parts[0]
+            return EphemerisGrid(norad=g.norad, times=g.times[cols],
+                                 **{f: getattr(g, f)[:, cols] for f in EPHEMERIS_FIELDS})
+
+        return EphemerisGrid(
+            norad=grids[0].norad,
+            times=np.concatenate([g.times[cols] for g, cols in parts]),
+            **{f: np.concatenate([getattr(g, f)[:, cols] for g, cols in parts], axis=1) for f in EPHEMERIS_FIELDS},
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e["bytes"] for e in self._entries.values())
+
+    def evict(self, keep: str = None):
+        """Drop least recently used partitions (but ``keep``) until the cache fits in ``max_bytes``."""
+        by_age = sorted((k for k in self._entries if k != keep), key=lambda k: self._entries[k]["last_access"])
+        while by_age and self.total_bytes > self.max_bytes:
+            key = by_age.pop(0)
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            del self._entries[key]
+
+    def flush(self, keep: str = None):
+        """
+        Merge the manifest with the one on disk (other processes share the cache), evict
+        and write it atomically, under a lock. The partitions are the directories on disk:
+        the ones missing from both manifests are accounted for by their size and mtime.
+        """
+        with _locked(self.root / LOCK_NAME):
+            entries = self._read_manifest()
+            for key, entry in self._entries.items():
+                if key not in entries or entry["last_access"] > entries[key]["last_access"]:
+                    entries[key] = entry
+            self._entries = {key: entries.get(key) or _entry(self.root / key) for key in self._partitions()}
+            self.evict(keep)
+
+            tmp = self.root / f"{MANIFEST_NAME}.tmp{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump({"step_seconds": self.step_seconds, "entries": self._entries}, f, indent=2)
+            os.replace(tmp, self.root / MANIFEST_NAME)
+
+
+    # ---------- INTERNAL ----------
+
+    def _key(self, observatory: str, day: date, tle_hash: str) -> str:
+        return f"{observatory.replace('/', '_')}/{day.isoformat()}/{tle_hash}"
+
+    def _open(self, path: Path) -> EphemerisGrid:
+        arrays = {
+            f: np.load(path / f"{f}.npy", mmap_mode="r")
+            for f in ("norad", "times") + EPHEMERIS_FIELDS
+        }
+        return EphemerisGrid(**arrays)
+
+    def _partitions(self) -> list[str]:
+        # <observatory>/<day>/<tle hash>, without the partitions being written
+        return [p.relative_to(self.root).as_posix() for p in self.root.glob("*/*/*")
+                if p.is_dir() and ".tmp" not in p.name]
+
+    def _read_manifest(self) -> dict:
+        path = self.root / MANIFEST_NAME
+        if not path.exists():
+            return {}
+
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("step_seconds") != self.step_seconds:
+            return {}
+        return manifest.get("entries", {})
+
+    def _load_manifest(self) -> dict:
+        path = self.root / MANIFEST_NAME
+        if not path.exists():
+            return {}
+
+        with open(path) as f:
+            manifest = json.load(f)
+
+        if manifest.get("step_seconds") != self.step_seconds:
+            # Grids computed at another resolution can't be reused
+            for key in manifest.get("entries", {}):
+                shutil.rmtree(self.root / key, ignore_errors=True)
+            return {}
+
+        return {k: v for k, v in manifest.get("entries", {}).items() if (self.root / k).exists()}
+
+
+def _size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir())
+
+
+def _entry(path: Path) -> dict:
+    # a partition unknown to the manifests, e.g. written by a run that crashed before flushing
+    return {"bytes": _size(path), "last_access": path.stat().st_mtime}
+
+
+@contextmanager
+def _locked(path: Path):
+    # exclusive lock between the processes sharing the cache (none where fcntl is missing)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
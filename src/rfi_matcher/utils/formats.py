@@ -0,0 +1,64 @@
+"""
+String formats of the archives' observation columns (c.f. MeerkatDataArchive, which
+formats them with astropy's ``Angle.to_string``):
+
+    right_ascension   "4h08m20.4s"             hours, minutes, seconds to 0.1 s
+    declination       "-47d15m09.101s"         degrees, minutes, seconds to 1 mas
+    begin, end        "2025-06-27T04:17:34"    ISO, sub-second digits only where needed
+
+Minutes and seconds are zero-padded, so that values parsed into a compact table
+(c.f. model.compact_table) format back to the archive's strings. The vectorized
+``format_*`` functions convert whole columns, the scalar ``*_string`` / ``*_degrees``
+helpers accept a value of either representation (a row of an archive frame or of a
+compact table).
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+# ---------- COLUMNS ----------
+
+def format_hms(ra_deg) -> np.ndarray:
+    '''RA in degrees -> "4h08m20.4s" strings.'''
+    tenths = np.round(np.asarray(ra_deg, dtype=float) % 360 / 15 * 36000).astype(np.int64) % (24 * 36000)
+    h, rest = np.divmod(tenths, 36000)
+    m, s = np.divmod(rest, 600)
+    return np.array([f"{a}h{b:02d}m{c / 10:04.1f}s" for a, b, c in zip(h, m, s)], dtype=object)
+
+
+def format_dms(dec_deg) -> np.ndarray:
+    '''Dec in degrees -> "-47d15m09.101s" strings.'''
+    dec_deg = np.asarray(dec_deg, dtype=float)
+    millis = np.round(np.abs(dec_deg) * 3600000).astype(np.int64)
+    d, rest = np.divmod(millis, 3600000)
+    m, s = np.divmod(rest, 60000)
+    sign = np.where(dec_deg < 0, "-", "")
+    return np.array([f"{g}{a}d{b:02d}m{c / 1000:06.3f}s" for g, a, b, c in zip(sign, d, m, s)], dtype=object)
+
+
+def format_iso(times) -> np.ndarray:
+    '''datetime64 values -> ISO strings, with microseconds only where they are not zero (like isoformat()).'''
+    times = np.asarray(times, dtype="datetime64[us]")
+    whole = times.astype(np.int64) % 1_000_000 == 0
+    return np.where(whole, np.datetime_as_string(times, unit="s"), np.datetime_as_string(times, unit="us"))
+
+
+# ---------- SCALARS ----------
+
+def ra_string(value) -> str:
+    return value if isinstance(value, str) else str(format_hms([value])[0])
+
+def dec_string(value) -> str:
+    return value if isinstance(value, str) else str(format_dms([value])[0])
+
+def iso_string(value) -> str:
+    return value if isinstance(value, str) else str(format_iso([value])[0])
+
+def ra_degrees(value) -> float:
+    from rfi_matcher.utils.skyfield_utils import ra_str_to_deg
+    return ra_str_to_deg(value) if isinstance(value, str) else float(value)
+
+def dec_degrees(value) -> float:
+    from rfi_matcher.utils.skyfield_utils import dec_str_to_deg
+    return dec_str_to_deg(value) if isinstance(value, str) else float(value)
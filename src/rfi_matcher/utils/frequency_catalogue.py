@@ -0,0 +1,208 @@
+"""
+Compiled, memory-mappable satellite frequency catalogue.
+
+The scraped ``satellite_frequencies.csv`` holds several rows per NORAD id, "None"
+strings and a bandwidth column in kHz (or baud). ``compile_frequency_catalogue``
+parses it once into a directory of typed ``.npy`` columns, sorted by NORAD id:
+
+    norad.npy            int64    one entry per transmitter row
+    frequency_mhz.npy    float64  NaN where unknown
+    bandwidth_mhz.npy    float64  NaN where unknown
+    status.npy           int8     index in STATUSES, -1 where unknown
+    orbit.npy            int8     index in ORBITS, -1 where unknown
+    description.npy      int32    index in descriptions.npy
+    ids.npy, offsets.npy          rows of ids[k] are offsets[k]:offsets[k + 1]
+    meta.json                     source file and modification time
+
+Loading maps the columns (``np.load(mmap_mode="r")``) and takes milliseconds. The
+catalogue answers frequency prefiltering (``in_band``) and result annotation
+(``transmitters``).
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .directories import replace_directory
+
+
+STATUSES = ("active", "inactive", "invalid")
+ORBITS = ("LEO", "MEO", "GEO")
+COLUMNS = ("norad", "frequency_mhz", "bandwidth_mhz", "status", "orbit", "description")
+FORMAT_VERSION = 1
+DEFAULT_BANDWIDTH_MHZ = 10      # sopp's DEFAULT_BANDWIDTH, for transmitters of unknown bandwidth
+
+
+class FrequencyCatalogue:
+    """
+    Use ``FrequencyCatalogue.cached(csv)`` to compile on first use (or when the CSV
+    changed) and load, or compile_frequency_catalogue / load explicitly.
+    """
+
+    def __init__(self, norad, frequency_mhz, bandwidth_mhz, status, orbit, description, descriptions):
+        order = np.argsort(norad, kind="stable")
+        self.norad = np.asarray(norad)[order]
+        self.frequency_mhz = np.asarray(frequency_mhz)[order]
+        self.bandwidth_mhz = np.asarray(bandwidth_mhz)[order]
+        self.status = np.asarray(status)[order]
+        self.orbit = np.asarray(orbit)[order]
+        self.description = np.asarray(description)[order]
+        self.descriptions = np.asarray(descriptions)
+        self.ids, starts = np.unique(self.norad, return_index=True)
+        self.offsets = np.append(starts, len(self.norad))
+
+    def __len__(self):
+        return len(self.norad)
+
+
+    # ---------- BUILDING ----------
+
+    @classmethod
+    def from_csv(cls, csv_path) -> FrequencyCatalogue:
+        import pandas as pd
+
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        ids = pd.to_numeric(df["ID"], errors="coerce")
+        df = df[ids.notna()]
+
+        # "Bandwidth [kHz]/Baud": the leading number, in kHz
+        bandwidth = pd.to_numeric(df["Bandwidth [kHz]/Baud"].str.split().str[0], errors="coerce") / 1000
+        description_codes, descriptions = pd.factorize(df["Description"].replace("None", ""))
+
+        return cls(
+            norad=ids[ids.notna()].to_numpy(dtype=np.int64),
+            frequency_mhz=pd.to_numeric(df["Frequency [MHz]"], errors="coerce").to_numpy(dtype=np.float64),
+            bandwidth_mhz=bandwidth.to_numpy(dtype=np.float64),
+            status=_codes(df["Status"].str.lower(), STATUSES),
+            orbit=_codes(df["Orbit"].str.upper(), ORBITS) if "Orbit" in df else np.full(len(df), -1, np.int8),
+            description=description_codes.astype(np.int32),
+            descriptions=np.asarray(descriptions, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> FrequencyCatalogue:
+        path = Path(path)
+        mode = "r" if mmap else None
+        catalogue = cls.__new__(cls)
+        for name in COLUMNS + ("ids", "offsets", "descriptions"):
+            setattr(catalogue, name, np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False))
+        return catalogue
+
+    @classmethod
+    def cached(cls, csv_path, path=None, mmap: bool = True) -> FrequencyCatalogue:
+        '''Load the compiled catalogue of csv_path, (re)compiling it if missing or stale.'''
+        csv_path = Path(csv_path)
+        path = default_path(csv_path) if path is None else Path(path)
+        if not _up_to_date(path, csv_path):
+            compile_frequency_catalogue(csv_path, path)
+        return cls.load(path, mmap=mmap)
+
+    def save(self, path, source: Path = None):
+        meta = {"version": FORMAT_VERSION, "rows": len(self)}
+        if source is not None:
+            meta.update(source=str(source.resolve()), source_mtime_ns=source.stat().st_mtime_ns)
+        # swap the whole directory at once: readers never see half a catalogue
+        with replace_directory(path) as tmp:
+            for name in COLUMNS + ("ids", "offsets", "descriptions"):
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)), allow_pickle=False)
+            (tmp / "meta.json").write_text(json.dumps(meta))
+
+
+    # ---------- QUERIES ----------
+
+    def rows(self, norad: int) -> slice:
+        '''Transmitter rows of one satellite (an empty slice if it is not in the catalogue).'''
+        k = np.searchsorted(self.ids, norad)
+        if k == len(self.ids) or self.ids[k] != norad:
+            return slice(0, 0)
+        return slice(int(self.offsets[k]), int(self.offsets[k + 1]))
+
+    def in_band(self, frequency_hz: float, bandwidth_hz: float, rows: slice = slice(None)) -> np.ndarray:
+        '''
+        Mask over the transmitter rows overlapping the observed band, by Sopp's rule
+        (FrequencyRange.overlaps): a row spans [f - bw, f + bw] (bw = DEFAULT_BANDWIDTH_MHZ / 2
+        if unknown) and the bounds are strict. Rows of unknown frequency are not in band.
+        '''
+        frequency_mhz, bandwidth_mhz = frequency_hz / 1e6, bandwidth_hz / 1e6
+        low = frequency_mhz - bandwidth_mhz / 2
+        high = frequency_mhz + bandwidth_mhz / 2
+        frequency = self.frequency_mhz[rows]
+        span = np.nan_to_num(self.bandwidth_mhz[rows], nan=DEFAULT_BANDWIDTH_MHZ / 2)
+        return (frequency - span < high) & (frequency + span > low)
+
+    def transmitting_in_band(self, norad_ids, frequency_hz: float, bandwidth_hz: float,
+                             include_unknown: bool = True) -> np.ndarray:
+        '''
+        Mask over norad_ids: satellites with a transmitter in the observed band that is not
+        inactive, or (with include_unknown) whose frequencies are not all known. With
+        include_unknown this is sopp.satellites_filter.filters.filter_frequency.
+        '''
+        norad_ids = np.asarray(norad_ids, dtype=np.int64)
+        active = self.status != STATUSES.index("inactive")
+        keep = np.isin(norad_ids, self.norad[self.in_band(frequency_hz, bandwidth_hz) & active])
+        if include_unknown:
+            unknown = self.norad[np.isnan(self.frequency_mhz)]
+            keep |= np.isin(norad_ids, unknown) | ~np.isin(norad_ids, self.ids)
+        return keep
+
+    def transmitters(self, norad: int, frequency_hz: float = None, bandwidth_hz: float = None) -> list[dict]:
+        '''Transmitter rows of one satellite (only the ones in the observed band if given).'''
+        sl = self.rows(norad)
+        rows = np.arange(sl.start, sl.stop)
+        if frequency_hz is not None:
+            rows = rows[self.in_band(frequency_hz, bandwidth_hz or 0.0, sl)]
+        return [{
+            "frequency_mhz": _float(self.frequency_mhz[r]),
+            "bandwidth_mhz": _float(self.bandwidth_mhz[r]),
+            "status": _label(self.status[r], STATUSES),
+            "orbit": _label(self.orbit[r], ORBITS),
+            "description": str(self.descriptions[self.description[r]]) or None,
+        } for r in rows.tolist()]
+
+    def arrays(self) -> dict:
+        '''Flat ``freq_*`` arrays of sopp_utils.satellites_from_catalogue (c.f. SharedArrays).'''
+        status = np.array([s.encode() for s in STATUSES] + [b""], dtype="S8")
+        return {
+            "freq_norad": np.asarray(self.norad, dtype=np.int64),
+            "freq_mhz": np.asarray(self.frequency_mhz, dtype=np.float64),
+            "freq_bandwidth_mhz": np.asarray(self.bandwidth_mhz, dtype=np.float64),
+            "freq_status": status[self.status],
+        }
+
+
+def compile_frequency_catalogue(csv_path, path=None) -> Path:
+    '''Parse the frequency CSV into the binary catalogue directory (next to the CSV by default).'''
+    csv_path = Path(csv_path)
+    path = default_path(csv_path) if path is None else Path(path)
+    FrequencyCatalogue.from_csv(csv_path).save(path, source=csv_path)
+    return path
+
+
+def default_path(csv_path) -> Path:
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + ".freqcat")
+
+
+def _up_to_date(path: Path, csv_path: Path) -> bool:
+    try:
+        meta = json.loads((path / "meta.json").read_text())
+    except (OSError, ValueError):
+        return False
+    return meta.get("version") == FORMAT_VERSION and meta.get("source_mtime_ns") == csv_path.stat().st_mtime_ns
+
+
+def _codes(values, labels) -> np.ndarray:
+    import pandas as pd
+    # anything else ("None", typos) is unknown
+    values = values.where(values.isin(labels))
+    return pd.Categorical(values, categories=list(labels)).codes.astype(np.int8)
+
+
+def _label(code, labels):
+    return labels[code] if code >= 0 else None
+
+
+def _float(value):
+    return None if np.isnan(value) else float(value)
@@ -0,0 +1,352 @@
+"""
+Shared client layer for the archive and Space-Track requests.
+
+Every request goes through one ``HttpClient`` (c.f. ``default_client``), which
+keeps per host
+
+- a token bucket: at most ``rate`` requests per second, bursts of ``burst``
+- a circuit breaker: after ``failure_threshold`` failed requests in a row the
+  host is not contacted for ``reset_timeout`` seconds (CircuitOpenError), then a
+  single trial request decides whether it is closed again
+
+and retries transient failures (connection errors, 429 and 5xx responses) with
+jittered exponential backoff, waiting at least the server's ``Retry-After``.
+
+The client does not own any connection: ``call`` / ``call_async`` wrap the
+request function of the underlying library (urllib, requests, gql, spacetrack),
+``get_json`` is a plain urllib GET.
+
+    client = default_client()
+    data = client.get_json("https://data.nrao.edu/...", metrics=metrics)
+    result = await client.call_async(url, lambda: session.execute(query))
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+
+logger = logging.getLogger(__name__)
+
+# requests per second and burst size, per host
+DEFAULT_RATE = (5.0, 10)
+HOST_RATES = {
+    # Space-Track allows 30 requests per minute (and 300 per hour)
+    "www.space-track.org": (0.5, 5),
+}
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    '''Raised instead of contacting a host whose circuit breaker is open.'''
+
+
+# ---------- RATE LIMITING ----------
+
+class TokenBucket:
+    """
+    :param rate: tokens added per second
+    :param burst: bucket capacity
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        '''Take a token, returns the seconds to wait before using it (0 if available).'''
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # a negative balance is the queue of reservations ahead of this one
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+# ---------- CIRCUIT BREAKING ----------
+
+class CircuitBreaker:
+    """
+    :param failure_threshold: consecutive failed requests opening the circuit
+    :param reset_timeout: seconds before a trial request is let through
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def admit(self, trial=None):
+        '''
+        Let a request through: True while closed, a trial token for the single request
+        let through when half open (None if rejected). The request holding ``trial``
+        is let through until it records its outcome, so that it keeps its retries.
+        '''
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if trial is not None and trial is self._trial:
+                return trial
+            if state == "half_open" and self._trial is None:
+                self._trial = object()
+                return self._trial
+            return None
+
+    def release(self, trial):
+        '''Give the trial back without outcome (the request was abandoned).'''
+        with self._lock:
+            if trial is not None and trial is self._trial:
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial = None
+
+
+# ---------- RETRIES ----------
+
+@dataclass
+class RetryPolicy:
+    """
+    Full-jitter exponential backoff: attempt k waits uniform(0, min(max_delay, base_delay * 2**k)),
+    or the server's Retry-After if longer.
+    """
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    statuses: frozenset = field(default_factory=lambda: RETRY_STATUSES)
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return backoff if retry_after is None else max(backoff, retry_after)
+
+
+def classify(error: BaseException, statuses=RETRY_STATUSES):
+    '''
+    (retryable, status, retry_after seconds) of a request error raised by urllib,
+    requests, aiohttp or gql.
+    '''
+    response = getattr(error, "response", None)
+    status = getattr(error, "code", None) or getattr(error, "status", None) \
+        or getattr(response, "status_code", None) or getattr(response, "status", None)
+    status = status if isinstance(status, int) else None
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None)
+
+    if status is not None:
+        return status in statuses, status, _retry_after(headers)
+    return isinstance(error, _transient_errors()), None, None
+
+
+def _transient_errors() -> tuple:
+    errors = (ConnectionError, TimeoutError, OSError, asyncio.TimeoutError)
+    try:
+        from aiohttp import ClientConnectionError, ClientPayloadError
+        errors += (ClientConnectionError, ClientPayloadError)
+    except ImportError:
+        pass
+    return errors
+
+
+def _retry_after(headers) -> float | None:
+    # seconds or an HTTP date
+    value = None if headers is None else headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------- CLIENT ----------
+
+class HttpClient:
+    """
+    :param rates: {host: (requests per second, burst)} overriding HOST_RATES
+    :param retry: retry policy shared by every host
+    :param failure_threshold, reset_timeout: circuit breaker settings, c.f. CircuitBreaker
+    :param metrics: default metrics recording requests, retries and throttling (c.f. utils.metrics)
+    """
+
+    def __init__(self, rates: dict = None, retry: RetryPolicy = None, failure_threshold: int = 5,
+                 reset_timeout: float = 60.0, metrics=None, clock=time.monotonic, sleep=time.sleep):
+        self.rates = {**HOST_RATES, **(rates or {})}
+        self.retry = retry or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+
+    # ---------- PUBLIC API ----------
+
+    def call(self, url: str, fn, metrics=None):
+        '''Run the request ``fn()`` against the host of ``url`` (or a bare host name).'''
+        host = _host(url)
+        metrics = metrics or self.metrics
+        trial = None
+        try:
+            for attempt in range(self.retry.max_attempts):
+                wait, trial = self.__admit(host, metrics, trial)
+                self.sleep(wait)
+                start = time.perf_counter()
+                try:
+                    result = fn()
+                except Exception as error:
+                    wait = self.__failed(host, error, attempt, time.perf_counter() - start, metrics)
+                    self.sleep(wait)
+                else:
+                    self.__succeeded(host, time.perf_counter() - start, metrics)
+                    return result
+        finally:
+            # no-op once the outcome was recorded
+            self.breaker(host).release(trial)
+
+    async def call_async(self, url: str, fn, metrics=None):
+        '''Same as call for a coroutine function ``fn``.'''
+        host = _host(url)
+        metrics = metrics or self.metrics
+        trial = None
+        try:
+            for attempt in range(self.retry.max_attempts):
+                wait, trial = self.__admit(host, metrics, trial)
+                await asyncio.sleep(wait)
+                start = time.perf_counter()
+                try:
+                    result = await fn()
+                except Exception as error:
+                    wait = self.__failed(host, error, attempt, time.perf_counter() - start, metrics)
+                    await asyncio.sleep(wait)
+                else:
+                    self.__succeeded(host, time.perf_counter() - start, metrics)
+                    return result
+        finally:
+            self.breaker(host).release(trial)
+
+    def get_json(self, url: str, timeout: float = 60.0, metrics=None):
+        from urllib.request import urlopen
+
+        def get():
+            with urlopen(url, timeout=timeout) as page:
+                return page.read()
+
+        return json.loads(self.call(url, get, metrics=metrics).decode("utf-8"))
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            return self._breakers[host]
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.rates.get(host, DEFAULT_RATE)
+                self._buckets[host] = TokenBucket(rate, burst, self.clock)
+            return self._buckets[host]
+
+
+    # ---------- INTERNALS ----------
+
+    def __admit(self, host, metrics, trial):
+        '''(seconds to wait, trial token held) before sending a request, c.f. CircuitBreaker.admit.'''
+        # circuit breaker first: an open circuit does not consume tokens
+        admitted = self.breaker(host).admit(trial)
+        if admitted is None:
+            _count(metrics, "http_circuit_open", host=host)
+            raise CircuitOpenError(f"Circuit open for {host}, not sending the request")
+        wait = self.bucket(host).reserve()
+        if wait > 0:
+            _count(metrics, "http_throttled_seconds", wait, host=host)
+        return wait, (None if admitted is True else admitted)
+
+    def __succeeded(self, host, seconds, metrics):
+        self.breaker(host).record_success()
+        if metrics is not None:
+            metrics.observe("http_request", seconds, host=host)
+
+    def __failed(self, host, error, attempt, seconds, metrics) -> float:
+        '''Seconds to wait before the next attempt, raises ``error`` if it should not be retried.'''
+        retryable, status, retry_after = classify(error, self.retry.statuses)
+        if metrics is not None:
+            metrics.observe("http_request", seconds, error=str(status or type(error).__name__), host=host)
+
+        if not retryable:
+            # client errors (4xx) are the request's fault: the host did answer
+            self.breaker(host).record_success()
+            raise error
+        if attempt + 1 >= self.retry.max_attempts:
+            # the breaker counts requests that exhausted their retries, not attempts
+            self.breaker(host).record_failure()
+            raise error
+
+        wait = self.retry.delay(attempt, retry_after)
+        _count(metrics, "http_retries", host=host)
+        logger.warning("Request to %s failed (%s), retry %d in %.1fs",
+                       host, status or type(error).__name__, attempt + 1, wait)
+        return wait
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    '''Client shared by the archives and the TLE fetcher (one rate limit per host per process).'''
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpClient()
+        return _default
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+def _count(metrics, name, value=1, **labels):
+    if metrics is not None:
+        metrics.count(name, value, **labels)
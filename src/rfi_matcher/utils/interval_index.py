@@ -0,0 +1,84 @@
+"""
+Static index of time intervals answering overlap queries with two binary searches.
+
+Intervals are sorted by start and the longest duration is kept: an interval
+overlapping [begin, end] must start in [begin - longest, end], so a query only
+scans that slice of the starts and filters it on the ends. This is exact and
+fast when durations are bounded (satellite passes, observation tracks, ...).
+"""
+from pathlib import Path
+
+import numpy as np
+
+
+class IntervalIndex:
+    """
+    :param starts, ends: interval bounds (datetime64 or numbers), closed intervals
+    :param values: one value per interval (e.g. NORAD ids), the interval position if None
+    """
+
+    def __init__(self, starts, ends, values=None):
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        if starts.shape != ends.shape:
+            raise ValueError("starts and ends must have the same shape.")
+        values = np.arange(len(starts)) if values is None else np.asarray(values)
+
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.values = values[order]
+        durations = self.ends - self.starts
+        self.longest = durations.max() if len(durations) else durations.dtype.type(0)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def concat(cls, indexes) -> "IntervalIndex":
+        indexes = list(indexes)
+        return cls(
+            np.concatenate([i.starts for i in indexes]),
+            np.concatenate([i.ends for i in indexes]),
+            np.concatenate([i.values for i in indexes]),
+        )
+
+
+    # ---------- QUERIES ----------
+
+    def overlapping(self, begin, end) -> np.ndarray:
+        '''Positions (in start order) of the intervals overlapping [begin, end].'''
+        begin, end = self.__bounds(begin, end)
+        lo = np.searchsorted(self.starts, begin - self.longest, side="left")
+        hi = np.searchsorted(self.starts, end, side="right")
+        return lo + np.flatnonzero(self.ends[lo:hi] >= begin)
+
+    def query(self, begin, end):
+        '''(values, starts, ends) of the intervals overlapping [begin, end].'''
+        rows = self.overlapping(begin, end)
+        return self.values[rows], self.starts[rows], self.ends[rows]
+
+    def containing(self, t) -> np.ndarray:
+        '''Positions of the intervals containing the instant t.'''
+        return self.overlapping(t, t)
+
+
+    # ---------- STORAGE ----------
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, starts=self.starts, ends=self.ends, values=self.values)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path) -> "IntervalIndex":
+        with np.load(Path(path), allow_pickle=False) as data:
+            return cls(data["starts"], data["ends"], data["values"])
+
+
+    def __bounds(self, begin, end):
+        if np.issubdtype(self.starts.dtype, np.datetime64):
+            return np.datetime64(begin, "ns"), np.datetime64(end, "ns")
+        return begin, end
@@ -0,0 +1,225 @@
+"""
+Lightweight run metrics for RfiMatcher: per-stage wall time, counters (rows
+processed, satellites screened, ...), gauges (cache hits, ...) and latency
+summaries (archive requests, ...).
+
+A Metrics object can be read programmatically (``snapshot()``), written as a
+Prometheus text-format file (``write_prometheus()``) and emits one structured
+JSON log record per finished stage / request on the ``rfi_matcher.metrics``
+logger (silent unless the application configures logging), e.g.
+
+    logging.basicConfig(level=logging.INFO)
+    matcher = RfiMatcher(metrics=Metrics())
+    ...
+    matcher.metrics.write_prometheus("rfi_matcher.prom")
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+logger = logging.getLogger("rfi_matcher.metrics")
+
+
+class Summary:
+    """Count / sum / min / max of observed durations (seconds)."""
+
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of stage timers, counters, gauges and latency summaries.
+    Every metric is identified by a name and optional labels (e.g. ``archive="MEERKAT"``).
+    """
+
+    def __init__(self, prefix: str = "rfi_matcher", profiler=None):
+        self.prefix = prefix
+        # optional utils.profiling.Profiler wrapping every stage
+        self.profiler = profiler
+        self.stages = {}
+        self.latencies = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+
+    # ---------- RECORDING ----------
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        '''Time a pipeline stage: ``with metrics.stage("rfi_sources"): ...``'''
+        profile = nullcontext() if self.profiler is None else self.profiler.profile(name, **labels)
+        start = time.perf_counter()
+        error = None
+        try:
+            with profile:
+                yield self
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._add(self.stages, name, labels, elapsed)
+            self._log("stage", name, labels, seconds=elapsed, error=error)
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        '''Time a single request / call into the ``name`` latency summary.'''
+        start = time.perf_counter()
+        error = None
+        try:
+            yield self
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error=error, **labels)
+
+    def observe(self, name: str, seconds: float, error: str = None, **labels):
+        self._add(self.latencies, name, labels, seconds)
+        if error is not None:
+            self.count(f"{name}_errors", **labels)
+        self._log("latency", name, labels, seconds=seconds, error=error)
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels_key(labels))] = value
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.latencies.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+
+    # ---------- READING ----------
+
+    def get(self, name: str, **labels):
+        '''Current value of a counter / gauge, or the summary dict of a stage / latency.'''
+        key = (name, _labels_key(labels))
+        if key in self.counters:
+            return self.counters[key]
+        if key in self.gauges:
+            return self.gauges[key]
+        for table in (self.stages, self.latencies):
+            if key in table:
+                return table[key].to_dict()
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": [_entry(k, v.to_dict()) for k, v in self.stages.items()],
+                "latencies": [_entry(k, v.to_dict()) for k, v in self.latencies.items()],
+                "counters": [_entry(k, v) for k, v in self.counters.items()],
+                "gauges": [_entry(k, v) for k, v in self.gauges.items()],
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        '''Prometheus text exposition format (stages and latencies as summaries).'''
+        lines = []
+        with self._lock:
+            for table, suffix, help_text in (
+                (self.stages, "stage_seconds", "Wall time per pipeline stage"),
+                (self.latencies, "seconds", "Request latency"),
+            ):
+                for metric, entries in _by_name(table).items():
+                    metric = f"{self.prefix}_{metric}_{suffix}"
+                    lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+                    for labels, summary in entries:
+                        lines.append(f"{metric}_count{_format_labels(labels)} {summary.count}")
+                        lines.append(f"{metric}_sum{_format_labels(labels)} {summary.total!r}")
+
+            for table, kind in ((self.counters, "counter"), (self.gauges, "gauge")):
+                for metric, entries in _by_name(table).items():
+                    metric = f"{self.prefix}_{metric}" + ("_total" if kind == "counter" else "")
+                    lines.append(f"# TYPE {metric} {kind}")
+                    for labels, value in entries:
+                        lines.append(f"{metric}{_format_labels(labels)} {float(value)!r}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        '''Atomically write the Prometheus text file (e.g. for node_exporter's textfile collector).'''
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+    # ---------- INTERNALS ----------
+
+    def _add(self, table, name, labels, seconds):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            if key not in table:
+                table[key] = Summary()
+            table[key].add(seconds)
+
+    def _log(self, kind, name, labels, **fields):
+        if logger.isEnabledFor(logging.INFO):
+            event = {"event": kind, "name": name, **labels, **{k: v for k, v in fields.items() if v is not None}}
+            logger.info(json.dumps(event, default=str))
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _entry(key, value) -> dict:
+    name, labels = key
+    entry = value if isinstance(value, dict) else {"value": value}
+    return {"name": name, "labels": dict(labels), **entry}
+
+
+def _by_name(table: dict) -> dict:
+    grouped = {}
+    for (name, labels), value in table.items():
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
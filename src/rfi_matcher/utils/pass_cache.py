@@ -0,0 +1,204 @@
+"""
+Per-observatory, per-day cache of satellite passes above the horizon.
+
+Horizon passes only depend on the site, the day and the TLE catalogue, so
+they are predicted once (rise / culmination / set events from skyfield's
+``find_events``) and every observation of the session is answered with an
+interval-overlap query (c.f. utils.interval_index). Days are stored as
+``<root>/<observatory>/<YYYY-MM-DD>/<tle hash>_<min altitude>.npz``.
+
+Passes are cut at midnight UTC: a pass crossing midnight is stored as two
+pieces (one per day) that ``window`` joins again.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from .ephemeris import compute_ephemeris, load_tle_lines
+from .ephemeris_cache import EphemerisCache
+from .interval_index import IntervalIndex
+
+
+PASS_FIELDS = ("norad", "rise", "culmination", "set")
+
+
+@dataclass
+class Passes:
+    """
+    Passes of one day sorted by rise time (datetime64[ns] UTC). Rise / set are the day
+    bounds for passes in progress at midnight; culmination is NaT if the highest
+    point of the pass is not within the day.
+    """
+    norad: np.ndarray
+    rise: np.ndarray
+    culmination: np.ndarray
+    set: np.ndarray
+
+    def __len__(self):
+        return len(self.norad)
+
+    @cached_property
+    def index(self) -> IntervalIndex:
+        return IntervalIndex(self.rise, self.set)
+
+
+class PassCache:
+    """
+    :param root: cache directory (None to keep the passes in memory only)
+    :param min_altitude: horizon in degrees (Sopp's min_altitude)
+    """
+
+    def __init__(self, root="data/pass_cache", min_altitude: float = 5.0):
+        self.root = None if root is None else Path(root)
+        self.min_altitude = min_altitude
+        self.hits = 0
+        self.misses = 0
+        self._days = {}
+        self._catalogues = {}
+
+
+    # ---------- PUBLIC API ----------
+
+    def catalogue(self, tle_file_path):
+        """TLE lines and their hash, memoized per file (and modification time)."""
+        tle_file_path = Path(tle_file_path)
+        key = (str(tle_file_path.resolve()), tle_file_path.stat().st_mtime_ns)
+        if key not in self._catalogues:
+            _, line1, line2 = load_tle_lines(tle_file_path)
+            self._catalogues[key] = (line1, line2, EphemerisCache.tle_hash(line1, line2))
+        return self._catalogues[key]
+
+    def passes(self, observatory: str, day: date, line1, line2, latitude, longitude, elevation, tle_hash) -> Passes:
+        """Passes of one day, loaded or predicted (and stored) on first use."""
+        key = (observatory, day, tle_hash)
+        if key in self._days:
+            self.hits += 1
+            return self._days[key]
+
+        path = self._path(observatory, day, tle_hash)
+        if path is not None and path.exists():
+            self.hits += 1
+            with np.load(path, allow_pickle=False) as data:
+                passes = Passes(**{f: data[f] for f in PASS_FIELDS})
+        else:
+            self.misses += 1
+            passes = predict_passes(line1, line2, day, latitude, longitude, elevation, self.min_altitude)
+            if path is not None:
+                _save(path, passes)
+
+        self._days[key] = passes
+        return passes
+
+    def window(self, observatory: str, begin: datetime, end: datetime,
+               line1, line2, latitude, longitude, elevation, tle_hash):
+        """
+        Passes overlapping [begin, end] (naive UTC datetimes), clipped to it:
+        (norad, begin, end) arrays, one entry per pass.
+        """
+        begin64, end64 = np.datetime64(begin, "ns"), np.datetime64(end, "ns")
+        parts = []
+        day = begin.date()
+        while day <= end.date():
+            passes = self.passes(observatory, day, line1, line2, latitude, longitude, elevation, tle_hash)
+            rows = passes.index.overlapping(begin64, end64)
+            parts.append((passes.norad[rows], passes.rise[rows], passes.set[rows]))
+            day += timedelta(days=1)
+
+        norad, rise, set_ = (np.concatenate(p) for p in zip(*parts))
+        norad, rise, set_ = _join_midnight(norad, rise, set_)
+        return norad, np.maximum(rise, begin64), np.minimum(set_, end64)
+
+
+    # ---------- INTERNALS ----------
+
+    def _path(self, observatory, day, tle_hash):
+        if self.root is None:
+            return None
+        return self.root / observatory / day.isoformat() / f"{tle_hash}_{self.min_altitude:g}.npz"
+
+
+def predict_passes(line1, line2, day: date, latitude, longitude, elevation=0.0, min_altitude=5.0) -> Passes:
+    """Rise / culmination / set of every satellite of the catalogue above min_altitude during a UTC day."""
+    from skyfield.api import EarthSatellite, load, wgs84
+
+    line1 = [l.decode() if isinstance(l, bytes) else l for l in line1]
+    line2 = [l.decode() if isinstance(l, bytes) else l for l in line2]
+
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    stop = start + timedelta(days=1)
+    start64 = np.datetime64(start.replace(tzinfo=None), "ns")
+    stop64 = np.datetime64(stop.replace(tzinfo=None), "ns")
+
+    ts = load.timescale()
+    t0, t1 = ts.from_datetime(start), ts.from_datetime(stop)
+    site = wgs84.latlon(latitude, longitude, elevation_m=elevation)
+    # satellites already up at midnight have no rise event (needed when no event at all)
+    up_at_start = compute_ephemeris(line1, line2, np.array([start64]), latitude, longitude, elevation).alt[:, 0] >= min_altitude
+
+    out = {f: [] for f in PASS_FIELDS}
+    for l1, l2, up in zip(line1, line2, up_at_start):
+        sat = EarthSatellite(l1, l2, ts=ts)
+        norad = sat.model.satnum
+        t, events = sat.find_events(site, t0, t1, altitude_degrees=min_altitude)
+        times = _to_datetime64(t)
+        altitudes = (sat - site).at(t).altaz()[0].degrees if len(events) else []
+
+        if len(events):
+            # a set or culmination before any rise: the pass started before midnight
+            up = events[0] != 0
+        rise = start64 if up else None
+        culmination, highest = np.datetime64("NaT", "ns"), -90.0
+        for time, event, altitude in zip(times, events, altitudes):
+            if event == 0:
+                rise, culmination, highest = time, np.datetime64("NaT", "ns"), -90.0
+            elif event == 1 and rise is not None and altitude > highest:
+                culmination, highest = time, altitude
+            elif event == 2 and rise is not None:
+                _append(out, norad, rise, culmination, time)
+                rise = None
+        if rise is not None:
+            _append(out, norad, rise, culmination, stop64)
+
+    order = np.argsort(np.array(out["rise"], dtype="datetime64[ns]"), kind="stable")
+    return Passes(
+        norad=np.array(out["norad"], dtype=np.int64)[order],
+        rise=np.array(out["rise"], dtype="datetime64[ns]")[order],
+        culmination=np.array(out["culmination"], dtype="datetime64[ns]")[order],
+        set=np.array(out["set"], dtype="datetime64[ns]")[order],
+    )
+
+
+def _append(out, norad, rise, culmination, set_):
+    out["norad"].append(norad)
+    out["rise"].append(rise)
+    out["culmination"].append(culmination)
+    out["set"].append(set_)
+
+
+def _join_midnight(norad, rise, set_):
+    # merge the pieces of a pass cut at midnight (same satellite, set == next rise)
+    if len(norad) < 2:
+        return norad, rise, set_
+    order = np.lexsort((rise, norad))
+    norad, rise, set_ = norad[order], rise[order], set_[order]
+    continued = np.zeros(len(norad), dtype=bool)
+    continued[1:] = (norad[1:] == norad[:-1]) & (rise[1:] == set_[:-1])
+    first = np.flatnonzero(~continued)
+    last = np.append(first[1:], len(norad)) - 1
+    return norad[first], rise[first], set_[last]
+
+
+def _to_datetime64(times) -> np.ndarray:
+    if len(times) == 0:
+        return np.array([], dtype="datetime64[ns]")
+    return np.array([t.replace(tzinfo=None) for t in times.utc_datetime()], dtype="datetime64[ns]")
+
+
+def _save(path: Path, passes: Passes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp, **{f: getattr(passes, f) for f in PASS_FIELDS})
+    tmp.replace(path)
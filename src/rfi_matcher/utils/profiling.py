@@ -0,0 +1,335 @@
+"""
+Opt-in, per-stage profiling of RfiMatcher runs.
+
+A Profiler is attached to the run's Metrics (``RfiMatcher(profiler=...)``) and
+wraps every selected ``metrics.stage(...)`` with:
+
+- ``mode="cprofile"``: a deterministic cProfile capture, written as ``<stage>.prof``
+  (pstats format, e.g. for snakeviz) and as collapsed stacks
+- ``mode="sampling"``: a low-overhead sampling profiler (a background thread samples
+  the stage's thread stack every ``interval`` seconds), written as collapsed stacks
+- ``memory=True``: tracemalloc peak / top allocation sites and the process peak RSS
+
+Stages can overlap in different threads (archive fetches, scheduler workers):
+tracemalloc is shared by the overlapping stages (their figures include each
+other's allocations) and stopped when the last one ends, and cProfile captures
+one stage at a time (the stages overlapping it are not captured, c.f.
+``cprofile_skipped``).
+
+Collapsed stacks (``<stage>.collapsed``, one ``frame;frame;frame count`` line per
+stack) are read by flamegraph.pl, speedscope or inferno.
+
+Profiling can also be switched on without modifying code through the
+``RFI_MATCHER_PROFILE`` environment variable (c.f. ``Profiler.from_env``), e.g.
+
+    RFI_MATCHER_PROFILE="sampling:get_rfi_sources,get_all_sat_proximities" python get_rfi.py
+"""
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling", None)
+
+# process-wide: tracemalloc users (started by the first one if not already tracing),
+# and the single cProfile capture allowed at a time
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+_cprofile_lock = threading.Lock()
+
+
+class Profiler:
+    """
+    :param output_dir: directory receiving one file set per profiled stage run
+    :param mode: "cprofile", "sampling" or None (memory only)
+    :param stages: names of the stages to profile (all stages if None)
+    :param interval: sampling period in seconds (mode="sampling")
+    :param memory: track tracemalloc peak / top allocations and peak RSS per stage
+    :param top: number of allocation sites kept per tracemalloc snapshot
+    """
+
+    def __init__(self, output_dir="profiles", mode="sampling", stages=None,
+                 interval: float = 0.005, memory: bool = True, top: int = 25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Profiling mode must be one of {PROFILE_MODES}.")
+
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.stages = None if stages is None else set(stages)
+        self.interval = interval
+        self.memory = memory
+        self.top = top
+        self.results = []
+        self._runs = Counter()
+        self._lock = threading.Lock()
+        self._active = threading.local()
+
+    @classmethod
+    def from_env(cls, variable: str = "RFI_MATCHER_PROFILE", **kwargs):
+        '''
+        Profiler configured by an environment variable of the form ``mode[:stage,stage]``
+        (mode = cprofile, sampling or memory), None if the variable is not set.
+        The output directory can be set with ``RFI_MATCHER_PROFILE_DIR``.
+        '''
+        value = os.environ.get(variable, "").strip()
+        if not value:
+            return None
+
+        mode, _, stages = value.partition(":")
+        mode = None if mode == "memory" else mode
+        stages = [s.strip() for s in stages.split(",") if s.strip()] or None
+        kwargs.setdefault("output_dir", os.environ.get(f"{variable}_DIR", "profiles"))
+        return cls(mode=mode, stages=stages, **kwargs)
+
+    def wants(self, stage: str) -> bool:
+        return self.stages is None or stage in self.stages
+
+
+    # ---------- CAPTURE ----------
+
+    @contextmanager
+    def profile(self, stage: str, **labels):
+        '''
+        Profile one run of a stage. Stages nested in a stage that is already being
+        profiled on the same thread are part of the outer capture and are skipped.
+        '''
+        if not self.wants(stage) or getattr(self._active, "stage", None) is not None:
+            yield None
+            return
+
+        self._active.stage = stage
+        try:
+            with self.__capture(stage, labels) as result:
+                yield result
+        finally:
+            self._active.stage = None
+
+    @contextmanager
+    def __capture(self, stage, labels):
+        with self._lock:
+            self._runs[stage] += 1
+            run = self._runs[stage]
+        name = _file_name(stage, labels, run)
+
+        result = {"stage": stage, "labels": labels, "run": run}
+        profile = sampler = None
+
+        if self.memory:
+            overlapping = _start_tracemalloc()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            rss_before = peak_rss_bytes()
+            result["tracemalloc_overlapping"] = overlapping
+
+        if self.mode == "cprofile":
+            if _cprofile_lock.acquire(blocking=False):
+                profile = cProfile.Profile()
+                profile.enable()
+            else:
+                result["cprofile_skipped"] = "another stage is being profiled"
+        elif self.mode == "sampling":
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result["seconds"] = time.perf_counter() - start
+
+            if profile is not None:
+                profile.disable()
+                _cprofile_lock.release()
+                result.update(self.__write_cprofile(profile, name))
+            if sampler is not None:
+                sampler.stop()
+                result.update(self.__write_samples(sampler.stacks, name))
+
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                _stop_tracemalloc()
+                result["tracemalloc_peak_bytes"] = max(peak - traced_before, 0)
+                result["tracemalloc_net_bytes"] = current - traced_before
+                result["peak_rss_bytes"] = peak_rss_bytes()
+                result["peak_rss_growth_bytes"] = result["peak_rss_bytes"] - rss_before
+                result.update(self.__write_allocations(snapshot, name))
+
+            with self._lock:
+                self.results.append(result)
+            self.__write_summary()
+            logger.info("profiled %s: %s", name, result)
+
+
+    # ---------- OUTPUT ----------
+
+    def __write_cprofile(self, profile, name) -> dict:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prof_path = self.output_dir / f"{name}.prof"
+        profile.dump_stats(prof_path)
+
+        collapsed_path = self.output_dir / f"{name}.collapsed"
+        write_collapsed(collapsed_from_pstats(pstats.Stats(profile)), collapsed_path)
+        return {"cprofile": str(prof_path), "collapsed": str(collapsed_path)}
+
+    def __write_samples(self, stacks: Counter, name) -> dict:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        collapsed_path = self.output_dir / f"{name}.collapsed"
+        write_collapsed(stacks, collapsed_path)
+        return {"samples": sum(stacks.values()), "collapsed": str(collapsed_path)}
+
+    def __write_allocations(self, snapshot, name) -> dict:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{name}.tracemalloc.txt"
+        snapshot = snapshot.filter_traces([
+            # leave out the profilers' own allocations
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        with open(path, "w") as f:
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                f.write(f"{stat}\n")
+        return {"allocations": str(path)}
+
+    def __write_summary(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / "summary.json"
+        tmp = path.with_name(path.name + ".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(self.results, indent=2, default=str))
+        os.replace(tmp, path)
+
+
+class StackSampler:
+    """Background thread sampling the stack of one thread into collapsed stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rfi-matcher-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code.co_filename, frame.f_code.co_name, frame.f_code.co_firstlineno))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def collapsed_from_pstats(stats: pstats.Stats, max_paths: int = 200) -> Counter:
+    '''
+    Approximate collapsed stacks from cProfile data: cProfile only records
+    caller -> callee edges, so each function's own time is attributed to its call
+    paths in proportion to the calls along each edge (in microseconds). Recursive
+    edges are cut.
+    '''
+    raw = stats.stats
+    memo = {}
+
+    def paths(func, visiting):
+        # call paths (root first) leading to func, with the share of func's calls they carry
+        if func in memo:
+            return memo[func]
+        parents = {c: edge for c, edge in raw[func][4].items() if c in raw and c not in visiting}
+        if not parents:
+            result = [((func,), 1.0)]
+        else:
+            total_calls = sum(edge[1] for edge in parents.values()) or 1
+            result = [
+                (path + (func,), share * edge[1] / total_calls)
+                for caller, edge in parents.items()
+                for path, share in paths(caller, visiting | {func})
+            ]
+            # keep the heaviest paths only, the number of paths can grow exponentially
+            result = sorted(result, key=lambda p: -p[1])[:max_paths]
+        memo[func] = result
+        return result
+
+    stacks = Counter()
+    for func, entry in raw.items():
+        seconds = entry[2]
+        if seconds <= 0:
+            continue
+        for path, share in paths(func, frozenset()):
+            micros = int(round(seconds * share * 1e6))
+            if micros:
+                stacks[";".join(_frame_label(f[0], f[2], f[1]) for f in path)] += micros
+
+    return stacks
+
+
+def _start_tracemalloc() -> bool:
+    '''Register a tracemalloc user, returns whether other stages are already tracing.'''
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users += 1
+        if _tracemalloc_users > 1:
+            # resetting the peak would reset the other stages' as well
+            return True
+        _tracemalloc_started = not tracemalloc.is_tracing()
+        if _tracemalloc_started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return False
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+def write_collapsed(stacks: Counter, path):
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def peak_rss_bytes() -> int:
+    '''Peak resident set size of the process so far (0 where unavailable).'''
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _frame_label(filename, function, line) -> str:
+    module = Path(filename).stem if filename and not filename.startswith("<") else filename
+    return f"{function} ({module}:{line})".replace(";", ":")
+
+
+def _file_name(stage, labels, run) -> str:
+    parts = [stage] + [f"{k}-{v}" for k, v in sorted(labels.items())] + [str(run)]
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", ".".join(parts))
@@ -0,0 +1,192 @@
+"""
+Resource-aware scheduling of Sopp screening jobs.
+
+Sopp parallelizes one screening over satellites with a process pool
+(``concurrency_level``), while RfiMatcher can screen several tracks at once.
+The Scheduler picks both together so that outer workers x inner processes never
+exceed the cores available to the run:
+
+- long tracks (enough satellite-steps to amortize a process pool) are screened
+  one at a time with as many inner processes as they can use
+- short tracks are screened with a single inner process each, spread in batches
+  of similar total cost over ``cores`` outer worker threads
+
+The number of processes is also capped by a memory budget (each Sopp process holds
+the satellite catalogue and the positions of one satellite over the track).
+
+When RfiMatcher itself runs inside a pool, give each instance its share of the
+node, e.g. ``Scheduler(cores=os.cpu_count() // pool_size)`` or set the
+``RFI_MATCHER_CORES`` environment variable.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Task:
+    key: object
+    seconds: float
+    # Sopp concurrency_level for this task
+    concurrency: int = 1
+    cost: float = 0.0
+
+
+@dataclass
+class Plan:
+    # long tasks, run one after another with inner parallelism
+    exclusive: list = field(default_factory=list)
+    # short tasks (concurrency 1), one list per batch
+    batches: list = field(default_factory=list)
+    outer_workers: int = 1
+
+    @property
+    def tasks(self) -> list:
+        return self.exclusive + [task for batch in self.batches for task in batch]
+
+
+class Scheduler:
+    """
+    :param cores: cores available to the run (default: RFI_MATCHER_CORES or the CPU affinity)
+    :param memory_budget: bytes available to the Sopp processes (default: half the available memory)
+    :param time_resolution: Sopp time_continuity_resolution in seconds
+    :param min_steps_per_process: satellite-steps below which an extra process is not worth starting
+    :param process_bytes: fixed memory of one Sopp worker process
+    :param satellite_bytes: memory of one satellite (TLE, frequency, skyfield objects) in each process
+    :param position_bytes: memory of one satellite position
+    :param batches_per_worker: short tracks are split into this many batches per outer worker
+    """
+
+    def __init__(self, cores: int = None, memory_budget: int = None, time_resolution: float = 1,
+                 min_steps_per_process: float = 500_000, process_bytes: int = 100 * 2**20,
+                 satellite_bytes: int = 8 * 2**10, position_bytes: int = 400, batches_per_worker: int = 4):
+        self.cores = max(1, int(cores if cores is not None else available_cores()))
+        self.memory_budget = memory_budget if memory_budget is not None else _default_memory_budget()
+        self.time_resolution = time_resolution
+        self.min_steps_per_process = min_steps_per_process
+        self.process_bytes = process_bytes
+        self.satellite_bytes = satellite_bytes
+        self.position_bytes = position_bytes
+        self.batches_per_worker = batches_per_worker
+
+
+    # ---------- SIZING ----------
+
+    def steps(self, seconds: float, n_satellites: int) -> float:
+        '''Satellite positions Sopp computes for one track.'''
+        return n_satellites * max(seconds, 0) / self.time_resolution
+
+    def memory_per_process(self, seconds: float, n_satellites: int) -> int:
+        return int(self.process_bytes + n_satellites * self.satellite_bytes
+                   + max(seconds, 0) / self.time_resolution * self.position_bytes)
+
+    def max_processes(self, seconds: float = 0, n_satellites: int = 0) -> int:
+        '''Processes that fit on the cores and in the memory budget.'''
+        if self.memory_budget is None:
+            return self.cores
+        fit = self.memory_budget // self.memory_per_process(seconds, n_satellites)
+        return int(max(1, min(self.cores, fit)))
+
+    def inner_concurrency(self, seconds: float, n_satellites: int) -> int:
+        '''Sopp concurrency_level for a track screened on its own.'''
+        wanted = int(self.steps(seconds, n_satellites) // self.min_steps_per_process)
+        return max(1, min(wanted, n_satellites, self.max_processes(seconds, n_satellites)))
+
+
+    # ---------- PLANNING ----------
+
+    def plan(self, durations: dict, n_satellites: int) -> Plan:
+        '''
+        durations = {key: track duration in seconds} of the tracks to screen
+        '''
+        plan = Plan()
+        short = []
+        for key, seconds in durations.items():
+            task = Task(key, seconds, self.inner_concurrency(seconds, n_satellites), self.steps(seconds, n_satellites))
+            (plan.exclusive if task.concurrency > 1 else short).append(task)
+
+        if not short:
+            return plan
+
+        # as many workers as fit, but not more than the total work justifies
+        longest = max(task.seconds for task in short)
+        worth = int(sum(task.cost for task in short) // self.min_steps_per_process)
+        plan.outer_workers = max(1, min(len(short), worth, self.max_processes(longest, n_satellites)))
+        if plan.outer_workers == 1:
+            # keep the input order (and checkpoint order) when nothing runs concurrently
+            plan.batches = [short]
+        else:
+            plan.batches = _balance(short, plan.outer_workers * self.batches_per_worker)
+        return plan
+
+
+    # ---------- EXECUTION ----------
+
+    def run(self, plan: Plan, fn):
+        '''
+        Call ``fn(key, concurrency)`` for every task of the plan, yielding (key, result)
+        pairs (a whole batch at a time for concurrent batches). The first exception
+        raised by a task is re-raised.
+        '''
+        for task in plan.exclusive:
+            yield task.key, fn(task.key, task.concurrency)
+
+        if plan.outer_workers <= 1:
+            for batch in plan.batches:
+                for task in batch:
+                    yield task.key, fn(task.key, task.concurrency)
+            return
+
+        def run_batch(batch):
+            return [(task.key, fn(task.key, task.concurrency)) for task in batch]
+
+        with ThreadPoolExecutor(max_workers=plan.outer_workers, thread_name_prefix="rfi-matcher") as pool:
+            futures = [pool.submit(run_batch, batch) for batch in plan.batches]
+            try:
+                for future in futures:
+                    yield from future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+def available_cores() -> int:
+    value = os.environ.get("RFI_MATCHER_CORES", "").strip()
+    if value:
+        return int(value)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def available_memory() -> int:
+    '''Memory available to new processes in bytes, None where unknown.'''
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _default_memory_budget():
+    memory = available_memory()
+    return None if memory is None else memory // 2
+
+
+def _balance(tasks: list, n_batches: int) -> list:
+    # longest processing time first: each task goes to the currently cheapest batch
+    n_batches = max(1, min(n_batches, len(tasks)))
+    batches = [[] for _ in range(n_batches)]
+    costs = [0.0] * n_batches
+    for task in sorted(tasks, key=lambda t: -t.cost):
+        i = costs.index(min(costs))
+        batches[i].append(task)
+        costs[i] += task.cost
+    return batches
@@ -0,0 +1,124 @@
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArrays:
+    """
+    A named collection of numpy arrays living in ``multiprocessing.shared_memory``
+    blocks.
+
+    The parent process calls ``SharedArrays.publish(arrays)`` once and hands the
+    picklable ``spec`` to its workers, which call ``SharedArrays.attach(spec)``
+    to get read-only views on the same physical memory (no copy, no reload).
+
+    Only the publisher owns the blocks: call ``unlink()`` (or use it as a context
+    manager) once every worker is done.
+    """
+
+    def __init__(self, blocks: dict, arrays: dict, owner: bool):
+        self._blocks = blocks
+        self._arrays = arrays
+        self._owner = owner
+
+    @classmethod
+    def publish(cls, arrays: dict) -> "SharedArrays":
+        blocks, views = {}, {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                with _TRACKER_LOCK:
+                    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks[name] = shm
+
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+                view[...] = array
+                view.flags.writeable = False
+                views[name] = view
+        except Exception:
+            for shm in blocks.values():
+                shm.close()
+                shm.unlink()
+            raise
+
+        return cls(blocks, views, owner=True)
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedArrays":
+        blocks, views = {}, {}
+        for name, (shm_name, shape, dtype) in spec.items():
+            shm = _attach_block(shm_name)
+            blocks[name] = shm
+
+            view = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf)
+            view.flags.writeable = False
+            views[name] = view
+
+        return cls(blocks, views, owner=False)
+
+    @property
+    def spec(self) -> dict:
+        """Picklable description of the blocks, to be passed to workers."""
+        return {
+            name: (self._blocks[name].name, view.shape, view.dtype.str)
+            for name, view in self._arrays.items()
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(view.nbytes for view in self._arrays.values())
+
+    def keys(self):
+        return self._arrays.keys()
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self._arrays[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._arrays
+
+    def close(self):
+        # Views must be released before the underlying buffers can be closed
+        self._arrays = {}
+        for shm in self._blocks.values():
+            shm.close()
+
+    def unlink(self):
+        self.close()
+        if self._owner:
+            for shm in self._blocks.values():
+                shm.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+# Serializes the resource_tracker.register swap of _attach_block (a module global) with
+# the other threads attaching or publishing, e.g. while archive fetches run in threads.
+_TRACKER_LOCK = threading.Lock()
+
+
+def _attach_block(shm_name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+
+    # Before 3.13 attaching registers the block with the resource tracker, which
+    # would unlink it as soon as an attaching (non-owner) process exits.
+    from multiprocessing import resource_tracker
+
+    with _TRACKER_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=shm_name)
+        finally:
+            resource_tracker.register = register
@@ -1,5 +1,5 @@
 import numpy as np
-from skyfield.api import load
+import pytz
 
 from . import time_utils
 from sopp.custom_dataclasses.satellite.satellite import Satellite
@@ -10,16 +10,8 @@ def linspace_sky_times(start_iso: str, end_iso: str, npoints=10):
     Convert ISO start/end time into n Skyfield Time objects,
     evenly spaced between the interval.
     """
-    ts = load.timescale()
-
-    dt_start = time_utils.iso_to_datetime(start_iso)
-    dt_end   = time_utils.iso_to_datetime(end_iso)
-
-    # Generate list of evenly spaced datetimes
-    times = [dt_start + i * (dt_end - dt_start) / (npoints - 1) for i in range(npoints)]
-    sky_times = ts.from_datetimes(times)
-
-    return sky_times
+    times = time_utils.linspace(time_utils.parse_times(start_iso), time_utils.parse_times(end_iso), npoints)
+    return time_utils.to_skyfield(times)
  
 
 def ra_str_to_deg(ra_str):
@@ -120,4 +112,29 @@ def sat_proximity(sat: Satellite, obs_start, obs_end, target_ra, target_dec, npo
         idx, ra, dec, ang_dist = closest_radec(right_ascensions.degrees, declinations.degrees, target_ra, target_dec)
         timestamp = sat_timestamps[idx].utc_datetime()
 
+        return timestamp, ra, dec, ang_dist
+
+
+def sat_proximity_from_grid(grid, row, obs_start, obs_end, target_ra, target_dec, npoints=1000):
+        """
+        Same as sat_proximity(), but reads the satellite positions from a precomputed
+        ephemeris grid (c.f. ephemeris_cache.EphemerisCache) instead of propagating.
+        Positions are linearly interpolated on the unit sphere between grid samples.
+        """
+        start = time_utils.parse_times(obs_start)
+        times = time_utils.linspace(start, time_utils.parse_times(obs_end), npoints)
+
+        grid_s = (grid.times - start) / np.timedelta64(1, "s")
+        times_s = (times - start) / np.timedelta64(1, "s")
+
+        sat_vec = radec_to_vector(np.asarray(grid.ra[row], dtype=float), np.asarray(grid.dec[row], dtype=float))
+        interp = np.stack([np.interp(times_s, grid_s, sat_vec[:, k]) for k in range(3)], axis=1)
+        interp /= np.linalg.norm(interp, axis=1, keepdims=True)
+
+        ras = np.degrees(np.arctan2(interp[:, 1], interp[:, 0])) % 360
+        decs = np.degrees(np.arcsin(np.clip(interp[:, 2], -1, 1)))
+
+        idx, ra, dec, ang_dist = closest_radec(ras, decs, target_ra, target_dec)
+        timestamp = times[idx].astype("datetime64[us]").item().replace(tzinfo=pytz.UTC)
+
         return timestamp, ra, dec, ang_dist
\ No newline at end of file
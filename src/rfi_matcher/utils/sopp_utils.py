@@ -1,23 +1,128 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from sopp.sopp import Sopp
 from sopp.custom_dataclasses.satellite.satellite import Satellite
+from sopp.custom_dataclasses.position import Position
+from sopp.custom_dataclasses.position_time import PositionTime
 from sopp.builder.configuration_builder import ConfigurationBuilder
+from sopp.path_finder.observation_path_finder import ObservationPathFinder
+from sopp.path_finder.observation_path_finder_rhodesmill import ObservationPathFinderRhodesmill
 from sopp.tle_fetcher.tle_fetcher_celestrak import TleFetcherCelestrak
 
 from rfi_matcher.model.archive_dictionary import *
+from rfi_matcher.utils import ephemeris, formats, skyfield_utils, time_utils
+from rfi_matcher.utils.scheduler import Scheduler
+from rfi_matcher.utils.ephemeris_cache import EphemerisCache
+
+
+class ObservationPathFinderOffline(ObservationPathFinder):
+    '''
+    Same antenna path as Sopp's ObservationPathFinderRhodesmill (one alt/az position per
+    minute of the time window), computed without loading the de421 planetary ephemeris:
+    the fixed target is rotated into the facility's horizon frame in a single vectorized
+    call (c.f. ephemeris.radec_to_altaz). Only annual aberration (< 21 arcsec) is ignored.
+    '''
+
+    def calculate_path(self) -> list[PositionTime]:
+        begin = self._time_window.begin
+        end = self._time_window.end
+        n = int((end - begin) // timedelta(minutes=1)) + 1
+        datetimes = [begin + timedelta(minutes=i) for i in range(n)]
+
+        altitudes, azimuths = ephemeris.radec_to_altaz(
+            skyfield_utils.ra_str_to_deg(self._observation_target.right_ascension),
+            skyfield_utils.dec_str_to_deg(self._observation_target.declination),
+            np.array([d.replace(tzinfo=None) for d in datetimes], dtype="datetime64[ns]"),
+            self._facility.coordinates.latitude,
+            self._facility.coordinates.longitude,
+        )
+
+        return [
+            PositionTime(position=Position(altitude=float(alt), azimuth=float(az)), time=d)
+            for d, alt, az in zip(datetimes, altitudes, azimuths)
+        ]
+
 
 def get_rfi_sources(df_obs: pd.DataFrame, 
                     tle_file_path = 'data/satellites.tle', 
                     frequency_file_path = 'data/satellite_frequencies.csv', 
                     beamwidth = 3,
-                    mainbeam=True
+                    mainbeam=True,
+                    satellites: list[Satellite] = None,
+                    ephemeris_cache = None,
+                    path_finder_class = ObservationPathFinderRhodesmill,
+                    metrics = None,
+                    concurrency_level: int = None,
+                    time_continuity_resolution: float = 1,
+                    coarse_step: float = None,
+                    pass_cache = None,
+                    frequency_catalogue = None
                     ) -> list[Satellite]:
     '''
     mainbeam = True (satellites crossing mainbeam)
     mainbeam = False (all satellites above horizon)
+    satellites = already loaded satellites (e.g. from a shared catalogue),
+                 in which case the TLE and frequency files are not read
+    ephemeris_cache = EphemerisCache prefiltering the satellites on cached positions (the
+                      beam inflated by their motion over half the cache's step, c.f.
+                      ephemeris.grid_candidates), Sopp then screens the candidates only
+    path_finder_class = Sopp path finder computing the antenna pointing, e.g.
+                        ObservationPathFinderOffline to run without the de421 ephemeris
+    metrics = Metrics counting the satellites screened
+    concurrency_level = Sopp processes, chosen by a utils.scheduler.Scheduler from
+                        the track duration and catalogue size if None
+    time_continuity_resolution = Sopp time step in seconds
+    coarse_step = two-stage screening: first sweep all satellites every coarse_step seconds
+                  with a beam inflated by their maximum angular rate, then run Sopp on the
+                  candidates only (c.f. ephemeris.coarse_candidates)
+    pass_cache = PassCache answering mainbeam=False from predicted horizon passes
+                 (c.f. utils.pass_cache), preferred over ephemeris_cache and Sopp
+    frequency_catalogue = FrequencyCatalogue restricting the screening to the satellites
+                          transmitting in the observed band, or of unknown frequencies
+                          (c.f. utils.frequency_catalogue)
+    '''
+    windows = get_rfi_windows(df_obs, tle_file_path, frequency_file_path, beamwidth, mainbeam,
+                              satellites, ephemeris_cache=ephemeris_cache,
+                              path_finder_class=path_finder_class, metrics=metrics,
+                              concurrency_level=concurrency_level,
+                              time_continuity_resolution=time_continuity_resolution,
+                              coarse_step=coarse_step, pass_cache=pass_cache,
+                              frequency_catalogue=frequency_catalogue)
+
+    rfi_satellites = []
+    for sat, _, _ in windows:
+        rfi_satellites.append(sat)
+
+    return rfi_satellites
+
+
+def get_rfi_windows(df_obs: pd.DataFrame,
+                    tle_file_path = 'data/satellites.tle',
+                    frequency_file_path = 'data/satellite_frequencies.csv',
+                    beamwidth = 3,
+                    mainbeam=True,
+                    satellites: list[Satellite] = None,
+                    ephemeris_cache = None,
+                    path_finder_class = ObservationPathFinderRhodesmill,
+                    metrics = None,
+                    concurrency_level: int = None,
+                    time_continuity_resolution: float = 1,
+                    coarse_step: float = None,
+                    pass_cache = None,
+                    frequency_catalogue = None,
+                    min_altitude = 5.0
+                    ) -> list[tuple[Satellite, datetime, datetime]]:
+    '''
+    Same screening as get_rfi_sources(), but returns when each satellite interferes:
+    one (satellite, begin, end) UTC window per interference interval.
     '''
+    if pass_cache is not None and not mainbeam:
+        return get_rfi_windows_from_passes(df_obs, pass_cache, tle_file_path, frequency_file_path,
+                                           satellites, metrics=metrics, frequency_catalogue=frequency_catalogue)
 
     name = df_obs['name']
     archive = ARCHIVE_CLASSES.get(name)
@@ -25,8 +130,16 @@ def get_rfi_sources(df_obs: pd.DataFrame,
     lon = archive.longitude
     el = archive.elevation
 
+    builder = _ConfigurationBuilder(path_finder_class=path_finder_class)
+    if satellites is None:
+        builder.set_satellites(tle_file=tle_file_path, frequency_file=frequency_file_path)
+    elif isinstance(satellites, CatalogueSatellites):
+        builder.satellites = satellites
+    else:
+        builder.satellites = list(satellites)
+
     configuration = (
-        ConfigurationBuilder()
+        builder
         .set_facility(
             latitude=lat,
             longitude=lon,
@@ -39,24 +152,49 @@ def get_rfi_sources(df_obs: pd.DataFrame,
             frequency=df_obs['frequency']
         )
         .set_time_window(
-            begin=df_obs['begin'],
-            end=df_obs['end']
+            begin=time_utils.to_datetime(df_obs['begin']),
+            end=time_utils.to_datetime(df_obs['end'])
         )
         .set_observation_target(
-            declination=df_obs["declination"],
-            right_ascension=df_obs["right_ascension"]
+            # Sopp parses the archive strings (rows of compact tables hold degrees)
+            declination=formats.dec_string(df_obs["declination"]),
+            right_ascension=formats.ra_string(df_obs["right_ascension"])
         )
         .set_runtime_settings(
-            concurrency_level=8,
-            time_continuity_resolution=1,
-            min_altitude=5.0,
+            concurrency_level=concurrency_level or 1,
+            time_continuity_resolution=timedelta(seconds=time_continuity_resolution),
+            min_altitude=min_altitude,
         )
         # Alternatively set all of the above settings from a config file
         #.set_from_config_file(config_file='./supplements/config.json')
-        .set_satellites(tle_file=tle_file_path, frequency_file=frequency_file_path)
         .build()
     )
 
+    if metrics is not None:
+        metrics.count("satellites_screened", len(configuration.satellites), observatory=name)
+
+    if frequency_catalogue is not None:
+        configuration.satellites = _in_band(configuration.satellites, df_obs, frequency_catalogue, metrics)
+        if not configuration.satellites:
+            return []
+
+    if ephemeris_cache is not None:
+        configuration.satellites = _cached_candidates(configuration, archive, ephemeris_cache, tle_file_path, mainbeam)
+    elif coarse_step is not None:
+        configuration.satellites = _coarse_candidates(configuration, archive, coarse_step, mainbeam)
+    if ephemeris_cache is not None or coarse_step is not None:
+        if metrics is not None:
+            metrics.count("satellites_fine_screened", len(configuration.satellites), observatory=name)
+        if not configuration.satellites:
+            return []
+
+    if concurrency_level is None:
+        time_window = configuration.reservation.time
+        configuration.runtime_settings.concurrency_level = Scheduler(time_resolution=time_continuity_resolution).inner_concurrency(
+            (time_window.end - time_window.begin).total_seconds(), len(configuration.satellites))
+
+    # Sopp objects of the remaining candidates only (c.f. CatalogueSatellites)
+    configuration.satellites = list(configuration.satellites)
     sopp_obj = Sopp(configuration)
 
     if mainbeam:
@@ -64,11 +202,214 @@ def get_rfi_sources(df_obs: pd.DataFrame,
     else:
         rfi_overhead = sopp_obj.get_satellites_above_horizon()
 
-    rfi_satellites = []
-    for sat in rfi_overhead:
-        rfi_satellites.append(sat.satellite)
+    windows = []
+    for window in rfi_overhead:
+        overhead_time = window.overhead_time
+        if overhead_time is not None:
+            windows.append((window.satellite, overhead_time.begin, overhead_time.end))
 
-    return rfi_satellites
+    return windows
+
+
+def get_rfi_sources_from_cache(df_obs: pd.DataFrame,
+                               ephemeris_cache,
+                               tle_file_path = 'data/satellites.tle',
+                               frequency_file_path = 'data/satellite_frequencies.csv',
+                               beamwidth = 3,
+                               mainbeam = True,
+                               satellites: list[Satellite] = None,
+                               min_altitude = 5.0,
+                               metrics = None,
+                               frequency_catalogue = None,
+                               path_finder_class = ObservationPathFinderRhodesmill
+                               ) -> list[Satellite]:
+    '''
+    get_rfi_sources() with the ephemeris cache prefilter: the cached positions select
+    the candidates, Sopp decides. Days already in the cache are not propagated again.
+    '''
+    windows = get_rfi_windows_from_cache(df_obs, ephemeris_cache, tle_file_path, frequency_file_path,
+                                         beamwidth, mainbeam, satellites, min_altitude, metrics,
+                                         frequency_catalogue, path_finder_class)
+    return [sat for sat, _, _ in windows]
+
+
+def get_rfi_windows_from_cache(df_obs: pd.DataFrame,
+                               ephemeris_cache,
+                               tle_file_path = 'data/satellites.tle',
+                               frequency_file_path = 'data/satellite_frequencies.csv',
+                               beamwidth = 3,
+                               mainbeam = True,
+                               satellites: list[Satellite] = None,
+                               min_altitude = 5.0,
+                               metrics = None,
+                               frequency_catalogue = None,
+                               path_finder_class = ObservationPathFinderRhodesmill
+                               ) -> list[tuple[Satellite, datetime, datetime]]:
+    '''Interference windows (c.f. get_rfi_windows) with the ephemeris cache prefilter.'''
+    return get_rfi_windows(df_obs, tle_file_path, frequency_file_path, beamwidth, mainbeam, satellites,
+                           ephemeris_cache=ephemeris_cache, path_finder_class=path_finder_class, metrics=metrics,
+                           frequency_catalogue=frequency_catalogue, min_altitude=min_altitude)
+
+
+def get_rfi_windows_from_passes(df_obs: pd.DataFrame,
+                                pass_cache,
+                                tle_file_path = 'data/satellites.tle',
+                                frequency_file_path = 'data/satellite_frequencies.csv',
+                                satellites: list[Satellite] = None,
+                                metrics = None,
+                                frequency_catalogue = None
+                                ) -> list[tuple[Satellite, datetime, datetime]]:
+    '''
+    Satellites above the horizon (mainbeam=False screening) from the passes of the
+    cache: one (satellite, begin, end) window per pass overlapping the observation.
+    Days are predicted once per observatory and catalogue.
+    '''
+    name = df_obs['name']
+    archive = ARCHIVE_CLASSES.get(name)
+
+    begin = time_utils.to_datetime(df_obs['begin'])
+    end = time_utils.to_datetime(df_obs['end'])
+
+    if satellites is None:
+        line1, line2, tle_hash = pass_cache.catalogue(tle_file_path)
+        satellites = _satellites(None, tle_file_path, frequency_file_path)
+    elif not satellites:
+        return []
+    else:
+        line1, line2 = _tle_lines(satellites)
+        tle_hash = EphemerisCache.tle_hash(line1, line2)
+
+    norad_ids, window_begin, window_end = pass_cache.window(name, begin, end, line1, line2, archive.latitude,
+                                                             archive.longitude, archive.elevation, tle_hash)
+    if metrics is not None:
+        metrics.count("satellites_screened", len(line1), observatory=name)
+
+    satellites = _in_band(satellites, df_obs, frequency_catalogue, metrics)
+    by_norad = {sat.tle_information.satellite_number: sat
+                for sat in _select(satellites, np.isin(_norad_ids(satellites), norad_ids))}
+    return [
+        (by_norad[norad], _to_utc_datetime(b), _to_utc_datetime(e))
+        for norad, b, e in zip(norad_ids.tolist(), window_begin, window_end)
+        if norad in by_norad
+    ]
+
+
+def _coarse_candidates(configuration, archive, coarse_step, mainbeam) -> list[Satellite]:
+    satellites = configuration.satellites
+    if not satellites:
+        return satellites
+
+    line1, line2 = _tle_lines(satellites)
+    path = configuration.antenna_direction_path
+    time_window = configuration.reservation.time
+    facility = configuration.reservation.facility
+
+    keep = ephemeris.coarse_candidates(
+        line1, line2,
+        _naive_utc(time_window.begin), _naive_utc(time_window.end),
+        [_naive_utc(p.time) for p in path],
+        [p.position.altitude for p in path],
+        [p.position.azimuth for p in path],
+        archive.latitude, archive.longitude, archive.elevation,
+        step_seconds=coarse_step, beamwidth=facility.beamwidth, mainbeam=mainbeam,
+        min_altitude=configuration.runtime_settings.min_altitude,
+    )
+    return _select(satellites, keep)
+
+
+def _cached_candidates(configuration, archive, ephemeris_cache, tle_file_path, mainbeam) -> list[Satellite]:
+    # prefilter on the cached grid of the observatory's days (computed once per day and catalogue)
+    satellites = configuration.satellites
+    if not satellites:
+        return satellites
+
+    time_window = configuration.reservation.time
+    facility = configuration.reservation.facility
+    begin, end = _naive_utc(time_window.begin), _naive_utc(time_window.end)
+    line1, line2, tle_hash = ephemeris_cache.catalogue(tle_file_path)
+    grid = ephemeris_cache.window(facility.name, _to_utc_datetime(begin).replace(tzinfo=None),
+                                  _to_utc_datetime(end).replace(tzinfo=None), line1, line2,
+                                  archive.latitude, archive.longitude, archive.elevation, tle_hash)
+
+    path = configuration.antenna_direction_path
+    keep = ephemeris.grid_candidates(
+        grid,
+        _norad_ids(satellites),
+        _tle_lines(satellites)[1],
+        begin, end,
+        [_naive_utc(p.time) for p in path],
+        [p.position.altitude for p in path],
+        [p.position.azimuth for p in path],
+        archive.elevation, beamwidth=facility.beamwidth, mainbeam=mainbeam,
+        min_altitude=configuration.runtime_settings.min_altitude,
+    )
+    return _select(satellites, keep)
+
+
+def _in_band(satellites, df_obs, frequency_catalogue, metrics=None) -> list[Satellite]:
+    # frequency prefilter: drop the satellites known not to transmit in the observed band
+    if frequency_catalogue is None or not satellites:
+        return satellites
+    keep = frequency_catalogue.transmitting_in_band(
+        _norad_ids(satellites), float(df_obs["frequency"]), float(df_obs["bandwidth"]),
+    )
+    if metrics is not None:
+        metrics.count("satellites_in_band", int(keep.sum()), observatory=df_obs["name"])
+    return _select(satellites, keep)
+
+
+# The prefilters work on the NORAD ids and TLE lines, for Sopp satellites as well as
+# CatalogueSatellites (which are only built for the candidates left)
+
+def _norad_ids(satellites) -> np.ndarray:
+    if isinstance(satellites, CatalogueSatellites):
+        return satellites.norad_ids
+    return np.array([sat.tle_information.satellite_number for sat in satellites], dtype=np.int64)
+
+
+def _tle_lines(satellites) -> tuple[list[str], list[str]]:
+    if isinstance(satellites, CatalogueSatellites):
+        return satellites.tle_lines()
+    lines = [sat.tle_information.to_tle_lines() for sat in satellites]
+    return [l1 for l1, _ in lines], [l2 for _, l2 in lines]
+
+
+def _select(satellites, keep):
+    if isinstance(satellites, CatalogueSatellites):
+        return satellites.select(keep)
+    return [sat for sat, k in zip(satellites, keep) if k]
+
+
+class _ConfigurationBuilder(ConfigurationBuilder):
+    # no satellite filters are set here: skip Sopp's filtering pass, which would build
+    # every satellite of a CatalogueSatellites
+    def _filter_satellites(self):
+        pass
+
+
+def _naive_utc(t: datetime) -> np.datetime64:
+    if t.tzinfo is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(t, "ns")
+
+
+def _satellites(satellites, tle_file_path, frequency_file_path) -> list[Satellite]:
+    if satellites is None:
+        tle_file_path, frequency_file_path = Path(tle_file_path), Path(frequency_file_path)
+        satellites = _load_satellites(tle_file_path, tle_file_path.stat().st_mtime_ns,
+                                      frequency_file_path, frequency_file_path.stat().st_mtime_ns)
+    return satellites
+
+
+@lru_cache(maxsize=4)
+def _load_satellites(tle_file_path, tle_mtime, frequency_file_path, frequency_mtime) -> list[Satellite]:
+    # memoized per file versions: parsing the catalogue dominates the cached screenings
+    from sopp.satellites_loader.satellites_loader_from_files import SatellitesLoaderFromFiles
+    return SatellitesLoaderFromFiles(tle_file=tle_file_path, frequency_file=frequency_file_path).load_satellites()
+
+
+def _to_utc_datetime(t: np.datetime64) -> datetime:
+    return t.astype("datetime64[us]").item().replace(tzinfo=timezone.utc)
 
 
 def get_rfi_names(satellites: list[Satellite]) -> list[str]:
@@ -76,4 +417,84 @@ def get_rfi_names(satellites: list[Satellite]) -> list[str]:
     for sat in satellites:
         names.append(sat.name)
     
-    return names
\ No newline at end of file
+    return names
+
+
+def frequency_table_arrays(frequency_file_path) -> dict:
+    '''
+    Parse the satellite frequency CSV the same way Sopp does, but into flat
+    numpy arrays (one entry per frequency row) that can be shared between processes.
+    Frequencies and bandwidths are in MHz, NaN where unknown.
+    '''
+    from rfi_matcher.utils.frequency_catalogue import FrequencyCatalogue
+    return FrequencyCatalogue.from_csv(frequency_file_path).arrays()
+
+
+def satellites_from_catalogue(catalogue) -> list[Satellite]:
+    '''
+    Rebuild Sopp satellites from catalogue arrays (``tle_*`` and optionally ``freq_*``),
+    e.g. a SharedArrays attached in a worker process. Use CatalogueSatellites to build
+    them on demand instead.
+    '''
+    return list(CatalogueSatellites(catalogue))
+
+
+class CatalogueSatellites:
+    '''
+    Sopp satellites of catalogue arrays (c.f. satellites_from_catalogue), built on access
+    only. The screening prefilters select candidates on the NORAD ids and TLE lines
+    (frequency catalogue, coarse sweep, ephemeris cache, pass cache), so that Sopp objects
+    are created for the candidates of each track only, and not kept: the memory of a
+    worker does not grow with the catalogue.
+    '''
+
+    def __init__(self, catalogue, rows: np.ndarray = None, norad_ids: np.ndarray = None, frequency_order=None):
+        self._catalogue = catalogue
+        self._rows = np.arange(len(catalogue["tle_line1"])) if rows is None else rows
+        self.norad_ids = ephemeris.tle_norad_ids(catalogue["tle_line1"][self._rows]) if norad_ids is None else norad_ids
+        if frequency_order is None and "freq_norad" in catalogue:
+            # frequency rows by NORAD id, to look up the rows of one satellite
+            order = np.argsort(catalogue["freq_norad"], kind="stable")
+            frequency_order = (order, np.asarray(catalogue["freq_norad"])[order])
+        self._frequency_order = frequency_order
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+    def __getitem__(self, k) -> Satellite:
+        from sopp.custom_dataclasses.satellite.tle_information import TleInformation
+
+        row = self._rows[k]
+        tle_information = TleInformation.from_tle_lines(line1=self._catalogue["tle_line1"][row].decode(),
+                                                        line2=self._catalogue["tle_line2"][row].decode())
+        return Satellite(
+            name=self._catalogue["tle_names"][row].decode().strip(),
+            tle_information=tle_information,
+            frequency=self.__frequencies(int(self.norad_ids[k])),
+        )
+
+    def tle_lines(self) -> tuple[list[str], list[str]]:
+        return ([l.decode() for l in self._catalogue["tle_line1"][self._rows]],
+                [l.decode() for l in self._catalogue["tle_line2"][self._rows]])
+
+    def select(self, keep) -> "CatalogueSatellites":
+        '''The satellites of a boolean mask, still unbuilt.'''
+        keep = np.asarray(keep, dtype=bool)
+        return CatalogueSatellites(self._catalogue, self._rows[keep], self.norad_ids[keep], self._frequency_order)
+
+    def __frequencies(self, norad: int) -> list:
+        from sopp.custom_dataclasses.frequency_range.frequency_range import FrequencyRange
+
+        if self._frequency_order is None:
+            return []
+        order, sorted_norad = self._frequency_order
+        rows = order[np.searchsorted(sorted_norad, norad, "left"):np.searchsorted(sorted_norad, norad, "right")]
+        return [FrequencyRange(
+            frequency=None if np.isnan(freq) else float(freq),
+            bandwidth=None if np.isnan(bw) else float(bw),
+            status=status.decode(),
+        ) for freq, bw, status in zip(self._catalogue["freq_mhz"][rows], self._catalogue["freq_bandwidth_mhz"][rows],
+                                      self._catalogue["freq_status"][rows])]
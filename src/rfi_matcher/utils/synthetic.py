@@ -0,0 +1,349 @@
+"""
+Deterministic synthetic workloads for benchmarks and scaling studies:
+
+- observations in the ``DataArchive.get_df_order()`` schema, for any observatory
+  of ``ARCHIVE_CLASSES``
+- raw MeerKAT archive records (as returned by ``get_raw_observations``)
+- valid TLE catalogues with a configurable orbit mix (LEO, mega-constellation
+  shells, MEO, GEO belt) and a matching satellite frequency table
+
+The same arguments and seed always give the same output.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.utils.formats import format_dms, format_hms
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+DEFAULT_BEGIN = "2025-06-27T00:00:00"
+
+# (center frequency [Hz], bandwidth [Hz]) -> weight
+DEFAULT_FREQUENCY_MIX = {
+    (816e6, 544e6): 0.2,       # UHF
+    (1284e6, 856e6): 0.6,      # L
+    (2406e6, 875e6): 0.2,      # S
+}
+
+EARTH_RADIUS_KM = 6378.135   # WGS72, as used by SGP4
+MU_KM3_S2 = 398600.8
+
+# Orbit classes: name -> parameters used by tle_catalogue()
+ORBITS = {
+    # uniformly scattered low Earth orbits
+    "leo": {"altitude_km": (400, 1200), "inclination_deg": (0, 100), "eccentricity": (0, 0.01)},
+    # Walker-like shell of evenly spaced planes (Starlink-like)
+    "constellation": {"altitude_km": 550, "inclination_deg": 53, "eccentricity": (0, 0.0002)},
+    # navigation satellites
+    "meo": {"altitude_km": (19000, 23300), "inclination_deg": (54, 65), "eccentricity": (0, 0.01)},
+    # geostationary belt
+    "geo": {"altitude_km": 35786, "inclination_deg": (0, 0.1), "eccentricity": (0, 0.0005)},
+}
+
+FIRST_NORAD_ID = 10000
+MAX_NORAD_ID = 99999
+
+
+# ---------- OBSERVATIONS ----------
+
+def observations(observatory: str = "MEERKAT",
+                 n_tracks: int = 100,
+                 tracks_per_observation: int = 20,
+                 duration_s=(60, 600),
+                 gap_s: float = 2,
+                 begin: str = DEFAULT_BEGIN,
+                 span_hours: float = 24,
+                 frequency_mix: dict = None,
+                 sky: str = "uniform",
+                 n_fields: int = 10,
+                 field_radius_deg: float = 5,
+                 targets_per_observation: int = 4,
+                 seed: int = 0) -> pd.DataFrame:
+    '''
+    Synthetic observation tracks in the DataArchive.get_df_order() schema.
+
+    Tracks are grouped into observations (one observation_id and url each) made of
+    consecutive tracks separated by ``gap_s`` seconds, each pointing to one of the
+    observation's targets.
+
+    duration_s = track duration in seconds, either fixed or a (min, max) range
+    frequency_mix = {(frequency_hz, bandwidth_hz): weight}, one band per observation
+    sky = "uniform" (isotropic over the declinations visible from the observatory)
+          or "clustered" (targets scattered around ``n_fields`` field centers)
+    '''
+    import pandas as pd
+
+    archive = _archive(observatory)
+    rng = np.random.default_rng(seed)
+
+    n_obs = -(-n_tracks // tracks_per_observation)
+    obs_index = np.arange(n_tracks) // tracks_per_observation
+
+    # ---- times ----
+    begin = np.datetime64(begin, "ms")
+    obs_start = begin + (rng.uniform(0, span_hours * 3600, n_obs) * 1000).astype("timedelta64[ms]")
+    durations = _draw(rng, duration_s, n_tracks)
+    elapsed = np.cumsum(durations + gap_s) - (durations + gap_s)
+    # restart the elapsed time at each observation's first track
+    elapsed -= elapsed[obs_index * tracks_per_observation]
+    track_begin = obs_start[obs_index] + (elapsed * 1000).astype("timedelta64[ms]")
+    track_end = track_begin + (durations * 1000).astype("timedelta64[ms]")
+
+    # ---- frequencies ----
+    bands = list((frequency_mix or DEFAULT_FREQUENCY_MIX).items())
+    weights = np.array([w for _, w in bands], dtype=float)
+    band = rng.choice(len(bands), size=n_obs, p=weights / weights.sum())
+    frequency = np.array([f for (f, _), _ in bands], dtype=float)[band][obs_index]
+    bandwidth = np.array([b for (_, b), _ in bands], dtype=float)[band][obs_index]
+
+    # ---- sky ----
+    target_ra, target_dec = sky_positions(
+        n_obs * targets_per_observation, archive.latitude, sky=sky,
+        n_fields=n_fields, field_radius_deg=field_radius_deg, rng=rng,
+    )
+    target = obs_index * targets_per_observation + rng.integers(0, targets_per_observation, n_tracks)
+
+    obs_ids = np.array([f"{1700000000 + k}-sdp-l0" for k in range(n_obs)], dtype=object)
+
+    return pd.DataFrame({
+        "name": observatory,
+        "observation_id": obs_ids[obs_index],
+        "frequency": frequency,
+        "bandwidth": bandwidth,
+        "declination": format_dms(target_dec[target]),
+        "right_ascension": format_hms(target_ra[target]),
+        "begin": np.datetime_as_string(track_begin, unit="s"),
+        "end": np.datetime_as_string(track_end, unit="s"),
+        "url": np.array([f"https://archive.example/{1700000000 + k}/{1700000000 + k}_sdp_l0.full.rdb?token=synthetic"
+                         for k in range(n_obs)], dtype=object)[obs_index],
+    })[_df_order(archive)]
+
+
+def meerkat_records(n_observations: int = 10,
+                    tracks_per_observation: int = 20,
+                    duration_s=(60, 600),
+                    gap_s: float = 2,
+                    begin: str = DEFAULT_BEGIN,
+                    span_hours: float = 24,
+                    targets_per_observation: int = 4,
+                    seed: int = 0) -> pd.DataFrame:
+    '''
+    Raw MeerKAT archive records (meerkat_data_archive.FIELDS: rdb, ProductId, MinFreq,
+    MaxFreq, Targets, DecRa, StartTime, Duration, details) whose ``details`` hold one
+    line per track, in the format parsed by MeerkatDataArchive. Tracks never cross midnight, since the
+    archive only gives times of day.
+    '''
+    import pandas as pd
+
+    archive = ARCHIVE_CLASSES["MEERKAT"]
+    rng = np.random.default_rng(seed)
+    bands = list(DEFAULT_FREQUENCY_MIX)
+    begin = np.datetime64(begin, "s")
+    seconds_left = (np.datetime64(begin, "D") + np.timedelta64(1, "D") - begin) / np.timedelta64(1, "s")
+
+    rows = []
+    for k in range(n_observations):
+        durations = np.round(_draw(rng, duration_s, tracks_per_observation))
+        total = float(np.sum(durations + gap_s))
+        latest = max(min(span_hours * 3600, seconds_left - total), 0)
+        start = begin + np.timedelta64(int(rng.uniform(0, latest)), "s")
+
+        ra, dec = sky_positions(targets_per_observation, archive.latitude, rng=rng)
+        ra = np.where(ra > 180, ra - 360, ra)   # the archive also returns negative RAs
+        targets = [f"J{k:04d}-{t:04d}" for t in range(targets_per_observation)]
+
+        lines, t = [], start
+        for track, duration in enumerate(durations):
+            end = t + np.timedelta64(int(duration), "s")
+            target = int(rng.integers(0, targets_per_observation))
+            lines.append(
+                f"  {_time_of_day(t)} - {_time_of_day(end)}  {duration:.1f}  slew  "
+                f"{track}:track  {target}:{targets[target]}"
+            )
+            t = end + np.timedelta64(int(gap_s), "s")
+
+        frequency, bandwidth = bands[int(rng.integers(0, len(bands)))]
+        rows.append({
+            "rdb": f"https://archive.example/{1700000000 + k}/{1700000000 + k}_sdp_l0.full.rdb?token=synthetic",
+            "ProductId": f"{1700000000 + k}-sdp-l0",
+            "MinFreq": frequency - bandwidth / 2,
+            "MaxFreq": frequency + bandwidth / 2,
+            "Targets": targets,
+            "DecRa": [f"{d:.5f}, {r:.5f}" for d, r in zip(dec, ra)],
+            "StartTime": f"{start}Z",
+            "Duration": total,
+            "details": "\n".join(lines),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def sky_positions(n: int, latitude: float, sky: str = "uniform", min_altitude: float = 5,
+                  n_fields: int = 10, field_radius_deg: float = 5, rng=None):
+    '''
+    ``n`` (ra, dec) pairs in degrees whose declination rises above ``min_altitude``
+    at the given latitude.
+    '''
+    rng = rng if rng is not None else np.random.default_rng(0)
+    dec_min = max(-90.0, latitude - 90 + min_altitude)
+    dec_max = min(90.0, latitude + 90 - min_altitude)
+
+    if sky == "uniform":
+        return _uniform_cap(rng, n, dec_min, dec_max)
+    if sky == "clustered":
+        center_ra, center_dec = _uniform_cap(rng, n_fields, dec_min, dec_max)
+        field = rng.integers(0, n_fields, n)
+        dec = np.clip(center_dec[field] + rng.normal(0, field_radius_deg, n), dec_min, dec_max)
+        ra = (center_ra[field] + rng.normal(0, field_radius_deg, n) / np.cos(np.radians(dec))) % 360
+        return ra, dec
+
+    raise ValueError("Sky distribution must be 'uniform' or 'clustered'.")
+
+
+# ---------- SATELLITES ----------
+
+def tle_catalogue(n_sat: int = 1000,
+                  orbit_mix: dict = None,
+                  epoch: str = DEFAULT_BEGIN,
+                  seed: int = 0) -> list[tuple[str, str, str]]:
+    '''
+    ``n_sat`` valid (name, line1, line2) TLEs.
+
+    orbit_mix = {orbit class: weight} over the classes of ORBITS, e.g. {"constellation": 1}
+                for a LEO mega-constellation shell or {"geo": 1} for a GEO belt.
+                Defaults to a mix of constellation, LEO, MEO and GEO satellites.
+    '''
+    from sgp4.api import Satrec, WGS72
+    from sgp4.exporter import export_tle
+
+    if n_sat > MAX_NORAD_ID - FIRST_NORAD_ID + 1:
+        raise ValueError(f"At most {MAX_NORAD_ID - FIRST_NORAD_ID + 1} satellites fit in 5 digit NORAD ids.")
+
+    orbit_mix = orbit_mix or {"constellation": 0.6, "leo": 0.3, "meo": 0.05, "geo": 0.05}
+    unknown = set(orbit_mix) - set(ORBITS)
+    if unknown:
+        raise ValueError(f"Unknown orbit classes {sorted(unknown)}, expected some of {list(ORBITS)}.")
+
+    rng = np.random.default_rng(seed)
+    classes = list(orbit_mix)
+    weights = np.array([orbit_mix[c] for c in classes], dtype=float)
+    counts = rng.multinomial(n_sat, weights / weights.sum())
+
+    # SGP4 epoch: days since 1949-12-31 00:00 UTC
+    epoch_days = (np.datetime64(epoch, "ms") - np.datetime64("1949-12-31", "ms")) / np.timedelta64(1, "D")
+
+    tles = []
+    for orbit, count in zip(classes, counts):
+        elements = _orbital_elements(orbit, count, rng)
+        for altitude, ecc, incl, raan, argp, mean_anomaly in zip(*elements):
+            norad = FIRST_NORAD_ID + len(tles)
+            sat = Satrec()
+            sat.sgp4init(
+                WGS72, "i", norad, epoch_days,
+                1e-5, 0.0, 0.0,                        # bstar, ndot, nddot
+                float(ecc), float(argp), float(incl), float(mean_anomaly),
+                float(_mean_motion(altitude)), float(raan),
+            )
+            line1, line2 = export_tle(sat)
+            tles.append((f"{orbit.upper()}-{norad}", line1, line2))
+
+    return tles
+
+
+def write_tle_file(path, tles) -> Path:
+    '''Write (name, line1, line2) TLEs as a 3LE file, the format read by Sopp.'''
+    path = Path(path)
+    with open(path, "w") as f:
+        for name, line1, line2 in tles:
+            f.write(f"{name}\n{line1}\n{line2}\n")
+    return path
+
+
+def write_frequency_file(path, tles, transmitters=(1, 3), frequency_mhz=(130, 12000), seed: int = 0) -> Path:
+    '''
+    Write a satellite frequency table (same columns as the scraped satellite_frequencies.csv)
+    with ``transmitters`` = (min, max) downlinks per satellite of the catalogue.
+    '''
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(transmitters[0], transmitters[1] + 1, len(tles))
+    sat = np.repeat(np.arange(len(tles)), counts)
+
+    pd.DataFrame({
+        "ID": [int(tles[i][1][2:7]) for i in sat],
+        "Name": [tles[i][0] for i in sat],
+        "Frequency [MHz]": np.round(rng.uniform(*frequency_mhz, len(sat)), 4),
+        "Bandwidth [kHz]/Baud": np.round(rng.uniform(1, 500, len(sat)), 1),
+        "Status": "active",
+        "Description": "synthetic",
+        "Source": "synthetic",
+        "Orbit": None,
+    }).to_csv(Path(path))
+    return Path(path)
+
+
+# ---------- HELPERS ----------
+
+def _archive(observatory):
+    if observatory not in ARCHIVE_CLASSES:
+        raise ValueError(f"Unknown observatory {observatory}, expected one of {list(ARCHIVE_CLASSES)}.")
+    return ARCHIVE_CLASSES[observatory]
+
+
+def _df_order(archive):
+    # get_df_order() doesn't depend on the archive instance
+    return archive.get_df_order(archive)
+
+
+def _draw(rng, value, n) -> np.ndarray:
+    # fixed value or uniform draw within a (min, max) range
+    if np.ndim(value) == 0:
+        return np.full(n, float(value))
+    return rng.uniform(value[0], value[1], n)
+
+
+def _uniform_cap(rng, n, dec_min, dec_max):
+    # uniform on the sphere between two declinations
+    z = rng.uniform(np.sin(np.radians(dec_min)), np.sin(np.radians(dec_max)), n)
+    return rng.uniform(0, 360, n), np.degrees(np.arcsin(z))
+
+
+def _time_of_day(t) -> str:
+    return str(t.astype("datetime64[s]")).split("T")[1]
+
+
+def _mean_motion(altitude_km) -> float:
+    # radians per minute of a circular orbit at the given altitude
+    a = EARTH_RADIUS_KM + altitude_km
+    return np.sqrt(MU_KM3_S2 / a**3) * 60
+
+
+def _orbital_elements(orbit, n, rng):
+    # altitude [km], eccentricity, inclination, raan, argument of perigee, mean anomaly [rad]
+    params = ORBITS[orbit]
+    altitude = _draw(rng, params["altitude_km"], n)
+    eccentricity = _draw(rng, params["eccentricity"], n)
+    inclination = np.radians(_draw(rng, params["inclination_deg"], n))
+    argp = rng.uniform(0, 2 * np.pi, n)
+
+    if orbit == "constellation":
+        # evenly spaced planes, evenly spaced (and phased) satellites within each plane
+        planes = max(int(np.sqrt(n)), 1)
+        per_plane = -(-n // planes) if n else 1
+        k = np.arange(n)
+        plane, slot = k // per_plane, k % per_plane
+        raan = 2 * np.pi * plane / planes
+        mean_anomaly = (2 * np.pi * (slot + plane / planes) / per_plane) % (2 * np.pi)
+    else:
+        raan = rng.uniform(0, 2 * np.pi, n)
+        mean_anomaly = rng.uniform(0, 2 * np.pi, n)
+
+    return altitude, eccentricity, inclination, raan, argp, mean_anomaly
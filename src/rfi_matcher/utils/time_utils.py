@@ -1,8 +1,23 @@
+"""
+Time conversions. Scalar helpers for single ISO strings, and vectorized ones working
+on datetime64[ns] arrays (naive UTC): columns are parsed once with ``parse_times``
+and converted in one NumPy operation per batch.
+"""
 from datetime import datetime
+from functools import lru_cache
 import math
+
+import numpy as np
 import pytz
 
 
+UNIX_EPOCH = np.datetime64("1970-01-01T00:00:00", "ns")
+JD_UNIX_EPOCH = 2440587.5
+SECONDS_PER_DAY = 86400.0
+
+
+# ---------- SCALARS ----------
+
 def iso_to_datetime(iso_string: str):
     return datetime.fromisoformat(iso_string).replace(tzinfo=pytz.UTC)
 
@@ -10,6 +25,10 @@ def iso_extract_date(iso_string: str) -> str:
     dt = iso_to_datetime(iso_string)
     return dt.date().isoformat()
 
+def to_datetime(value) -> datetime:
+    '''An ISO string or a datetime64 value to a naive UTC datetime (microseconds).'''
+    return parse_times(value).astype("datetime64[us]").item()
+
 def get_julian_datetime(date: datetime):
     """
     Convert a datetime object into julian float.
@@ -17,13 +36,13 @@ def get_julian_datetime(date: datetime):
         date: datetime-object of date in question
 
     Returns: float - Julian calculated datetime.
-    Raises: 
+    Raises:
         TypeError : Incorrect parameter type
         ValueError: Date out of range of equation
     """
 
     # Ensure correct format
-    if not isinstance(date, datetime.datetime):
+    if not isinstance(date, datetime):
         raise TypeError('Invalid type for parameter "date" - expecting datetime')
     elif date.year < 1801 or date.year > 2099:
         raise ValueError('Datetime must be between year 1801 and 2099')
@@ -35,4 +54,87 @@ def get_julian_datetime(date: datetime):
                                                                                   2)) / 24.0 - 0.5 * math.copysign(
         1, 100 * date.year + date.month - 190002.5) + 0.5
 
-    return julian_datetime
\ No newline at end of file
+    return julian_datetime
+
+
+# ---------- ARRAYS ----------
+
+def parse_times(values) -> np.ndarray:
+    '''
+    ISO strings (a column, a list or a single string) to datetime64[ns] naive UTC
+    (a single datetime64 value is returned as is).
+    Offsets are converted to UTC, timestamps without offset are taken as UTC.
+    '''
+    if isinstance(values, str):
+        t = datetime.fromisoformat(values)
+        if t.tzinfo is not None:
+            t = t.astimezone(pytz.UTC).replace(tzinfo=None)
+        return np.datetime64(t, "ns")
+    if isinstance(values, np.datetime64):
+        # a value of a compact table's time column
+        return values.astype("datetime64[ns]")
+
+    import pandas as pd
+    times = pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", utc=True)
+    return times.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+def observation_times(observations) -> tuple[np.ndarray, np.ndarray]:
+    '''(begin, end) datetime64[ns] arrays of an observation frame, parsed once per column.'''
+    begin, end = observations["begin"], observations["end"]
+    if np.issubdtype(np.asarray(begin).dtype, np.datetime64):
+        return np.asarray(begin, dtype="datetime64[ns]"), np.asarray(end, dtype="datetime64[ns]")
+    return parse_times(begin), parse_times(end)
+
+def seconds(delta) -> np.ndarray:
+    '''timedelta64 values in (float) seconds.'''
+    return np.asarray(delta, dtype="timedelta64[ns]") / np.timedelta64(1, "s")
+
+def julian_date(times) -> np.ndarray:
+    '''Julian date (UTC scale) of datetime64 values.'''
+    return JD_UNIX_EPOCH + seconds(np.asarray(times, dtype="datetime64[ns]") - UNIX_EPOCH) / SECONDS_PER_DAY
+
+def terrestrial_time(times) -> np.ndarray:
+    '''Julian date in Terrestrial Time (UTC + leap seconds + 32.184 s), from skyfield's leap second table.'''
+    return to_skyfield(times).tt
+
+def to_skyfield(times, ts=None):
+    '''One vectorized skyfield Time for an array of datetime64 values.'''
+    ts = ts or timescale()
+    times = np.asarray(times, dtype="datetime64[ns]")
+    # whole days + seconds of the day: skyfield looks leap seconds up per day, whereas
+    # seconds since 1970 would be counted as elapsed SI seconds (27 s off nowadays)
+    days = times.astype("datetime64[D]")
+    day_numbers = (days - np.datetime64("1970-01-01", "D")).astype(np.int64)
+    return ts.utc(1970, 1, 1 + day_numbers, 0, 0, seconds(times - days))
+
+def to_datetimes(times) -> list[datetime]:
+    '''datetime64 values to aware UTC datetimes (microseconds).'''
+    return [t.replace(tzinfo=pytz.UTC) for t in np.asarray(times, dtype="datetime64[us]").tolist()]
+
+@lru_cache(maxsize=1)
+def timescale():
+    # loading the timescale reads skyfield's bundled leap second / delta T tables
+    from skyfield.api import load
+    return load.timescale()
+
+
+# ---------- GRIDS ----------
+
+def linspace(begin, end, n: int) -> np.ndarray:
+    '''
+    n evenly spaced instants in [begin, end]; for arrays of begins / ends, one row per
+    interval (shape (len(begin), n)).
+    '''
+    begin = np.asarray(begin, dtype="datetime64[ns]")
+    end = np.asarray(end, dtype="datetime64[ns]")
+    span = (end - begin).astype(np.int64)
+    offsets = np.multiply.outer(span, np.linspace(0, 1, n)).round().astype(np.int64)
+    return begin[..., None] + offsets.astype("timedelta64[ns]")
+
+def time_grid(begin, end, step_seconds: float) -> np.ndarray:
+    """Evenly spaced datetime64[ns] samples in [begin, end]."""
+    begin = np.datetime64(begin, "ns")
+    end = np.datetime64(end, "ns")
+    step = np.timedelta64(int(round(step_seconds * 1e9)), "ns")
+    n = int((end - begin) // step) + 1
+    return begin + step * np.arange(max(n, 0))
@@ -0,0 +1,388 @@
+"""
+Broker-less distribution of RFI screening jobs over several processes / nodes.
+
+A job's observations are split into shards (one per observatory and time window)
+and registered in a SQLite database next to the shard files, on a directory every
+node can reach:
+
+    <root>/queue.sqlite3
+    <root>/<job>/shards/<id>.pkl     observations of the shard
+    <root>/<job>/results/<id>.pkl    screened observations (NORAD column filled)
+
+Workers claim shards with a lease (renewed by a heartbeat while they work); shards
+of a worker that died are claimed again once its lease expired. ``merge`` gathers
+the results in the original row order.
+
+    queue = WorkQueue("/shared/rfi-queue")
+    queue.submit("june", observations, shard_hours=6)
+    # on every node, any number of times:
+    run_worker(queue, "june", lambda: RfiMatcher())
+    # once done:
+    results = queue.merge("june")
+
+Note: SQLite locking relies on the file system (it works on local disks and on
+most NFS setups with proper locking; avoid file systems without fcntl locks).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    observatory TEXT NOT NULL,
+    window_begin TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS shards_by_status ON shards (job, status, lease_until);
+"""
+
+
+@dataclass
+class Shard:
+    id: int
+    job: str
+    observatory: str
+    window_begin: str
+    window_end: str
+    rows: int
+    attempts: int
+
+
+class WorkQueue:
+    """
+    :param root: shared directory holding the database and the shard files
+    :param lease_seconds: time after which a shard claimed by a silent worker is handed out again
+    :param max_attempts: a shard failing this many times is marked 'failed'
+    """
+
+    def __init__(self, root, lease_seconds: float = 600, max_attempts: int = 3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "queue.sqlite3"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        with self.__connect() as db:
+            db.executescript(SCHEMA)
+
+
+    # ---------- SUBMISSION ----------
+
+    def submit(self, job: str, observations: pd.DataFrame, shard_hours: float = 6) -> int:
+        '''
+        Split observations (DataArchive.get_df_order() columns) by observatory and by
+        ``shard_hours`` windows of their begin time, and queue one shard per group.
+        Returns the number of shards. Raises ValueError if the job was already submitted.
+        '''
+        import pandas as pd
+
+        begin = pd.to_datetime(observations["begin"])
+        window = begin.dt.floor(pd.Timedelta(hours=shard_hours))
+        shards_dir = self.__job_dir(job) / "shards"
+        shards_dir.mkdir(parents=True, exist_ok=True)
+
+        n = 0
+        with self.__connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            if db.execute("SELECT 1 FROM shards WHERE job = ? LIMIT 1", (job,)).fetchone() is not None:
+                raise ValueError(f"Job {job} was already submitted, use another name.")
+            for (observatory, start), shard_df in observations.groupby([observations["name"], window], sort=True):
+                end = start + pd.Timedelta(hours=shard_hours)
+                cursor = db.execute(
+                    "INSERT INTO shards (job, observatory, window_begin, window_end, rows, status, updated) "
+                    "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                    (job, observatory, start.isoformat(), end.isoformat(), len(shard_df), time.time()),
+                )
+                _atomic_pickle(shard_df, shards_dir / f"{cursor.lastrowid}.pkl")
+                n += 1
+            # one transaction: shards become claimable only once every shard file is written
+            db.execute("COMMIT")
+
+        logger.info("Submitted job %s: %d rows in %d shards", job, len(observations), n)
+        return n
+
+
+    # ---------- WORKERS ----------
+
+    def claim(self, job: str, worker: str) -> Shard | None:
+        '''
+        Lease the next pending shard (or one whose lease expired), None if there is none.
+        An expired shard that already had max_attempts is marked 'failed' instead.
+        '''
+        now = time.time()
+        with self.__connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "UPDATE shards SET status = 'failed', lease_until = NULL, error = 'lease expired', updated = ? "
+                "WHERE job = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, job, now, self.max_attempts),
+            )
+            row = db.execute(
+                "SELECT id, job, observatory, window_begin, window_end, rows, attempts FROM shards "
+                "WHERE job = ? AND (status = 'pending' OR (status = 'leased' AND lease_until < ? AND attempts < ?)) "
+                "ORDER BY attempts, id LIMIT 1",
+                (job, now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+
+            db.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?",
+                (worker, now + self.lease_seconds, now, row[0]),
+            )
+            db.execute("COMMIT")
+
+        shard = Shard(*row)
+        shard.attempts += 1
+        return shard
+
+    def heartbeat(self, shard: Shard, worker: str) -> bool:
+        '''Extend the lease; False if the shard was handed to another worker meanwhile.'''
+        with self.__connect() as db:
+            cursor = db.execute(
+                "UPDATE shards SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, time.time(), shard.id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def load(self, shard: Shard) -> pd.DataFrame:
+        import pandas as pd
+        return pd.read_pickle(self.__job_dir(shard.job) / "shards" / f"{shard.id}.pkl")
+
+    def complete(self, shard: Shard, worker: str, result: pd.DataFrame) -> bool:
+        '''
+        Store the shard result and mark it done. Returns False (and keeps the first
+        result) if another worker already completed it after this lease expired.
+        '''
+        results_dir = self.__job_dir(shard.job) / "results"
+        results_dir.mkdir(parents=True, exist_ok=True)
+        tmp = results_dir / f"{shard.id}.{worker}.pkl"
+        _atomic_pickle(result, tmp)
+
+        with self.__connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            status, = db.execute("SELECT status FROM shards WHERE id = ?", (shard.id,)).fetchone()
+            if status == "done":
+                db.execute("COMMIT")
+                tmp.unlink(missing_ok=True)
+                return False
+            os.replace(tmp, results_dir / f"{shard.id}.pkl")
+            db.execute(
+                "UPDATE shards SET status = 'done', worker = ?, lease_until = NULL, error = NULL, updated = ? WHERE id = ?",
+                (worker, time.time(), shard.id),
+            )
+            db.execute("COMMIT")
+        return True
+
+    def fail(self, shard: Shard, worker: str, error: str):
+        '''Release a shard after an error: retried later, or 'failed' after max_attempts.'''
+        status = "failed" if shard.attempts >= self.max_attempts else "pending"
+        with self.__connect() as db:
+            db.execute(
+                "UPDATE shards SET status = ?, lease_until = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (status, error, time.time(), shard.id, worker),
+            )
+
+
+    # ---------- MONITORING AND MERGE ----------
+
+    def status(self, job: str) -> dict:
+        '''Number of shards per status (pending, leased, done, failed).'''
+        with self.__connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM shards WHERE job = ? GROUP BY status", (job,)).fetchall()
+        return dict(rows)
+
+    def is_finished(self, job: str) -> bool:
+        status = self.status(job)
+        return bool(status) and set(status) <= {"done", "failed"}
+
+    def merge(self, job: str, allow_partial: bool = False) -> pd.DataFrame:
+        '''Concatenate the shard results in the original row order.'''
+        import pandas as pd
+
+        with self.__connect() as db:
+            rows = db.execute("SELECT id, status FROM shards WHERE job = ? ORDER BY id", (job,)).fetchall()
+
+        missing = [shard_id for shard_id, status in rows if status != "done"]
+        if missing and not allow_partial:
+            raise RuntimeError(f"Job {job} has {len(missing)} unfinished shards (e.g. {missing[:5]}).")
+
+        results_dir = self.__job_dir(job) / "results"
+        frames = [pd.read_pickle(results_dir / f"{shard_id}.pkl") for shard_id, status in rows if status == "done"]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames).sort_index()
+
+
+    # ---------- INTERNALS ----------
+
+    def __connect(self):
+        # autocommit mode: transactions are explicit (BEGIN IMMEDIATE) where needed
+        db = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        db.execute("PRAGMA busy_timeout = 60000")
+        return _closing(db)
+
+    def __job_dir(self, job: str) -> Path:
+        return self.root / job
+
+
+def run_worker(queue: WorkQueue, job: str, matcher_factory, worker: str = None,
+               proximities: bool = False, stop_when_empty: bool = True, poll_seconds: float = 10) -> int:
+    '''
+    Claim and screen shards until the job has none left. Returns the number of shards done.
+
+    matcher_factory = callable returning the RfiMatcher to screen with (TLE / frequency
+                      files, ephemeris cache, ...), called once per worker
+    proximities = also run get_all_sat_proximities() on each shard
+    stop_when_empty = return when no shard can be claimed (otherwise keep polling until
+                      every shard is done or failed, e.g. to pick up expired leases)
+    '''
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    matcher = matcher_factory()
+    done = 0
+
+    while True:
+        shard = queue.claim(job, worker)
+        if shard is None:
+            if stop_when_empty or queue.is_finished(job):
+                return done
+            time.sleep(poll_seconds)
+            continue
+
+        logger.info("Worker %s screening shard %d (%s %s, %d rows)",
+                    worker, shard.id, shard.observatory, shard.window_begin, shard.rows)
+        with _Heartbeat(queue, shard, worker):
+            try:
+                observations = queue.load(shard)
+                with matcher.metrics.stage("shard", observatory=shard.observatory):
+                    # the matcher expects a 0..n-1 index, the original one is restored for merge()
+                    result = matcher.extend_observations_with_rfi(observations.reset_index(drop=True))
+                    if proximities:
+                        result = matcher.get_all_sat_proximities(result)
+                result.index = observations.index
+            except Exception as e:
+                logger.exception("Shard %d failed", shard.id)
+                queue.fail(shard, worker, f"{type(e).__name__}: {e}")
+                continue
+
+        if queue.complete(shard, worker, result):
+            done += 1
+
+
+def main(argv=None):
+    '''
+    Command line for the nodes of a cluster:
+
+        python -m rfi_matcher.utils.work_queue worker /shared/rfi-queue june --tle data/satellites.tle
+        python -m rfi_matcher.utils.work_queue status /shared/rfi-queue june
+        python -m rfi_matcher.utils.work_queue merge /shared/rfi-queue june results.csv
+    '''
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m rfi_matcher.utils.work_queue")
+    parser.add_argument("command", choices=["worker", "status", "merge"])
+    parser.add_argument("root")
+    parser.add_argument("job")
+    parser.add_argument("output", nargs="?", help="merge: CSV file to write")
+    parser.add_argument("--tle", default="data/satellites.tle")
+    parser.add_argument("--frequencies", default="data/satellite_frequencies.csv")
+    parser.add_argument("--proximities", action="store_true")
+    parser.add_argument("--wait", action="store_true", help="worker: keep polling for expired leases")
+    parser.add_argument("--lease", type=float, default=600)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    queue = WorkQueue(args.root, lease_seconds=args.lease)
+
+    if args.command == "status":
+        print(queue.status(args.job))
+    elif args.command == "merge":
+        queue.merge(args.job).to_csv(args.output or f"{args.job}.csv")
+    else:
+        def matcher_factory():
+            from rfi_matcher.rfi_matcher import RfiMatcher
+            matcher = RfiMatcher()
+            matcher.satellites_filepath = Path(args.tle)
+            matcher.frequencies_filepath = Path(args.frequencies)
+            return matcher
+
+        done = run_worker(queue, args.job, matcher_factory, proximities=args.proximities,
+                          stop_when_empty=not args.wait)
+        logger.info("Worker done: %d shards", done)
+
+
+class _Heartbeat:
+    # renews the shard lease in the background while a worker screens it
+    def __init__(self, queue: WorkQueue, shard: Shard, worker: str):
+        self.queue, self.shard, self.worker = queue, shard, worker
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(self.shard, self.worker):
+                logger.warning("Lost the lease of shard %d", self.shard.id)
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class _closing:
+    # sqlite3.Connection's own context manager commits but doesn't close
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None and self.db.in_transaction:
+            self.db.execute("ROLLBACK")
+        self.db.close()
+
+
+def _atomic_pickle(obj, path: Path):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    main()
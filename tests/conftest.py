@@ -0,0 +1,24 @@
+import pytest
+
+from rfi_matcher.utils import synthetic
+
+
+@pytest.fixture(scope="session")
+def make_catalogue(tmp_path_factory):
+    '''(TLE file, frequency file) of a synthetic catalogue of n_sat satellites, written once per (n_sat, seed).'''
+    written = {}
+
+    def make(n_sat=120, seed=3):
+        if (n_sat, seed) not in written:
+            root = tmp_path_factory.mktemp(f"catalogue-{n_sat}-{seed}")
+            tles = synthetic.tle_catalogue(n_sat, seed=seed)
+            written[n_sat, seed] = (synthetic.write_tle_file(root / "satellites.tle", tles),
+                                    synthetic.write_frequency_file(root / "satellite_frequencies.csv", tles))
+        return written[n_sat, seed]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def catalogue(make_catalogue):
+    return make_catalogue()
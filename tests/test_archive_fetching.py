@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.model.data_archives import NraoDataArchive
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import synthetic
+
+
+@pytest.fixture
+def archives(monkeypatch):
+    '''Fake archive latencies / failures per observatory: {name: seconds or exception}.'''
+    behaviour = {}
+    active, peak = {}, {}
+    lock = threading.Lock()
+    synthetic.observations(n_tracks=2)      # imports out of the timings
+
+    def get_observations_for(self, name):
+        archive = ARCHIVE_CLASSES[name].name
+        with lock:
+            active[archive] = active.get(archive, 0) + 1
+            peak[archive] = max(peak.get(archive, 0), active[archive])
+        try:
+            outcome = behaviour[name]
+            if isinstance(outcome, Exception):
+                raise outcome
+            time.sleep(outcome)
+            observations = synthetic.observations(n_tracks=2)
+            observations["name"] = name
+            return observations
+        finally:
+            with lock:
+                active[archive] -= 1
+
+    monkeypatch.setattr(RfiMatcher, "get_observations_for", get_observations_for)
+    return behaviour, peak
+
+
+def test_archives_fetched_concurrently(archives):
+    behaviour, _ = archives
+    behaviour.update({"MEERKAT": 0.3, "VERY LARGE ARRAY NM": 0.3})
+
+    start = time.perf_counter()
+    observations = RfiMatcher().get_all_observations(["MEERKAT", "VERY LARGE ARRAY NM"])
+    assert time.perf_counter() - start < 0.55
+    assert observations["name"].tolist() == ["MEERKAT"] * 2 + ["VERY LARGE ARRAY NM"] * 2
+
+def test_archive_limits_shared_by_observatories(archives):
+    behaviour, peak = archives
+    behaviour.update({"MEERKAT": 0.05, "VERY LARGE ARRAY NM": 0.05, "ALMA_1": 0.05, "ALMA_2": 0.05})
+
+    RfiMatcher().get_all_observations(list(behaviour))
+    assert peak[NraoDataArchive.name] == 1
+    RfiMatcher().get_all_observations(list(behaviour), archive_limits={NraoDataArchive.name: 3})
+    assert peak[NraoDataArchive.name] == 3
+
+def test_partial_results_on_failure_and_timeout(archives):
+    behaviour, _ = archives
+    behaviour.update({"MEERKAT": 0.0, "ALMA_1": RuntimeError("archive down"), "VERY LARGE ARRAY NM": 5})
+    matcher = RfiMatcher()
+
+    start = time.perf_counter()
+    observations = matcher.get_all_observations(["MEERKAT", "ALMA_1", "VERY LARGE ARRAY NM"], timeout=0.3)
+    assert time.perf_counter() - start < 1
+    assert set(observations["name"]) == {"MEERKAT"}
+    assert matcher.metrics.get("archive_failures", archive="ALMA_1") == 1
+    assert matcher.metrics.get("archive_timeouts", archive="VERY LARGE ARRAY NM") == 1
+
+def test_archives_compacted_on_arrival(archives, tmp_path):
+    from rfi_matcher.model import compact_table
+    from rfi_matcher.utils.checkpoint import Checkpoint
+
+    behaviour, _ = archives
+    behaviour.update({"MEERKAT": 0.0, "VERY LARGE ARRAY NM": 0.0})
+    matcher = RfiMatcher(checkpoint=Checkpoint(tmp_path))
+
+    observations = matcher.get_all_observations(list(behaviour), compact=True)
+    assert compact_table.is_compact(observations)
+    checkpointed = Checkpoint(tmp_path).completed("get_all_observations")
+    assert all(compact_table.is_compact(o) for o in checkpointed.values())
+
+    resumed = RfiMatcher(checkpoint=Checkpoint(tmp_path)).get_all_observations(list(behaviour), resume=True)
+    assert not compact_table.is_compact(resumed)
+    assert resumed["name"].tolist() == ["MEERKAT"] * 2 + ["VERY LARGE ARRAY NM"] * 2
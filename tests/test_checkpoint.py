@@ -0,0 +1,85 @@
+import pytest
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.checkpoint import Checkpoint
+
+
+# ---------- CHECKPOINT ----------
+
+def test_rows_survive_reopening(tmp_path):
+    ckpt = Checkpoint(tmp_path, every_rows=2)
+    ckpt.record("stage", "a", [1])
+    assert not (tmp_path / "state.json").exists()
+    ckpt.record("stage", "b", [2])     # flushed
+    ckpt.record("stage", "c", [3])     # pending only
+    ckpt.set_cursor("stage", ["MEERKAT"])
+
+    reopened = Checkpoint(tmp_path)
+    assert reopened.completed("stage") == {"a": [1], "b": [2]}
+    assert reopened.cursor("stage") is None
+
+    ckpt.flush()
+    reopened = Checkpoint(tmp_path)
+    assert reopened.completed("stage") == {"a": [1], "b": [2], "c": [3]}
+    assert reopened.cursor("stage") == ["MEERKAT"]
+
+def test_uncommitted_segment_is_ignored(tmp_path):
+    ckpt = Checkpoint(tmp_path)
+    ckpt.record("stage", "a", 1)
+    ckpt.flush()
+    # a segment written by a run killed before committing the state file
+    (tmp_path / "stage.000001.pkl").write_bytes(b"garbage")
+
+    assert Checkpoint(tmp_path).completed("stage") == {"a": 1}
+
+def test_reset_stage(tmp_path):
+    ckpt = Checkpoint(tmp_path)
+    ckpt.record("stage", "a", 1)
+    ckpt.finish("stage")
+    assert ckpt.is_finished("stage")
+
+    ckpt.reset("stage")
+    assert Checkpoint(tmp_path).completed("stage") == {}
+    assert not list(tmp_path.glob("stage.*.pkl"))
+
+
+# ---------- RESUMABLE RUNS ----------
+
+class Preempted(Exception):
+    pass
+
+
+def test_resume_after_preemption(tmp_path, monkeypatch):
+    observations = synthetic.observations(n_tracks=6, tracks_per_observation=3)
+    calls = []
+
+    def fake_get_rfi_sources(obs, **kwargs):
+        if len(calls) == 4:
+            raise Preempted()
+        calls.append(obs["begin"])
+        return [obs["begin"]]
+
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", fake_get_rfi_sources)
+
+    matcher = RfiMatcher(checkpoint=Checkpoint(tmp_path, every_rows=2))
+    with pytest.raises(Preempted):
+        matcher.extend_observations_with_rfi(observations)
+
+    # a new process: rows flushed before the failure are not recomputed
+    calls.clear()
+    matcher = RfiMatcher(checkpoint=Checkpoint(tmp_path, every_rows=2))
+    result = matcher.extend_observations_with_rfi(observations, resume=True)
+
+    assert len(calls) == 2
+    assert matcher.metrics.get("rows_resumed") == 4
+    assert result["NORAD"].tolist() == [[b] for b in observations["begin"]]
+
+def test_no_resume_starts_over(tmp_path, monkeypatch):
+    observations = synthetic.observations(n_tracks=3)
+    calls = []
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", lambda obs, **kwargs: calls.append(1) or [])
+
+    RfiMatcher(checkpoint=Checkpoint(tmp_path)).extend_observations_with_rfi(observations)
+    RfiMatcher(checkpoint=Checkpoint(tmp_path)).extend_observations_with_rfi(observations)
+    assert len(calls) == 6
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.coalesce import coalesce_tracks, split_windows
+
+
+def _tracks(*spans, target="00:00:00.00", frequency=1.284e9):
+    # (begin, end) offsets in seconds from midnight, same setup unless overridden
+    return pd.DataFrame([
+        {"name": "MEERKAT", "observation_id": "1", "right_ascension": target, "declination": "-30:00:00.0",
+         "frequency": frequency, "bandwidth": 8.56e8,
+         "begin": _iso(b), "end": _iso(e)}
+        for b, e in spans
+    ])
+
+def _iso(seconds):
+    return (datetime(2024, 1, 1) + timedelta(seconds=seconds)).isoformat()
+
+def _utc(seconds):
+    return datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=seconds)
+
+
+# ---------- COALESCING ----------
+
+def test_merge_within_gap():
+    obs = _tracks((0, 60), (65, 120), (100, 110), (200, 260))
+    merged, groups = coalesce_tracks(obs, gap_seconds=10)
+
+    assert groups.tolist() == [0, 0, 0, 1]
+    assert merged["begin"].tolist() == [_iso(0), _iso(200)]
+    assert merged["end"].tolist() == [_iso(120), _iso(260)]
+    assert merged["tracks"].tolist() == [3, 1]
+
+def test_different_setup_is_not_merged():
+    obs = pd.concat([_tracks((0, 60)), _tracks((60, 120), target="01:00:00.00"),
+                     _tracks((120, 180), frequency=5e8)], ignore_index=True)
+    merged, groups = coalesce_tracks(obs, gap_seconds=10)
+    assert len(merged) == 3
+    assert sorted(groups.tolist()) == [0, 1, 2]
+
+def test_empty_tracks_are_not_screened():
+    merged, groups = coalesce_tracks(_tracks((0, 60), (70, 70), (80, 60)))
+    assert groups.tolist() == [0, -1, -1]
+    assert len(merged) == 1
+
+def test_split_windows_by_overlap():
+    obs = _tracks((0, 60), (62, 120), (200, 260))
+    _, groups = coalesce_tracks(obs, gap_seconds=10)
+    a, b = object(), object()
+    windows = [[(a, _utc(50), _utc(70)), (b, _utc(100), _utc(110)), (a, _utc(115), _utc(118))], []]
+
+    result = split_windows(obs, groups, windows)
+    assert result[0] == [a]
+    assert result[1] == [a, b]
+    assert result[2] == []
+
+
+# ---------- RFI MATCHER ----------
+
+def test_coalesced_run_matches_per_track(monkeypatch):
+    observations = synthetic.observations(n_tracks=12, tracks_per_observation=6, targets_per_observation=1)
+    begin = pd.to_datetime(observations["begin"]).min()
+    sat = object()
+    # interferes during the second half of the third track only
+    third = observations.iloc[2]
+    interference = (pd.Timestamp(third["begin"]) + (pd.Timestamp(third["end"]) - pd.Timestamp(third["begin"])) / 2,
+                    pd.Timestamp(third["end"]))
+    assert pd.Timestamp(third["begin"]) > begin
+
+    def overlaps(obs):
+        return interference[0] <= pd.Timestamp(obs["end"]) and interference[1] >= pd.Timestamp(obs["begin"])
+
+    calls = {"tracks": 0, "windows": 0}
+
+    def fake_get_rfi_sources(obs, **kwargs):
+        calls["tracks"] += 1
+        return [sat] if overlaps(obs) else []
+
+    def fake_get_rfi_windows(obs, **kwargs):
+        calls["windows"] += 1
+        start, stop = (t.tz_localize("UTC").to_pydatetime() for t in interference)
+        return [(sat, start, stop)] if overlaps(obs) else []
+
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", fake_get_rfi_sources)
+    monkeypatch.setattr(sopp_utils, "get_rfi_windows", fake_get_rfi_windows)
+
+    per_track = RfiMatcher().extend_observations_with_rfi(observations)
+    matcher = RfiMatcher()
+    coalesced = matcher.extend_observations_with_rfi(observations, coalesce_gap=10)
+
+    assert coalesced["NORAD"].tolist() == per_track["NORAD"].tolist()
+    assert sum(len(r) for r in coalesced["NORAD"]) == 1
+    assert calls == {"tracks": 12, "windows": 2}
+    assert matcher.metrics.get("screening_jobs") == 2
+    assert matcher.metrics.get("tracks_coalesced") == 10
+
+def test_coalesced_run_respects_lim(monkeypatch):
+    observations = synthetic.observations(n_tracks=6, tracks_per_observation=6, targets_per_observation=1)
+    monkeypatch.setattr(sopp_utils, "get_rfi_windows", lambda obs, **kwargs: [])
+
+    result = RfiMatcher().extend_observations_with_rfi(observations, lim=2, coalesce_gap=10)
+    assert result["NORAD"].tolist() == [[], [], [], None, None, None]
+    assert np.array_equal(result.index, observations.index)
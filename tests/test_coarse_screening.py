@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from rfi_matcher.utils import ephemeris, sopp_utils, synthetic
+from rfi_matcher.utils.metrics import Metrics
+
+
+# the antenna pointing without downloading the de421 ephemeris
+OFFLINE = sopp_utils.ObservationPathFinderOffline
+
+
+def _keys(windows):
+    return sorted((sat.tle_information.satellite_number, begin, end) for sat, begin, end in windows)
+
+
+def test_angular_rate_bound_by_orbit():
+    tles = synthetic.tle_catalogue(40, orbit_mix={"leo": 1, "geo": 1}, seed=0)
+    line2 = [l2 for _, _, l2 in tles]
+    revs_per_day = np.array([float(l[52:63]) for l in line2])
+    rate = ephemeris.angular_rate_bound(line2)
+
+    # LEO: about a degree per second overhead, GEO: barely moves
+    assert (rate[revs_per_day > 10] > 0.3).all()
+    assert (rate[revs_per_day < 1.1] < 0.01).all()
+
+
+@pytest.mark.parametrize("mainbeam", [True, False])
+def test_two_stage_finds_the_same_windows(catalogue, mainbeam):
+    tle_file, frequency_file = catalogue
+    observations = synthetic.observations(n_tracks=2, tracks_per_observation=2, duration_s=600, seed=5)
+    metrics = Metrics()
+
+    for _, obs in observations.iterrows():
+        fine = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=mainbeam, concurrency_level=1,
+                                          path_finder_class=OFFLINE)
+        two_stage = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=mainbeam,
+                                               concurrency_level=1, coarse_step=30, metrics=metrics,
+                                               path_finder_class=OFFLINE)
+        assert _keys(two_stage) == _keys(fine)
+        assert fine or mainbeam
+
+    assert metrics.get("satellites_fine_screened", observatory="MEERKAT") < metrics.get("satellites_screened", observatory="MEERKAT")
+
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from rfi_matcher.model import compact_table
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import synthetic
+
+
+def _observations(n_tracks=2000, **kwargs):
+    observations = synthetic.observations(n_tracks=n_tracks, tracks_per_observation=40, **kwargs)
+    # archive tokens are long signed strings, the same for every track of a capture block
+    observations["url"] = observations["url"].str.replace("token=synthetic", "token=" + "x" * 600)
+    return observations
+
+
+# ---------- OBSERVATIONS ----------
+
+def test_round_trip():
+    observations = _observations()
+    compact = compact_table.compact_observations(observations)
+
+    assert compact["right_ascension"].dtype == np.float64
+    assert np.issubdtype(compact["begin"].dtype, np.datetime64)
+    assert isinstance(compact["name"].dtype, pd.CategoricalDtype)
+    assert compact_table.is_compact(compact) and not compact_table.is_compact(observations)
+    pd.testing.assert_frame_equal(compact_table.expand_observations(compact), observations)
+
+def test_url_token_stored_once():
+    compact = compact_table.compact_observations(_observations())
+    assert len(compact["url_query"].cat.categories) == 1
+    assert len(compact["url_path"].cat.categories) == 2000 // 40
+
+def test_memory_drops_by_an_order_of_magnitude():
+    observations = _observations()
+    compact = compact_table.compact_observations(observations)
+    assert compact_table.memory_bytes(compact) * 10 < compact_table.memory_bytes(observations)
+
+def test_concat_keeps_categories():
+    first = compact_table.compact_observations(_observations(100, seed=1))
+    second = compact_table.compact_observations(_observations(100, seed=2))
+    merged = compact_table.concat_compact([first, second])
+
+    assert len(merged) == 200
+    assert isinstance(merged["observation_id"].dtype, pd.CategoricalDtype)
+    assert merged["observation_id"].astype(str).tolist() == (
+        first["observation_id"].astype(str).tolist() + second["observation_id"].astype(str).tolist()
+    )
+
+
+# ---------- MATCHES ----------
+
+def test_match_table_round_trip():
+    n_rows = 6
+    nested = [[{
+        "sat": f"SAT {row}-{k}",
+        "norad": 40000 + k,
+        "timestamp": f"2025-06-27T0{row}:00:01.500000+00:00",
+        "declination": -30.0 + k,
+        "right_ascension": 10.0 * row,
+        "angular_distance": 0.5 * k,
+    } for k in range(row % 3)] for row in range(n_rows)]
+    observations = pd.DataFrame({"NORAD": nested})
+
+    matches = compact_table.match_table(observations)
+    assert matches.columns.tolist() == compact_table.MATCH_COLUMNS
+    assert len(matches) == sum(len(m) for m in nested)
+    assert matches["norad"].dtype == np.int32
+    assert compact_table.nest_matches(matches, n_rows) == nested
+
+def test_matcher_screens_compact_observations(monkeypatch):
+    from rfi_matcher.utils import sopp_utils
+
+    observations = _observations(4)
+    compact = compact_table.compact_observations(observations)
+    seen = []
+
+    def fake_get_rfi_sources(obs, **kwargs):
+        seen.append((obs["begin"], obs["right_ascension"]))
+        return []
+
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", fake_get_rfi_sources)
+    matcher = RfiMatcher()
+    result = matcher.extend_observations_with_rfi(compact, satellites=[])
+
+    # the stages read the typed columns, the table is not expanded
+    assert seen == list(zip(compact["begin"].to_numpy(), compact["right_ascension"].to_numpy()))
+    assert compact_table.is_compact(result) and "url" not in result.columns
+    assert result["NORAD"].tolist() == [[]] * 4
+
+def test_round_trip_of_archive_data():
+    from importlib import resources
+
+    with resources.files("rfi_matcher.data").joinpath("rfi_data.csv").open() as f:
+        observations = pd.read_csv(f, index_col=0)
+    expanded = compact_table.expand_observations(compact_table.compact_observations(observations))
+    pd.testing.assert_frame_equal(expanded, observations)
+
+def test_row_keys_independent_of_the_format():
+    from rfi_matcher.rfi_matcher import _row_key, _rows
+
+    observations = _observations(40)
+    compact = compact_table.compact_observations(observations)
+    assert [_row_key(row) for _, _, row in _rows(compact)] == [_row_key(row) for _, _, row in _rows(observations)]
@@ -0,0 +1,127 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.ephemeris import EphemerisGrid, time_grid
+from rfi_matcher.utils.ephemeris_cache import EphemerisCache
+from rfi_matcher.utils.metrics import Metrics
+
+
+# the antenna pointing without downloading the de421 ephemeris
+OFFLINE = sopp_utils.ObservationPathFinderOffline
+
+
+def make_grid(n_sat=3, day="2025-06-27", step=3600.0):
+    times = time_grid(f"{day}T00:00:00", f"{day}T23:00:00", step)
+    values = np.arange(n_sat * len(times), dtype=np.float32).reshape(n_sat, len(times))
+    return EphemerisGrid(
+        norad=np.arange(n_sat, dtype=np.int64) + 1000,
+        times=times,
+        ra=values, dec=values / 10, alt=values / 100, az=values / 1000,
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EphemerisCache(tmp_path / "cache", max_bytes=10 * 2**20, step_seconds=3600.0)
+
+
+def test_get_missing_partition(cache):
+    assert cache.get("MEERKAT", date(2025, 6, 27), "abc") is None
+    assert cache.misses == 1
+
+
+def test_put_then_get_is_memory_mapped(cache):
+    grid = make_grid()
+    cache.put("MEERKAT", date(2025, 6, 27), "abc", grid)
+
+    cached = cache.get("MEERKAT", date(2025, 6, 27), "abc")
+    assert isinstance(cached.ra, np.memmap)
+    assert cached.ra.dtype == np.float32
+    np.testing.assert_array_equal(cached.ra, grid.ra)
+    np.testing.assert_array_equal(cached.times, grid.times)
+    assert cache.hits == 1
+
+
+def test_manifest_survives_reopening(cache):
+    cache.put("MEERKAT", date(2025, 6, 27), "abc", make_grid())
+
+    reopened = EphemerisCache(cache.root, step_seconds=cache.step_seconds)
+    assert reopened.get("MEERKAT", date(2025, 6, 27), "abc") is not None
+    assert reopened.total_bytes == cache.total_bytes
+
+
+def test_lru_eviction_by_total_size(cache):
+    cache.put("MEERKAT", date(2025, 6, 27), "a", make_grid())
+    cache.max_bytes = int(cache.total_bytes * 2.5)
+    cache.put("MEERKAT", date(2025, 6, 28), "a", make_grid(day="2025-06-28"))
+
+    # touch the oldest partition so that the second one becomes least recently used
+    cache.get("MEERKAT", date(2025, 6, 27), "a")
+    cache.put("MEERKAT", date(2025, 6, 29), "a", make_grid(day="2025-06-29"))
+
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.get("MEERKAT", date(2025, 6, 27), "a") is not None
+    assert cache.get("MEERKAT", date(2025, 6, 28), "a") is None
+    assert not (cache.root / "MEERKAT" / "2025-06-28").joinpath("a").exists()
+
+
+def test_partition_larger_than_the_cache(cache):
+    cache.max_bytes = 100
+    with pytest.raises(ValueError, match="max_bytes"):
+        cache.put("MEERKAT", date(2025, 6, 27), "a", make_grid())
+    assert list((cache.root / "MEERKAT" / "2025-06-27").iterdir()) == []
+
+def test_cold_window_is_one_miss(cache, monkeypatch):
+    from rfi_matcher.utils import ephemeris_cache
+    monkeypatch.setattr(ephemeris_cache, "compute_ephemeris", lambda *args: make_grid())
+
+    grid = cache.get_or_compute("MEERKAT", date(2025, 6, 27), ["1 A"], ["2 A"], -30.7, 21.4)
+    assert isinstance(grid.ra, np.memmap)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+def test_concurrent_caches_share_the_manifest(cache):
+    other = EphemerisCache(cache.root, max_bytes=cache.max_bytes, step_seconds=cache.step_seconds)
+    cache.put("MEERKAT", date(2025, 6, 27), "a", make_grid())
+    other.put("MEERKAT", date(2025, 6, 28), "a", make_grid(day="2025-06-28"))
+    cache.put("MEERKAT", date(2025, 6, 29), "a", make_grid(day="2025-06-29"))
+
+    reopened = EphemerisCache(cache.root, step_seconds=cache.step_seconds)
+    assert len(reopened._entries) == 3
+    assert reopened.total_bytes == cache.total_bytes
+
+    # the size cap covers the partitions written by the other process too
+    cache.max_bytes = int(cache.total_bytes * 0.8)
+    cache.flush()
+    assert cache.total_bytes <= cache.max_bytes
+    assert not (cache.root / "MEERKAT" / "2025-06-27" / "a").exists()
+    assert (cache.root / "MEERKAT" / "2025-06-29" / "a").exists()
+
+def test_tle_hash_ignores_order():
+    line1, line2 = ["1 A", "1 B"], ["2 A", "2 B"]
+    assert EphemerisCache.tle_hash(line1, line2) == EphemerisCache.tle_hash(line1[::-1], line2[::-1])
+
+
+@pytest.mark.parametrize("mainbeam", [True, False])
+def test_cached_screening_matches_sopp(catalogue, tmp_path, mainbeam):
+    # a coarse cache step: the cached grid only prefilters, Sopp decides at its own resolution
+    tle_file, frequency_file = catalogue
+    cache = EphemerisCache(tmp_path / "cache", step_seconds=60.0)
+    observations = synthetic.observations(n_tracks=2, tracks_per_observation=2, duration_s=600, seed=5)
+    metrics = Metrics()
+
+    def keys(windows):
+        return sorted((sat.tle_information.satellite_number, begin, end) for sat, begin, end in windows)
+
+    for _, obs in observations.iterrows():
+        sopp = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=mainbeam, concurrency_level=1,
+                                          path_finder_class=OFFLINE)
+        cached = sopp_utils.get_rfi_windows_from_cache(obs, cache, tle_file, frequency_file,
+                                                       mainbeam=mainbeam, metrics=metrics, path_finder_class=OFFLINE)
+        assert keys(cached) == keys(sopp)
+        assert sopp or mainbeam
+
+    screened = metrics.get("satellites_screened", observatory="MEERKAT")
+    assert metrics.get("satellites_fine_screened", observatory="MEERKAT") < screened
@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pytest
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.frequency_catalogue import FrequencyCatalogue, compile_frequency_catalogue
+from rfi_matcher.utils.metrics import Metrics
+
+
+# the antenna pointing without downloading the de421 ephemeris
+OFFLINE = sopp_utils.ObservationPathFinderOffline
+
+
+CSV = """,ID,Name,Frequency [MHz],Bandwidth [kHz]/Baud,Status,Description,Source,Orbit
+0,43466,1KUNS-PF,437.3015,1200.0,inactive,Telemetry (drifting),SatNOGS,None
+1,43466,1KUNS-PF,2400.0,9600.0,inactive,TLM GMSK 9k6,SatNOGS,LEO
+2,44316,2019-032G,401.305,None,active,Downlink,SatNOGS,None
+3,5,VANGUARD 1,None,None,Active,None,Space-Track,MEO
+4,None,BROKEN,100.0,None,active,Downlink,SatNOGS,None
+"""
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "satellite_frequencies.csv"
+    path.write_text(CSV)
+    return path
+
+
+def test_compiled_columns(csv):
+    catalogue = FrequencyCatalogue.load(compile_frequency_catalogue(csv))
+
+    assert isinstance(catalogue.norad, np.memmap)
+    assert catalogue.norad.tolist() == [5, 43466, 43466, 44316]
+    assert catalogue.ids.tolist() == [5, 43466, 44316]
+    assert np.isnan(catalogue.frequency_mhz[0]) and np.isnan(catalogue.bandwidth_mhz[3])
+    assert catalogue.bandwidth_mhz[1:3].tolist() == [1.2, 9.6]
+    assert catalogue.transmitters(44316) == [{
+        "frequency_mhz": 401.305, "bandwidth_mhz": None, "status": "active", "orbit": None, "description": "Downlink",
+    }]
+    assert catalogue.transmitters(99999) == []
+
+def test_recompiled_when_the_csv_changes(csv):
+    assert len(FrequencyCatalogue.cached(csv)) == 4
+    csv.write_text(CSV + "5,44316,2019-032G,402.0,None,active,Downlink,SatNOGS,None\n")
+    os.utime(csv, ns=(0, csv.stat().st_mtime_ns + 10**9))
+    assert len(FrequencyCatalogue.cached(csv)) == 5
+
+def test_saved_over_a_stale_old_directory(csv, tmp_path):
+    catalogue = FrequencyCatalogue.cached(csv)
+    path = tmp_path / "copy.freqcat"
+    catalogue.save(path)
+    (tmp_path / "copy.freqcat.old").mkdir()
+    (tmp_path / "copy.freqcat.old" / "ids.npy").write_bytes(b"")
+
+    catalogue.save(path)
+    assert FrequencyCatalogue.load(path).ids.tolist() == catalogue.ids.tolist()
+    assert not (tmp_path / "copy.freqcat.old").exists()
+
+def test_in_band(csv):
+    catalogue = FrequencyCatalogue.cached(csv)
+    ids = [5, 43466, 44316, 12345]
+    # 2.4 GHz band: the second 43466 downlink is inactive, only satellites of unknown frequencies
+    assert catalogue.transmitting_in_band(ids, 2400e6, 10e6).tolist() == [True, False, False, True]
+    assert catalogue.in_band(2400e6, 10e6).tolist() == [False, False, True, False]
+    # 44316 has no bandwidth: Sopp's default width puts its 401.305 MHz downlink in band
+    assert catalogue.transmitting_in_band(ids, 400e6, 1e6, include_unknown=False).tolist() == [False, False, True, False]
+    assert [t["description"] for t in catalogue.transmitters(43466, 437.3e6, 1e6)] == ["Telemetry (drifting)"]
+
+def test_in_band_matches_sopp_frequency_filter(tmp_path):
+    import pandas as pd
+    from sopp.custom_dataclasses.frequency_range.frequency_range import FrequencyRange
+    from sopp.satellites_filter.filters import filter_frequency
+
+    tles = synthetic.tle_catalogue(80, seed=5)
+    frequency_file = synthetic.write_frequency_file(tmp_path / "f.csv", tles, frequency_mhz=(400, 500), seed=5)
+    df = pd.read_csv(frequency_file, index_col=0)
+    rng = np.random.default_rng(5)
+    df.loc[rng.random(len(df)) < 0.3, "Status"] = "inactive"
+    df.loc[rng.random(len(df)) < 0.3, "Bandwidth [kHz]/Baud"] = None
+    df.loc[rng.random(len(df)) < 0.05, "Frequency [MHz]"] = None
+    df = df[rng.random(len(df)) > 0.1]      # satellites without any transmitter
+    df.to_csv(frequency_file)
+
+    catalogue = FrequencyCatalogue.cached(frequency_file)
+    satellites = sopp_utils._satellites(None, synthetic.write_tle_file(tmp_path / "s.tle", tles), frequency_file)
+    ids = [s.tle_information.satellite_number for s in satellites]
+    # bands around the transmitters and touching their edges, as well as arbitrary ones
+    row = df.dropna(subset=["Frequency [MHz]", "Bandwidth [kHz]/Baud"]).iloc[0]
+    edge = row["Frequency [MHz]"] + row["Bandwidth [kHz]/Baud"] / 1000
+    bands = [(edge + 1, 2), (edge - 1, 2)] + list(zip(rng.uniform(390, 510, 40), rng.uniform(0.01, 20, 40)))
+
+    for frequency_mhz, bandwidth_mhz in bands:
+        sopp = filter_frequency(FrequencyRange(frequency=frequency_mhz, bandwidth=bandwidth_mhz))
+        keep = catalogue.transmitting_in_band(ids, frequency_mhz * 1e6, bandwidth_mhz * 1e6)
+        assert keep.tolist() == [sopp(s) for s in satellites]
+
+def test_arrays_rebuild_sopp_satellites(tmp_path):
+    tles = synthetic.tle_catalogue(20, seed=2)
+    frequency_file = synthetic.write_frequency_file(tmp_path / "f.csv", tles)
+    arrays = FrequencyCatalogue.cached(frequency_file).arrays()
+    arrays.update(tle_names=np.array([n.encode() for n, _, _ in tles]),
+                  tle_line1=np.array([l1.encode() for _, l1, _ in tles]),
+                  tle_line2=np.array([l2.encode() for _, _, l2 in tles]))
+
+    satellites = sopp_utils.satellites_from_catalogue(arrays)
+    loaded = sopp_utils._satellites(None, synthetic.write_tle_file(tmp_path / "s.tle", tles), frequency_file)
+    assert [[f.frequency for f in s.frequency] for s in satellites] == [[f.frequency for f in s.frequency] for s in loaded]
+
+def test_catalogue_satellites_are_built_for_the_candidates_only(tmp_path, monkeypatch):
+    tles = synthetic.tle_catalogue(60, seed=4)
+    frequency_file = synthetic.write_frequency_file(tmp_path / "f.csv", tles)
+    catalogue = FrequencyCatalogue.cached(frequency_file)
+    arrays = catalogue.arrays()
+    arrays.update(tle_names=np.array([n.encode() for n, _, _ in tles]),
+                  tle_line1=np.array([l1.encode() for _, l1, _ in tles]),
+                  tle_line2=np.array([l2.encode() for _, _, l2 in tles]))
+    obs = synthetic.observations(n_tracks=1, duration_s=600, seed=1).iloc[0]
+
+    lazy = sopp_utils.CatalogueSatellites(arrays)
+    assert [s.tle_information.satellite_number for s in lazy] == lazy.norad_ids.tolist()
+    assert lazy.select(lazy.norad_ids % 2 == 0).norad_ids.tolist() == [n for n in lazy.norad_ids if n % 2 == 0]
+
+    expected = sopp_utils.get_rfi_windows(obs, mainbeam=False, concurrency_level=1,
+                                          satellites=sopp_utils.satellites_from_catalogue(arrays),
+                                          frequency_catalogue=catalogue, path_finder_class=OFFLINE)
+    built = []
+    getitem = sopp_utils.CatalogueSatellites.__getitem__
+    monkeypatch.setattr(sopp_utils.CatalogueSatellites, "__getitem__",
+                        lambda self, k: built.append(self.norad_ids[k]) or getitem(self, k))
+    windows = sopp_utils.get_rfi_windows(obs, mainbeam=False, concurrency_level=1, satellites=lazy,
+                                         frequency_catalogue=catalogue, path_finder_class=OFFLINE)
+    in_band = catalogue.transmitting_in_band(lazy.norad_ids, obs["frequency"], obs["bandwidth"])
+    assert windows == expected
+    assert sorted(built) == sorted(lazy.norad_ids[in_band])
+
+def test_prefilter_keeps_only_satellites_in_band(tmp_path):
+    tles = synthetic.tle_catalogue(60, seed=4)
+    tle_file = synthetic.write_tle_file(tmp_path / "s.tle", tles)
+    frequency_file = synthetic.write_frequency_file(tmp_path / "f.csv", tles)
+    catalogue = FrequencyCatalogue.cached(frequency_file)
+    obs = synthetic.observations(n_tracks=1, duration_s=600, seed=1).iloc[0]
+    metrics = Metrics()
+
+    everything = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=False, concurrency_level=1,
+                                            path_finder_class=OFFLINE)
+    in_band = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=False, concurrency_level=1,
+                                         frequency_catalogue=catalogue, metrics=metrics, path_finder_class=OFFLINE)
+
+    keep = catalogue.transmitting_in_band([s.tle_information.satellite_number for s, _, _ in everything],
+                                          obs["frequency"], obs["bandwidth"])
+    assert [w for w, k in zip(everything, keep) if k] == in_band
+    assert 0 < len(in_band) < len(everything)
+    assert metrics.get("satellites_in_band", observatory="MEERKAT") < 60
+
+def test_matcher_annotates_transmitters(csv):
+    observations = synthetic.observations(n_tracks=2)
+    observations["frequency"] = 2400e6
+    observations["bandwidth"] = 10e6
+    observations["NORAD"] = [[{"sat": "1KUNS-PF", "norad": 43466}], []]
+
+    result = RfiMatcher(frequency_catalogue=FrequencyCatalogue.cached(csv)).annotate_transmitters(observations)
+    assert result["TRANSMITTERS"].tolist() == [[{
+        "sat": "1KUNS-PF", "norad": 43466,
+        "transmitters": [{"frequency_mhz": 2400.0, "bandwidth_mhz": 9.6, "status": "inactive",
+                          "orbit": "LEO", "description": "TLM GMSK 9k6"}],
+    }], []]
@@ -0,0 +1,146 @@
+import asyncio
+import io
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+from rfi_matcher.utils.http_client import (CircuitBreaker, CircuitOpenError, HttpClient, RetryPolicy,
+                                           TokenBucket, classify)
+from rfi_matcher.utils.metrics import Metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _client(clock, **kwargs):
+    kwargs.setdefault("retry", RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=8.0))
+    return HttpClient(clock=clock, sleep=clock.sleep, metrics=Metrics(), **kwargs)
+
+def _http_error(status, retry_after=None):
+    headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+    return HTTPError("https://archive.example/api", status, "error", headers, io.BytesIO())
+
+def _failing(errors, result="ok"):
+    errors = list(errors)
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn
+
+
+# ---------- RATE LIMITING ----------
+
+def test_token_bucket_bursts_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert [bucket.reserve() for _ in range(2)] == [0.5, 1.0]
+    clock.now = 10
+    assert bucket.reserve() == 0
+
+def test_requests_paced_per_host():
+    clock = FakeClock()
+    client = _client(clock, rates={"a.example": (1.0, 1)})
+    for _ in range(3):
+        client.call("https://a.example/x", lambda: None)
+        client.call("https://b.example/x", lambda: None)
+    assert clock.now == pytest.approx(2.0)
+
+
+# ---------- RETRIES ----------
+
+def test_classify():
+    assert classify(_http_error(503, 7)) == (True, 503, 7.0)
+    assert classify(_http_error(404)) == (False, 404, None)
+    assert classify(URLError("connection refused"))[0]
+    assert not classify(ValueError("bad json"))[0]
+
+def test_transient_errors_retried_with_retry_after():
+    clock = FakeClock()
+    client = _client(clock)
+    fn = _failing([_http_error(429, retry_after=20), URLError("reset")])
+
+    assert client.call("https://a.example/x", fn) == "ok"
+    assert clock.now >= 20
+    assert client.metrics.get("http_retries", host="a.example") == 2
+
+def test_client_errors_not_retried():
+    clock = FakeClock()
+    client = _client(clock)
+    with pytest.raises(HTTPError):
+        client.call("https://a.example/x", _failing([_http_error(404)]))
+    assert client.metrics.get("http_retries", host="a.example") is None
+
+def test_async_calls_retried():
+    client = _client(FakeClock(), retry=RetryPolicy(max_attempts=3, base_delay=0.001))
+    errors = [ConnectionError("reset")]
+
+    async def fn():
+        if errors:
+            raise errors.pop()
+        return 42
+
+    assert asyncio.run(client.call_async("https://a.example/graphql", fn)) == 42
+
+
+# ---------- CIRCUIT BREAKING ----------
+
+def test_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 30
+    assert breaker.allow() and not breaker.allow()      # a single trial request
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_half_open_trial_keeps_its_retries():
+    clock = FakeClock()
+    client = _client(clock, failure_threshold=1, reset_timeout=30)
+    with pytest.raises(HTTPError):
+        client.call("https://a.example/x", _failing([_http_error(503)] * 4))
+    assert client.breaker("a.example").state == "open"
+
+    # the trial request fails once, then succeeds on its retry
+    clock.now += 31
+    assert client.call("https://a.example/x", _failing([_http_error(503)])) == "ok"
+    assert client.breaker("a.example").state == "closed"
+    assert client.call("https://a.example/x", lambda: "again") == "again"
+
+def test_abandoned_trial_is_released():
+    clock = FakeClock()
+    client = _client(clock, failure_threshold=1, reset_timeout=30)
+    with pytest.raises(HTTPError):
+        client.call("https://a.example/x", _failing([_http_error(503)] * 4))
+    clock.now += 31
+
+    # the trial request is interrupted without outcome: the next request gets the trial
+    with pytest.raises(KeyboardInterrupt):
+        client.call("https://a.example/x", _failing([KeyboardInterrupt()]))
+    assert client.call("https://a.example/x", lambda: "ok") == "ok"
+    assert client.breaker("a.example").state == "closed"
+
+def test_open_circuit_fails_fast():
+    clock = FakeClock()
+    client = _client(clock, failure_threshold=1, retry=RetryPolicy(max_attempts=2, base_delay=0.1))
+    with pytest.raises(HTTPError):
+        client.call("https://a.example/x", _failing([_http_error(503)] * 2))
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        client.call("https://a.example/x", lambda: calls.append(1))
+    assert calls == []
+    assert client.metrics.get("http_circuit_open", host="a.example") == 1
@@ -0,0 +1,40 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+
+# Cold import budget of the core API in seconds (override on slow machines)
+IMPORT_BUDGET = float(os.getenv("RFI_MATCHER_IMPORT_BUDGET", "0.5"))
+
+CORE_MODULES = ["rfi_matcher.rfi_matcher", "rfi_matcher.model.rfi_filter"]
+
+HEAVY_MODULES = ["pandas", "sopp", "skyfield", "astropy", "spacetrack", "dotenv", "gql", "aiohttp", "scipy", "katdal", "matplotlib"]
+
+
+def cold_import(module: str):
+    """Import ``module`` in a fresh interpreter, return (-X importtime seconds, loaded modules)."""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+
+    pattern = re.compile(rf"import time:\s*\d+ \|\s*(\d+) \| {re.escape(module)}$", re.MULTILINE)
+    cumulative_us = int(pattern.search(result.stderr).group(1))
+    return cumulative_us / 1e6, set(result.stdout.strip().split(","))
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_cold_import_within_budget(module):
+    seconds, _ = cold_import(module)
+    assert seconds < IMPORT_BUDGET, f"import {module} took {seconds:.3f}s (budget {IMPORT_BUDGET}s)"
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_heavy_dependencies_are_deferred(module):
+    _, loaded = cold_import(module)
+    eager = [m for m in HEAVY_MODULES if m in loaded]
+    assert not eager, f"import {module} eagerly loads {eager}"
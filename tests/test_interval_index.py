@@ -0,0 +1,40 @@
+import numpy as np
+
+from rfi_matcher.utils.interval_index import IntervalIndex
+
+
+def _random_intervals(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = np.datetime64("2025-06-27T00:00:00", "ns") + rng.integers(0, 86400, n).astype("timedelta64[s]")
+    ends = starts + rng.integers(0, 1800, n).astype("timedelta64[s]")
+    return starts, ends
+
+
+def test_overlap_matches_brute_force():
+    starts, ends = _random_intervals()
+    index = IntervalIndex(starts, ends, values=np.arange(len(starts)) + 1000)
+    rng = np.random.default_rng(1)
+
+    for _ in range(50):
+        begin = np.datetime64("2025-06-27T00:00:00", "ns") + np.timedelta64(int(rng.integers(0, 86400)), "s")
+        end = begin + np.timedelta64(int(rng.integers(0, 3600)), "s")
+        expected = np.flatnonzero((starts <= end) & (ends >= begin)) + 1000
+
+        values, found_starts, found_ends = index.query(begin, end)
+        assert sorted(values) == sorted(expected)
+        assert ((found_starts <= end) & (found_ends >= begin)).all()
+
+def test_containing_instant_and_empty_index():
+    index = IntervalIndex([0, 5, 10], [4, 20, 12])
+    assert sorted(index.values[index.containing(11)]) == [1, 2]
+    assert len(IntervalIndex([], []).overlapping(0, 10)) == 0
+
+def test_save_load(tmp_path):
+    starts, ends = _random_intervals(50)
+    index = IntervalIndex(starts, ends)
+    index.save(tmp_path / "index.npz")
+
+    loaded = IntervalIndex.load(tmp_path / "index.npz")
+    np.testing.assert_array_equal(loaded.starts, index.starts)
+    np.testing.assert_array_equal(loaded.values, index.values)
+    assert loaded.longest == index.longest
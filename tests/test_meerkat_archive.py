@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from rfi_matcher.model.data_archives import meerkat_data_archive
+from rfi_matcher.model.data_archives.meerkat_data_archive import MeerkatDataArchive
+from rfi_matcher.model.rfi_filter import RaFilter
+from rfi_matcher.utils import synthetic
+
+
+def _archive(records, **settings):
+    flt = RaFilter().set_start_time("2025-06-27T00:00:00.0").set_end_time("2025-06-28T00:00:00.0")
+    for name, value in settings.items():
+        getattr(flt, f"set_{name}")(value)
+    archive = MeerkatDataArchive(flt)
+    archive.get_raw_observations = lambda num=1: records
+    return archive
+
+
+# ---------- SERVER FILTERS ----------
+
+def test_server_filters():
+    archive = _archive(None, frequencies=[900, 1500])
+    assert archive.server_filters() == ["Band=ULF,L", "from=2025-06-27", "to=2025-06-28"]
+
+    archive.ra_filter.set_sky_region(-10, -30, 5)
+    radec = archive.server_filters()[-1]
+    assert radec.startswith("radec=") and json.loads(radec[6:]) == [350.0, -30.0, 5.0]
+
+def test_requested_fields_are_consumed():
+    # no Bandwidth: derived from the band edges
+    records = synthetic.meerkat_records(2)
+    assert set(meerkat_data_archive.FIELDS) == set(records.columns)
+
+
+# ---------- PREFILTER ----------
+
+def test_prefilter_frequency_and_time():
+    records = synthetic.meerkat_records(30, seed=3)
+    archive = _archive(records, frequencies=[1000, 2000],
+                       start_time="2025-06-27T06:00:00.0", end_time="2025-06-27T12:00:00.0")
+    kept = archive.prefilter(records)
+
+    start = pd.to_datetime(records["StartTime"]).dt.tz_localize(None)
+    end = start + pd.to_timedelta(records["Duration"], unit="s")
+    expected = (records["MaxFreq"] >= 1000e6) & (records["MinFreq"] <= 2000e6) \
+        & (start <= pd.Timestamp("2025-06-27T12:00")) & (end >= pd.Timestamp("2025-06-27T06:00"))
+    assert 0 < len(kept) < len(records)
+    assert kept.index.tolist() == records.index[expected].tolist()
+
+def test_prefilter_sky_region():
+    records = synthetic.meerkat_records(20, seed=4)
+    dec, ra = (float(v) for v in records["DecRa"][0][0].split(","))
+    archive = _archive(records)
+    archive.ra_filter.set_sky_region(ra, dec, 1)
+    kept = archive.prefilter(records)
+    assert 0 in kept.index and len(kept) < len(records)
+
+
+# ---------- TRACKS ----------
+
+def test_prefilter_does_not_change_tracks():
+    records = synthetic.meerkat_records(20, seed=5)
+    archive = _archive(records, frequencies=[1000, 2000],
+                       start_time="2025-06-27T06:00:00.0", end_time="2025-06-27T12:00:00.0")
+    observations = archive.get_observations()
+
+    # same as parsing every record, then filtering the tracks
+    archive.prefilter = lambda df: df
+    everything = archive.get_observations()
+    assert len(observations) > 0
+    pd.testing.assert_frame_equal(observations.reset_index(drop=True), everything.reset_index(drop=True))
+
+def test_tracks_within_window():
+    records = synthetic.meerkat_records(10, seed=6)
+    archive = _archive(records, start_time="2025-06-27T06:00:00.0", end_time="2025-06-27T12:00:00.0")
+    observations = archive.get_observations()
+
+    begin, end = pd.to_datetime(observations["begin"]), pd.to_datetime(observations["end"])
+    assert (end >= pd.Timestamp("2025-06-27T06:00")).all()
+    assert (begin <= pd.Timestamp("2025-06-27T12:00")).all()
+    assert np.allclose(observations["bandwidth"] % 1e6, 0)
+
+def test_no_tracks_left():
+    records = synthetic.meerkat_records(5, seed=7)
+    archive = _archive(records, start_time="2026-01-01T00:00:00.0", end_time="2026-01-02T00:00:00.0")
+    observations = archive.get_observations()
+    assert observations.empty and observations.columns.tolist() == archive.get_df_order()
@@ -0,0 +1,75 @@
+import json
+import logging
+
+import pytest
+
+from rfi_matcher.model.rfi_filter import RaFilter
+from rfi_matcher.model.data_archives.meerkat_data_archive import MeerkatDataArchive
+from rfi_matcher.utils.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+def test_stage_records_wall_time(metrics):
+    for _ in range(2):
+        with metrics.stage("rfi_sources", observatory="MEERKAT"):
+            pass
+
+    stage = metrics.get("rfi_sources", observatory="MEERKAT")
+    assert stage["count"] == 2
+    assert stage["sum"] >= stage["max"] >= stage["min"] >= 0
+
+def test_failed_request_is_counted(metrics):
+    with pytest.raises(RuntimeError):
+        with metrics.time("archive_request", archive="MEERKAT"):
+            raise RuntimeError("timeout")
+
+    assert metrics.get("archive_request", archive="MEERKAT")["count"] == 1
+    assert metrics.get("archive_request_errors", archive="MEERKAT") == 1
+
+def test_counters_and_gauges(metrics):
+    metrics.count("rows_processed")
+    metrics.count("rows_processed", 4)
+    metrics.gauge("ephemeris_cache_hits", 3)
+    metrics.gauge("ephemeris_cache_hits", 5)
+
+    assert metrics.get("rows_processed") == 5
+    assert metrics.get("ephemeris_cache_hits") == 5
+    assert metrics.get("missing") is None
+    assert json.loads(metrics.to_json())["counters"] == [{"name": "rows_processed", "labels": {}, "value": 5}]
+
+def test_prometheus_text(metrics, tmp_path):
+    with metrics.stage("get_observations", archive='ALMA "1"'):
+        pass
+    metrics.count("satellites_screened", 1000, observatory="MEERKAT")
+
+    path = tmp_path / "metrics" / "rfi_matcher.prom"
+    metrics.write_prometheus(path)
+    text = path.read_text()
+
+    assert "# TYPE rfi_matcher_get_observations_stage_seconds summary" in text
+    assert 'rfi_matcher_get_observations_stage_seconds_count{archive="ALMA \\"1\\""} 1' in text
+    assert 'rfi_matcher_satellites_screened_total{observatory="MEERKAT"} 1000.0' in text
+
+def test_json_log_per_stage(metrics, caplog):
+    with caplog.at_level(logging.INFO, logger="rfi_matcher.metrics"):
+        with metrics.stage("get_all_sat_proximities"):
+            pass
+
+    event = json.loads(caplog.records[-1].getMessage())
+    assert event["event"] == "stage"
+    assert event["name"] == "get_all_sat_proximities"
+
+def test_archive_requests_are_timed(metrics):
+    archive = MeerkatDataArchive(RaFilter())
+    with archive.request_timer():
+        pass
+    assert metrics.get("archive_request", archive="MEERKAT") is None
+
+    archive.metrics = metrics
+    with archive.request_timer():
+        pass
+    assert metrics.get("archive_request", archive="MEERKAT")["count"] == 1
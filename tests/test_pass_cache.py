@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.pass_cache import PassCache
+
+
+# the antenna pointing without downloading the de421 ephemeris
+OFFLINE = sopp_utils.ObservationPathFinderOffline
+
+
+def test_horizon_passes_match_sopp(make_catalogue, tmp_path):
+    tle_file, frequency_file = make_catalogue(80, seed=2)
+    observations = synthetic.observations(n_tracks=3, tracks_per_observation=3, duration_s=600, seed=4)
+    cache = PassCache(tmp_path)
+
+    for _, obs in observations.iterrows():
+        sopp = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=False, concurrency_level=1,
+                                          path_finder_class=OFFLINE)
+        passes = sopp_utils.get_rfi_windows(obs, tle_file, frequency_file, mainbeam=False, pass_cache=cache)
+
+        by_norad = {sat.tle_information.satellite_number: (b, e) for sat, b, e in passes}
+        assert sorted(by_norad) == sorted(sat.tle_information.satellite_number for sat, _, _ in sopp)
+        for sat, begin, end in sopp:
+            # Sopp samples every second
+            pass_begin, pass_end = by_norad[sat.tle_information.satellite_number]
+            assert abs((pass_begin - begin).total_seconds()) <= 1.5
+            assert abs((pass_end - end).total_seconds()) <= 1.5
+
+    # the whole session is answered from a single day of predictions
+    assert cache.misses == 1
+
+def test_no_satellites(tmp_path):
+    obs = synthetic.observations(n_tracks=1, tracks_per_observation=1).iloc[0]
+    assert sopp_utils.get_rfi_windows(obs, mainbeam=False, satellites=[], pass_cache=PassCache(tmp_path)) == []
+
+def test_days_are_reloaded_from_disk(make_catalogue, tmp_path):
+    catalogue = make_catalogue(80, seed=2)
+    meerkat = ARCHIVE_CLASSES["MEERKAT"]
+    cache = PassCache(tmp_path)
+    line1, line2, tle_hash = cache.catalogue(catalogue[0])
+    args = (line1, line2, meerkat.latitude, meerkat.longitude, meerkat.elevation, tle_hash)
+    passes = cache.passes("MEERKAT", date(2025, 6, 27), *args)
+
+    reopened = PassCache(tmp_path)
+    reloaded = reopened.passes("MEERKAT", date(2025, 6, 27), *args)
+    assert (reopened.hits, reopened.misses) == (1, 0)
+    np.testing.assert_array_equal(reloaded.rise, passes.rise)
+    np.testing.assert_array_equal(reloaded.norad, passes.norad)
+    assert (passes.rise <= passes.set).all()
+
+def test_passes_across_midnight_are_joined(tmp_path):
+    meerkat = ARCHIVE_CLASSES["MEERKAT"]
+    tles = synthetic.tle_catalogue(5, orbit_mix={"geo": 1}, seed=0)
+    line1, line2 = [t[1] for t in tles], [t[2] for t in tles]
+    cache = PassCache(None)
+
+    norad, begin, end = cache.window("MEERKAT", datetime(2025, 6, 27, 23, 50), datetime(2025, 6, 28, 0, 10),
+                                     line1, line2, meerkat.latitude, meerkat.longitude, meerkat.elevation, "geo")
+    visible = cache.passes("MEERKAT", date(2025, 6, 27), line1, line2, meerkat.latitude,
+                           meerkat.longitude, meerkat.elevation, "geo")
+    # a GEO satellite above the horizon stays up all day: one window per satellite
+    assert 0 < len(norad) == len(set(norad)) == len(set(visible.norad))
+    assert (begin == np.datetime64("2025-06-27T23:50")).all()
+    assert (end == np.datetime64("2025-06-28T00:10")).all()
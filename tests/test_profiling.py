@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from rfi_matcher.utils.metrics import Metrics
+from rfi_matcher.utils.profiling import Profiler, collapsed_from_pstats
+
+
+def busy(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sampling"])
+def test_stage_writes_collapsed_stacks(tmp_path, mode):
+    metrics = Metrics(profiler=Profiler(tmp_path, mode=mode, interval=0.001))
+    with metrics.stage("get_rfi_sources", observatory="MEERKAT"):
+        busy()
+
+    result, = metrics.profiler.results
+    lines = (tmp_path / "get_rfi_sources.observatory-MEERKAT.1.collapsed").read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy (test_profiling:" in line for line in lines)
+
+    assert result["tracemalloc_peak_bytes"] >= 0
+    assert result["peak_rss_bytes"] > 0
+    assert json.loads((tmp_path / "summary.json").read_text())[0]["stage"] == "get_rfi_sources"
+
+def test_only_selected_and_outermost_stages(tmp_path):
+    metrics = Metrics(profiler=Profiler(tmp_path, mode=None, stages=["outer", "inner"]))
+    with metrics.stage("outer"):
+        with metrics.stage("inner"):
+            pass
+    with metrics.stage("other"):
+        pass
+
+    assert [r["stage"] for r in metrics.profiler.results] == ["outer"]
+    assert metrics.get("inner")["count"] == 1
+
+@pytest.mark.parametrize("mode", ["cprofile", None])
+def test_overlapping_threaded_stages(tmp_path, mode):
+    metrics = Metrics(profiler=Profiler(tmp_path, mode=mode))
+    first_started, second_done = threading.Event(), threading.Event()
+    errors = []
+
+    def first():
+        with metrics.stage("get_observations", observatory="MEERKAT"):
+            first_started.set()
+            second_done.wait(5)     # still running when the second stage ends
+            busy(0.01)
+
+    def second():
+        first_started.wait(5)
+        try:
+            with metrics.stage("get_observations", observatory="NRAO"):
+                busy(0.01)
+        except Exception as e:
+            errors.append(e)
+        second_done.set()
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    results = {r["labels"]["observatory"]: r for r in metrics.profiler.results}
+    assert set(results) == {"MEERKAT", "NRAO"}
+    assert results["NRAO"]["tracemalloc_overlapping"]
+    assert not tracemalloc.is_tracing()
+    if mode == "cprofile":
+        assert "cprofile" in results["MEERKAT"] and "cprofile_skipped" in results["NRAO"]
+
+def test_from_env(monkeypatch, tmp_path):
+    assert Profiler.from_env() is None
+
+    monkeypatch.setenv("RFI_MATCHER_PROFILE", "memory:get_rfi_sources, export")
+    monkeypatch.setenv("RFI_MATCHER_PROFILE_DIR", str(tmp_path))
+    profiler = Profiler.from_env()
+    assert profiler.mode is None
+    assert profiler.stages == {"get_rfi_sources", "export"}
+    assert profiler.output_dir == tmp_path
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError, match="Profiling mode"):
+        Profiler(tmp_path, mode="perf")
+
+def test_collapsed_from_pstats_accounts_own_time():
+    import cProfile
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    busy(0.02)
+    profile.disable()
+
+    stacks = collapsed_from_pstats(pstats.Stats(profile))
+    total_own = sum(entry[2] for entry in pstats.Stats(profile).stats.values())
+    assert sum(stacks.values()) == pytest.approx(total_own * 1e6, rel=0.05)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+
+
+def test_results_attached_without_touching_the_input(monkeypatch):
+    observations = synthetic.observations(n_tracks=5, duration_s=600)
+    observations.index = observations.index * 10
+    before = observations.copy()
+
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", lambda obs, **kwargs: [obs["begin"]])
+    result = RfiMatcher().extend_observations_with_rfi(observations, lim=20, satellites=[])
+
+    assert result.index.equals(observations.index)
+    assert result["NORAD"].tolist() == [[b] for b in observations["begin"][:3]] + [None, None]
+    assert "NORAD" not in observations.columns
+    assert observations.equals(before)
+    # the other columns are not copied, whatever the pandas version
+    assert np.shares_memory(result["frequency"].to_numpy(), observations["frequency"].to_numpy())
+
+def test_proximities_keep_rows_without_matches():
+    observations = synthetic.observations(n_tracks=3)
+    observations["NORAD"] = [[], None, []]
+    result = RfiMatcher().get_all_sat_proximities(observations)
+    assert result["NORAD"].tolist() == [[], None, []]
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rfi_matcher.model.result_index import ResultIndex
+from rfi_matcher.utils import synthetic
+
+
+def _results(n_tracks=600, seed=0):
+    results = synthetic.observations(n_tracks=n_tracks, tracks_per_observation=20, seed=seed)
+    # a second observatory, interleaved in time with the first one
+    results.loc[results.index[1::3], "name"] = "NRAO"
+    rng = np.random.default_rng(seed)
+    results["NORAD"] = [[{
+        "sat": f"SAT {n}",
+        "norad": int(n),
+        "timestamp": begin + "+00:00",
+        "declination": -30.0,
+        "right_ascension": 10.0,
+        "angular_distance": float(k),
+    } for k, n in enumerate(rng.choice(np.arange(25000, 25050), rng.integers(0, 4), replace=False))]
+        for begin in results["begin"]]
+    return results
+
+
+@pytest.fixture(scope="module")
+def results():
+    return _results()
+
+@pytest.fixture(scope="module")
+def index(results):
+    return ResultIndex.from_results(results)
+
+
+def _times(values):
+    return pd.to_datetime(values).to_numpy(dtype="datetime64[ns]")
+
+
+# ---------- QUERIES ----------
+
+def test_observations_of_matches_full_scan(index, results):
+    begin, end = "2025-06-27T06:00:00", "2025-06-27T12:00:00"
+    expected = sorted(
+        (i, m["angular_distance"]) for i, matches in enumerate(results["NORAD"]) for m in matches
+        if m["norad"] == 25007 and _times([results["end"][i]])[0] >= np.datetime64(begin)
+        and _times([results["begin"][i]])[0] <= np.datetime64(end)
+    )
+    found = index.observations_of(25007, begin, end)
+    assert 0 < len(found) < len(index.observations_of(25007))
+    assert sorted(zip(found["row"], found["angular_distance"])) == expected
+    assert (found["norad"] == 25007).all() and (found["sat"] == "SAT 25007").all()
+
+def test_observations_of_name(index):
+    by_name = index.observations_of("sat 25007")
+    pd.testing.assert_frame_equal(by_name, index.observations_of(25007))
+    assert index.observations_of(1).empty and index.observations_of("UNKNOWN").empty
+
+def test_observations_at(index, results):
+    t = results["begin"][300]
+    found = index.observations_at("MEERKAT", t)
+
+    begin, end = _times(results["begin"]), _times(results["end"])
+    expected = np.flatnonzero((results["name"] == "MEERKAT") & (begin <= np.datetime64(t)) & (end >= np.datetime64(t)))
+    assert sorted(found["row"]) == expected.tolist()
+    assert (found["observatory"] == "MEERKAT").all()
+    assert len(index.observations_at(None, "2025-06-01T00:00", "2025-08-01T00:00")) == len(results)
+
+def test_overhead(index, results):
+    t = results["begin"][301]
+    found = index.overhead(None, t)
+
+    rows = index.observations_at(None, t)["row"]
+    expected = sorted((i, m["norad"]) for i in rows for m in results["NORAD"][i])
+    assert len(found) > 0
+    assert sorted(zip(found["row"], found["norad"])) == expected
+
+
+# ---------- BUILDING AND STORAGE ----------
+
+def test_csv_and_save_load(tmp_path, index, results):
+    results.to_csv(tmp_path / "rfi_data.csv")
+    from_csv = ResultIndex.from_csv(tmp_path / "rfi_data.csv")
+    from_csv.save(tmp_path / "rfi_data.resultidx")
+    loaded = ResultIndex.load(tmp_path / "rfi_data.resultidx")
+
+    assert len(loaded) == len(index)
+    for query in (lambda i: i.observations_of(25011), lambda i: i.overhead("NRAO", "2025-06-27T03:00", "2025-06-27T05:00")):
+        pd.testing.assert_frame_equal(query(loaded), query(index))
+
+def test_save_over_leftovers_of_an_interrupted_save(tmp_path, index):
+    path = tmp_path / "rfi_data.resultidx"
+    index.save(path)
+    for leftover in ("rfi_data.resultidx.old", "rfi_data.resultidx.tmp"):
+        (tmp_path / leftover).mkdir()
+        (tmp_path / leftover / "meta.json").write_text("{}")
+
+    index.save(path)
+    assert len(ResultIndex.load(path)) == len(index)
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["rfi_data.resultidx"]
+
+def test_sopp_satellite_cells(tmp_path):
+    from sopp.custom_dataclasses.satellite.satellite import Satellite
+
+    tle_file = synthetic.write_tle_file(tmp_path / "sats.tle", synthetic.tle_catalogue(3))
+    satellites = Satellite.from_tle_file(str(tle_file))
+    results = synthetic.observations(n_tracks=3, tracks_per_observation=3)
+    results["NORAD"] = [satellites, satellites[:1], []]
+    results.to_csv(tmp_path / "rfi_data.csv")
+
+    index = ResultIndex.from_csv(tmp_path / "rfi_data.csv")
+    norad = satellites[0].tle_information.satellite_number
+    assert index.observations_of(norad)["row"].tolist() == [0, 1]
+    assert index.observations_of(satellites[1].name)["row"].tolist() == [0]
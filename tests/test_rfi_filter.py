@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+
+from rfi_matcher.model.rfi_filter import RaFilter, load_ra_observatories
+
+
+# ---------- FIXTURE ----------
+
+@pytest.fixture
+def obj():
+    return RaFilter()
+
+@pytest.fixture
+def df():
+    return load_ra_observatories()
+
+
+# ---------- TABLE LOADING ----------
+
+def test_table_is_shared_between_filters(obj):
+    assert RaFilter().ra_csv_df is obj.ra_csv_df
+    assert RaFilter().index is obj.index
+
+def test_table_is_stripped(df):
+    assert "stn_name" in df.columns
+    assert (df["stn_name"] == df["stn_name"].str.strip()).all()
+    assert "MEERKAT" in set(df["stn_name"])
+
+
+# ---------- FILTERING ----------
+
+def test_filter_matches_full_scan(obj, df):
+    obj.set_latitude([-40, 40]).set_longitude([-100, 150]).set_frequencies([500, 20000])
+    expected = df[
+        (df["lat_dec"] >= -40) & (df["lat_dec"] <= 40) &
+        (df["long_dec"] >= -100) & (df["long_dec"] <= 150) &
+        (df["freq_from"] >= 500) & (df["freq_to"] <= 20000)
+    ]
+    assert obj.filter_observatories().equals(expected)
+
+def test_filter_selected_observatories(obj):
+    obj.set_observatories(["MEERKAT", "NOT AN OBSERVATORY"])
+    assert obj.get_observatories() == ["MEERKAT"]
+
+@pytest.mark.parametrize("mode, expected", [
+    ("overlap", lambda df: (df["freq_from"] <= 1500) & (df["freq_to"] >= 1400)),
+    ("within", lambda df: (df["freq_from"] >= 1400) & (df["freq_to"] <= 1500)),
+    ("contains", lambda df: (df["freq_from"] <= 1400) & (df["freq_to"] >= 1500)),
+])
+def test_filter_frequencies(obj, df, mode, expected):
+    assert obj.filter_frequencies(1400, 1500, mode=mode).equals(df[expected(df)])
+
+def test_filter_frequencies_invalid_mode(obj):
+    with pytest.raises(ValueError, match="Frequency mode"):
+        obj.filter_frequencies(1400, 1500, mode="around")
+
+def test_sky_region(obj):
+    assert obj.sky_region is None
+    assert obj.set_sky_region(-10, -30, 5).sky_region == (350.0, -30.0, 5.0)
+    assert obj.set_sky_region(None, None, None).sky_region is None
+    with pytest.raises(ValueError, match="Radius"):
+        obj.set_sky_region(0, 0, 0)
+
+
+# ---------- SPATIAL AND NAME LOOKUPS ----------
+
+def test_nearest_observatories(obj):
+    nearest = obj.nearest_observatories(-30.7128, 21.4436, k=5)
+    assert len(nearest) == 5
+    assert np.all(np.diff(nearest["distance_km"].to_numpy()) >= 0)
+    assert nearest["distance_km"].iloc[0] < 10
+
+def test_observatories_near(obj):
+    near = obj.observatories_near(-30.7128, 21.4436, radius_km=50)
+    assert "MEERKAT" in set(near["stn_name"])
+    assert obj.observatories_near(0, -150, radius_km=10).empty
+
+def test_get_observatory_info(obj, df):
+    info = obj.get_observatory_info("MEERKAT")
+    assert info.equals(df[df["stn_name"] == "MEERKAT"])
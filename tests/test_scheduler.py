@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.scheduler import Scheduler
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("cores", 8)
+    kwargs.setdefault("memory_budget", 64 * 2**30)
+    return Scheduler(min_steps_per_process=100_000, **kwargs)
+
+
+# ---------- SIZING ----------
+
+def test_inner_concurrency_grows_with_track_length():
+    scheduler = _scheduler()
+    assert scheduler.inner_concurrency(60, 1000) == 1
+    assert scheduler.inner_concurrency(300, 1000) == 3
+    assert scheduler.inner_concurrency(1800, 1000) == 8      # capped by the cores
+    assert scheduler.inner_concurrency(1800, 4) == 1         # never more processes than satellites
+
+def test_memory_budget_caps_processes():
+    scheduler = _scheduler(memory_budget=3 * 2**30, process_bytes=2**30, satellite_bytes=0, position_bytes=0)
+    assert scheduler.max_processes() == 3
+    assert scheduler.inner_concurrency(1800, 1000) == 3
+
+def test_cores_from_environment(monkeypatch):
+    monkeypatch.setenv("RFI_MATCHER_CORES", "3")
+    assert Scheduler().cores == 3
+
+
+# ---------- PLANNING ----------
+
+def test_plan_never_oversubscribes():
+    scheduler = _scheduler()
+    durations = {i: 60 + 10 * i for i in range(40)}
+    durations["long"] = 3600
+    plan = scheduler.plan(durations, 100)
+
+    assert [t.key for t in plan.exclusive] == ["long"]
+    assert plan.exclusive[0].concurrency == 3
+    assert plan.outer_workers == 8
+    assert all(t.concurrency == 1 for batch in plan.batches for t in batch)
+    assert sorted(str(t.key) for t in plan.tasks) == sorted(str(k) for k in durations)
+
+    # short tracks are balanced over the batches
+    costs = [sum(t.cost for t in batch) for batch in plan.batches]
+    assert max(costs) - min(costs) <= max(t.cost for t in plan.tasks if t.key != "long")
+
+def test_little_work_stays_sequential():
+    plan = _scheduler().plan({0: 60, 1: 60, 2: 60}, 10)
+    assert plan.outer_workers == 1
+    assert [t.key for t in plan.batches[0]] == [0, 1, 2]
+
+
+# ---------- EXECUTION ----------
+
+def test_run_uses_outer_workers():
+    plan = _scheduler().plan({i: 60 for i in range(16)}, 1000)
+    threads = set()
+
+    def fn(key, concurrency):
+        threads.add(threading.get_ident())
+        time.sleep(0.01)
+        return key * 2
+
+    assert dict(_scheduler().run(plan, fn)) == {i: i * 2 for i in range(16)}
+    assert plan.outer_workers == 8
+    assert len(threads) > 1
+
+def test_run_raises_task_errors():
+    plan = _scheduler().plan({i: 60 for i in range(16)}, 1000)
+
+    def fn(key, concurrency):
+        if key == 5:
+            raise ValueError(key)
+        return key
+
+    with pytest.raises(ValueError):
+        list(_scheduler().run(plan, fn))
+
+def test_matcher_passes_planned_concurrency(monkeypatch):
+    observations = synthetic.observations(n_tracks=6, duration_s=600)
+    satellites = list(range(1000))
+    seen = []
+
+    def fake_get_rfi_sources(obs, **kwargs):
+        seen.append((kwargs["concurrency_level"], kwargs["time_continuity_resolution"]))
+        return []
+
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", fake_get_rfi_sources)
+    matcher = RfiMatcher(scheduler=_scheduler(cores=4, time_resolution=2))
+    result = matcher.extend_observations_with_rfi(observations, satellites=satellites)
+
+    assert seen == [(3, 2)] * 6
+    assert result["NORAD"].tolist() == [[]] * 6
+    assert matcher.metrics.get("screening_max_concurrency") == 3
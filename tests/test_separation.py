@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import ephemeris, synthetic
+from rfi_matcher.utils.ephemeris import EphemerisGrid
+
+MEERKAT = ARCHIVE_CLASSES["MEERKAT"]
+BEGIN = np.datetime64("2025-06-27T20:00:00", "ns")
+
+
+def _grid_around_target(offsets_alt, ra=270.0, dec=-30.0):
+    # one satellite per altitude offset (degrees) from the target, same azimuth
+    times = ephemeris.time_grid(BEGIN, BEGIN + np.timedelta64(600, "s"), 10)
+    alt, az = ephemeris.radec_to_altaz(ra, dec, times, MEERKAT.latitude, MEERKAT.longitude)
+    offsets = np.asarray(offsets_alt, dtype=float)[:, None]
+    sat_alt = (alt[None, :] + offsets).astype(np.float32)
+    sat_az = np.broadcast_to(az, sat_alt.shape).astype(np.float32)
+    nan = np.full(sat_alt.shape, np.nan, dtype=np.float32)
+    return EphemerisGrid(norad=np.arange(len(offsets)) + 100, times=times, ra=nan, dec=nan, alt=sat_alt, az=sat_az), alt
+
+
+def test_separation_profiles_on_grid():
+    grid, target_alt = _grid_around_target([2.0, 5.0, -90.0])
+    assert target_alt.min() > 30
+
+    profiles = ephemeris.separation_profiles(grid, BEGIN, grid.times[-1], 270.0, -30.0,
+                                             MEERKAT.latitude, MEERKAT.longitude, radii=(3.0, 10.0, 1.0))
+
+    # the satellite below the horizon is left out
+    assert profiles.norad.tolist() == [100, 101]
+    np.testing.assert_allclose(profiles.min_separation, [2.0, 5.0], atol=1e-3)
+    np.testing.assert_allclose(profiles.seconds_visible, [600, 600])
+    np.testing.assert_allclose(profiles.seconds_within, [[600, 600, 0], [0, 600, 0]])
+
+def test_no_visible_satellite():
+    grid, _ = _grid_around_target([-90.0])
+    profiles = ephemeris.separation_profiles(grid, BEGIN, grid.times[-1], 270.0, -30.0,
+                                             MEERKAT.latitude, MEERKAT.longitude, radii=(3.0,))
+    assert len(profiles) == 0
+    assert profiles.seconds_within.shape == (0, 1)
+
+
+def test_matcher_profiles_every_visible_satellite(tmp_path):
+    tles = synthetic.tle_catalogue(150, seed=6)
+    matcher = RfiMatcher()
+    matcher.satellites_filepath = synthetic.write_tle_file(tmp_path / "satellites.tle", tles)
+    observations = synthetic.observations(n_tracks=2, tracks_per_observation=2, duration_s=600, seed=1)
+
+    result = matcher.get_separation_profiles(observations, beamwidth=1, radii=(1, 3, 10), step_seconds=5)
+
+    _, line1, line2 = ephemeris.load_tle_lines(matcher.satellites_filepath)
+    for (_, obs), profiles in zip(observations.iterrows(), result["SEPARATION"]):
+        begin, end = (np.datetime64(obs[c], "ns") for c in ("begin", "end"))
+        grid = ephemeris.compute_ephemeris(line1, line2, ephemeris.time_grid(begin, end, 5),
+                                           MEERKAT.latitude, MEERKAT.longitude, MEERKAT.elevation)
+        above = ephemeris.screen_grid(grid, begin, end, 0, 0, MEERKAT.latitude, MEERKAT.longitude, mainbeam=False)
+
+        assert sorted(p["norad"] for p in profiles) == sorted(above.tolist())
+        duration = (end - begin) / np.timedelta64(1, "s")
+        for p in profiles:
+            assert p["seconds_within_1bw"] <= p["seconds_within_3bw"] <= p["seconds_within_10bw"] <= p["seconds_visible"] <= duration
+            assert (p["min_separation"] <= 1) == (p["seconds_within_1bw"] > 0)
+
+    assert matcher.metrics.get("separation_profiles") == sum(len(p) for p in result["SEPARATION"])
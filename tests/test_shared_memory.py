@@ -0,0 +1,65 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker
+
+import numpy as np
+import pytest
+
+from rfi_matcher.utils.shared_memory import SharedArrays
+
+
+def _worker_sum(spec):
+    shared = SharedArrays.attach(spec)
+    try:
+        return float(shared["values"].sum()), shared["names"].tolist(), shared["values"].flags.writeable
+    finally:
+        shared.close()
+
+
+@pytest.fixture
+def arrays():
+    return {
+        "values": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "names": np.array([b"SAT A", b"SAT B"]),
+        "empty": np.zeros(0, dtype=np.int64),
+    }
+
+
+def test_publish_returns_read_only_copies(arrays):
+    with SharedArrays.publish(arrays) as shared:
+        np.testing.assert_array_equal(shared["values"], arrays["values"])
+        assert shared["empty"].shape == (0,)
+        assert not shared["values"].flags.writeable
+        with pytest.raises(ValueError):
+            shared["values"][0, 0] = 1
+
+
+def test_attach_sees_published_memory(arrays):
+    with SharedArrays.publish(arrays) as shared:
+        attached = SharedArrays.attach(shared.spec)
+        np.testing.assert_array_equal(attached["values"], arrays["values"])
+        attached.close()
+
+
+def test_workers_attach_without_reloading(arrays):
+    ctx = multiprocessing.get_context("spawn")
+    with SharedArrays.publish(arrays) as shared:
+        with ctx.Pool(2) as pool:
+            results = pool.map(_worker_sum, [shared.spec] * 2)
+
+    for total, names, writeable in results:
+        assert total == float(arrays["values"].sum())
+        assert names == [b"SAT A", b"SAT B"]
+        assert not writeable
+
+
+def test_threads_attach_and_publish_concurrently(arrays):
+    register = resource_tracker.register
+    with SharedArrays.publish(arrays) as shared:
+        def attach_and_publish(_):
+            SharedArrays.attach(shared.spec).close()
+            SharedArrays.publish({"values": arrays["values"]}).unlink()
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(attach_and_publish, range(32)))
+    assert resource_tracker.register is register
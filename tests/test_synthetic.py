@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from rfi_matcher.model.archive_dictionary import ARCHIVE_CLASSES
+from rfi_matcher.model.data_archives.data_archive import DataArchive
+from rfi_matcher.utils import ephemeris, synthetic
+from rfi_matcher.utils.skyfield_utils import ra_str_to_deg, dec_str_to_deg
+
+
+# ---------- OBSERVATIONS ----------
+
+@pytest.mark.parametrize("observatory", list(ARCHIVE_CLASSES))
+def test_observations_schema(observatory):
+    df = synthetic.observations(observatory, n_tracks=45, tracks_per_observation=20)
+
+    assert list(df.columns) == DataArchive.get_df_order(None)
+    assert len(df) == 45
+    assert df["observation_id"].nunique() == 3
+    assert (df["name"] == observatory).all()
+    assert (df["begin"] < df["end"]).all()
+
+def test_observations_are_deterministic():
+    a = synthetic.observations(n_tracks=50, seed=1)
+    assert a.equals(synthetic.observations(n_tracks=50, seed=1))
+    assert not a.equals(synthetic.observations(n_tracks=50, seed=2))
+
+def test_observation_targets_are_visible():
+    df = synthetic.observations("MEERKAT", n_tracks=200, sky="clustered")
+    dec = np.array([dec_str_to_deg(d) for d in df["declination"]])
+    ra = np.array([ra_str_to_deg(r) for r in df["right_ascension"]])
+
+    latitude = ARCHIVE_CLASSES["MEERKAT"].latitude
+    assert (dec <= latitude + 85 + 1e-6).all()
+    assert ((ra >= 0) & (ra < 360)).all()
+
+def test_radec_formatting_round_trips():
+    ra = np.array([0.0, 183.7, 359.99])
+    dec = np.array([-89.5, -17.529278, 0.25])
+    np.testing.assert_allclose([ra_str_to_deg(r) for r in synthetic.format_hms(ra)], ra, atol=1e-3)
+    np.testing.assert_allclose([dec_str_to_deg(d) for d in synthetic.format_dms(dec)], dec, atol=1e-6)
+
+
+# ---------- SATELLITES ----------
+
+@pytest.mark.parametrize("orbit, altitude_km", [
+    ("constellation", (540, 560)),
+    ("geo", (35700, 35900)),
+])
+def test_tle_catalogue_orbits(orbit, altitude_km):
+    from sgp4.api import Satrec
+
+    tles = synthetic.tle_catalogue(20, orbit_mix={orbit: 1})
+    for _, line1, line2 in tles:
+        assert len(line1) == len(line2) == 69
+        error, position, _ = Satrec.twoline2rv(line1, line2).sgp4(2460853.5, 0.25)
+        assert error == 0
+        assert altitude_km[0] < np.linalg.norm(position) - synthetic.EARTH_RADIUS_KM < altitude_km[1]
+
+def test_tle_catalogue_files(tmp_path):
+    tles = synthetic.tle_catalogue(30, seed=3)
+    assert tles == synthetic.tle_catalogue(30, seed=3)
+
+    names, line1, _ = ephemeris.load_tle_lines(synthetic.write_tle_file(tmp_path / "sats.tle", tles))
+    assert len(names) == 30
+    assert len(set(ephemeris.tle_norad_ids(line1))) == 30
+
+def test_tle_catalogue_unknown_orbit():
+    with pytest.raises(ValueError, match="Unknown orbit"):
+        synthetic.tle_catalogue(10, orbit_mix={"heo": 1})
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+import pytz
+
+from rfi_matcher.utils import synthetic, time_utils
+from rfi_matcher.model import compact_table
+
+
+def test_parse_times():
+    times = time_utils.parse_times(["2025-06-27T15:17:13", "2025-06-27T15:17:13.25", "2025-06-27T17:17:13+02:00"])
+    assert times.dtype == np.dtype("datetime64[ns]")
+    assert times.tolist() == [1751037433000000000, 1751037433250000000, 1751037433000000000]
+    assert time_utils.parse_times("2025-06-27T17:17:13+02:00") == times[0]
+
+def test_observation_times_of_archive_and_compact_frames():
+    observations = synthetic.observations(n_tracks=5)
+    begin, end = time_utils.observation_times(observations)
+    assert (time_utils.seconds(end - begin) > 0).all()
+
+    compact_begin, compact_end = time_utils.observation_times(compact_table.compact_observations(observations))
+    assert (compact_begin == begin).all() and (compact_end == end).all()
+
+def test_julian_date_matches_scalar_formula():
+    dates = [datetime(2025, 6, 27, 15, 17, 13), datetime(2000, 1, 1, 12), datetime(1999, 12, 31)]
+    expected = [time_utils.get_julian_datetime(d) for d in dates]
+    assert time_utils.julian_date(np.array(dates, dtype="datetime64[ns]")) == pytest.approx(expected, abs=1e-8)
+    assert expected[1] == 2451545.0
+
+    with pytest.raises(TypeError):
+        time_utils.get_julian_datetime("2025-06-27")
+
+def test_terrestrial_time_and_skyfield():
+    times = time_utils.time_grid("2025-06-27T00:00:00", "2025-06-28T00:00:00", 3600)
+    tt = time_utils.terrestrial_time(times)
+    # 37 leap seconds since 2017, TT = TAI + 32.184 s
+    assert (tt - time_utils.julian_date(times)) * 86400 == pytest.approx(69.184, abs=1e-4)
+
+    sky = time_utils.to_skyfield(times)
+    reference = time_utils.timescale().from_datetimes(time_utils.to_datetimes(times))
+    assert sky.tt == pytest.approx(reference.tt, abs=1e-9)
+    assert sky[3].utc_datetime() == datetime(2025, 6, 27, 3, tzinfo=pytz.UTC)
+
+def test_linspace():
+    begin = time_utils.parse_times(["2025-06-27T00:00:00", "2025-06-28T00:00:00"])
+    grid = time_utils.linspace(begin, begin + np.timedelta64(90, "s"), 4)
+    assert grid.shape == (2, 4)
+    assert time_utils.seconds(grid[1] - begin[1]).tolist() == [0, 30, 60, 90]
+    assert time_utils.linspace(begin[0], begin[1], 3).shape == (3,)
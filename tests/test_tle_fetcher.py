@@ -0,0 +1,79 @@
+import gzip
+
+import pytest
+
+from rfi_matcher.custom import my_tle_fetcher_spacetrack as fetcher_module
+from rfi_matcher.custom.my_tle_fetcher_spacetrack import MyTleFetcherSpacetrack, epoch_days, merge_tle_chunks
+from rfi_matcher.utils import synthetic
+from rfi_matcher.utils.metrics import Metrics
+
+
+class FakeSpaceTrack:
+    '''Serves a synthetic catalogue, the first satellite being returned by every daily query.'''
+    requests = []
+
+    def __init__(self, identity, password):
+        self.tles = synthetic.tle_catalogue(6, seed=1)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def gp(self, epoch, iter_lines=False, **kwargs):
+        assert iter_lines
+        FakeSpaceTrack.requests.append(epoch)
+        day = len(FakeSpaceTrack.requests)
+        tles = [self.tles[0], self.tles[day % 5 + 1]]
+
+        async def lines():
+            for tle in tles:
+                for line in tle:
+                    yield line
+        return lines()
+
+
+@pytest.fixture
+def space_track(monkeypatch):
+    import spacetrack
+    FakeSpaceTrack.requests = []
+    monkeypatch.setattr(spacetrack, "AsyncSpaceTrackClient", FakeSpaceTrack)
+    monkeypatch.setattr(fetcher_module, "get_credentials", lambda: ("id", "pwd"))
+    return FakeSpaceTrack
+
+
+def test_epoch_days():
+    assert [d.isoformat() for d in epoch_days("2025-06-30", "2025-07-02")] == ["2025-06-30", "2025-07-01", "2025-07-02"]
+    assert epoch_days("", "now-30") is None
+
+def test_merge_deduplicates_by_norad_and_epoch(tmp_path):
+    tles = synthetic.tle_catalogue(3, seed=0)
+    first, second = tmp_path / "a.3le.gz", tmp_path / "b.3le"
+    with gzip.open(first, "wt") as f:
+        f.write("\n".join(line for tle in tles[:2] for line in tle) + "\n")
+    # second chunk: a duplicate, a new satellite and a two-line entry without name
+    second.write_text("\n".join([*tles[1], tles[2][1], tles[2][2]]) + "\n")
+
+    merged = tmp_path / "satellites.tle"
+    assert merge_tle_chunks([first, second], merged) == 3
+    lines = merged.read_text().splitlines()
+    assert len(lines) == 9
+    assert lines[:6] == [line for tle in tles[:2] for line in tle]
+
+def test_daily_chunks_streamed_and_reused(tmp_path, space_track):
+    path = tmp_path / "satellites.tle"
+    fetcher = MyTleFetcherSpacetrack(path, "2025-06-01", "2025-06-03")
+    fetcher.metrics = Metrics()
+
+    assert fetcher.fetch_tles() == path
+    assert sorted(space_track.requests) == ["2025-06-01--2025-06-02", "2025-06-02--2025-06-03", "2025-06-03--2025-06-04"]
+    assert fetcher.metrics.get("tle_chunks_downloaded") == 3
+    assert len(list((tmp_path / "satellites.tle.chunks").glob("*.3le.gz"))) == 3
+
+    # the satellite seen every day is written once
+    names = path.read_text().splitlines()[::3]
+    assert len(names) == len(set(names)) == 4
+
+    MyTleFetcherSpacetrack(path, "2025-06-01", "2025-06-03").fetch_tles()
+    assert len(space_track.requests) == 3
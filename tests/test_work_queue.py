@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from rfi_matcher.rfi_matcher import RfiMatcher
+from rfi_matcher.utils import sopp_utils, synthetic
+from rfi_matcher.utils.work_queue import WorkQueue, run_worker
+
+
+@pytest.fixture
+def observations():
+    return synthetic.observations(n_tracks=40, tracks_per_observation=5, span_hours=24)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(tmp_path / "queue", lease_seconds=60)
+
+
+def fake_get_rfi_sources(obs, **kwargs):
+    return [f"{obs['observation_id']}@{obs['begin']}"]
+
+
+def test_submit_shards_by_observatory_and_window(queue, observations):
+    n = queue.submit("job", observations, shard_hours=6)
+    assert 1 < n <= 4
+    assert queue.status("job") == {"pending": n}
+
+def test_job_name_is_submitted_once(queue, observations):
+    n = queue.submit("job", observations, shard_hours=6)
+    with pytest.raises(ValueError, match="already submitted"):
+        queue.submit("job", observations, shard_hours=6)
+    assert queue.status("job") == {"pending": n}
+
+def test_claims_are_exclusive(queue, observations):
+    n = queue.submit("job", observations, shard_hours=6)
+    claimed = [queue.claim("job", f"w{k}") for k in range(n + 1)]
+
+    assert claimed[-1] is None
+    assert len({shard.id for shard in claimed[:-1]}) == n
+    assert sum(shard.rows for shard in claimed[:-1]) == len(observations)
+
+def test_expired_lease_is_claimed_again(queue, observations):
+    queue.lease_seconds = 0.01
+    queue.submit("job", observations.head(5), shard_hours=24)
+    first = queue.claim("job", "dead-worker")
+    time.sleep(0.05)
+
+    second = queue.claim("job", "w2")
+    assert second.id == first.id and second.attempts == 2
+    assert not queue.heartbeat(first, "dead-worker")
+
+def test_expired_lease_is_given_up_after_max_attempts(queue, observations):
+    queue.lease_seconds, queue.max_attempts = 0.01, 2
+    queue.submit("job", observations.head(5), shard_hours=24)
+    for _ in range(2):
+        assert queue.claim("job", "dead-worker") is not None
+        time.sleep(0.05)
+
+    assert queue.claim("job", "w") is None
+    assert queue.status("job") == {"failed": 1}
+    assert queue.is_finished("job")
+
+def test_failed_shard_is_retried_then_given_up(queue, observations):
+    queue.max_attempts = 2
+    queue.submit("job", observations.head(5), shard_hours=24)
+    for _ in range(2):
+        queue.fail(queue.claim("job", "w"), "w", "boom")
+
+    assert queue.status("job") == {"failed": 1}
+    assert queue.claim("job", "w") is None
+    with pytest.raises(RuntimeError, match="unfinished"):
+        queue.merge("job")
+
+def test_workers_then_merge(queue, observations, monkeypatch):
+    monkeypatch.setattr(sopp_utils, "get_rfi_sources", fake_get_rfi_sources)
+    queue.submit("job", observations, shard_hours=6)
+
+    done = run_worker(queue, "job", RfiMatcher, worker="a") + run_worker(queue, "job", RfiMatcher, worker="b")
+    assert queue.is_finished("job")
+    assert done == queue.status("job")["done"]
+
+    merged = queue.merge("job")
+    assert merged.index.tolist() == observations.index.tolist()
+    assert merged["NORAD"].tolist() == [[fake_get_rfi_sources(obs)[0]] for _, obs in observations.iterrows()]